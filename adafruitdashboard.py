@@ -1,11 +1,99 @@
+import json
 import time
 import ssl
 import os
-import microcontroller
 import socketpool
 import wifi
+import adafruit_connection_manager
 import adafruit_minimqtt.adafruit_minimqtt as MQTT
 from adafruit_io.adafruit_io import IO_MQTT
+from adafruit_ticks import ticks_diff, ticks_ms
+
+
+# short socket timeout so that loop() can be called with a short timeout from the scheduler.
+# minimqtt keeps retrying reads until recv_timeout, so longer waits (connect, etc.) still work.
+SOCKET_TIMEOUT = 0.05
+
+
+def iso_time(epoch_seconds: int) -> str:
+    """1760000000 -> '2025-10-09T08:53:20Z'"""
+    # CircuitPython has no gmtime(), its localtime() is UTC.  CPython's localtime() isn't
+    t = getattr(time, 'gmtime', time.localtime)(epoch_seconds)
+    return f'{t.tm_year:04}-{t.tm_mon:02}-{t.tm_mday:02}T{t.tm_hour:02}:{t.tm_min:02}:{t.tm_sec:02}Z'
+
+
+def mqtt_publish_size(topic: str, payload: str) -> int:
+    """Bytes on the wire for a QoS 0 MQTT PUBLISH (before TLS overhead)"""
+    remaining = 2 + len(topic.encode()) + len(payload.encode())
+    length_bytes = 1
+    while remaining >= 128 ** length_bytes:
+        length_bytes += 1
+    return 1 + length_bytes + remaining
+
+
+class _PollingSocket:
+    """The broker socket as pump() hands it to minimqtt: a packet's first byte is polled (timeout 0, nothing waiting
+    raises EAGAIN), the rest of the packet is read with the usual SOCKET_TIMEOUT.  A packet can come in several TLS
+    records or TCP segments, its tail isn't necessarily there yet when its first byte is.
+    """
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._polling = False
+
+    def poll(self) -> None:
+        """The next read is the first byte of a packet"""
+        self.sock.settimeout(0)
+        self._polling = True
+
+    def recv_into(self, buffer, nbytes: int = 0) -> int:
+        count = self.sock.recv_into(buffer, nbytes)
+        if self._polling:
+            # a packet has started: wait for the rest of it like any other read
+            self._polling = False
+            self.sock.settimeout(SOCKET_TIMEOUT)
+        return count
+
+    def __getattr__(self, name: str):
+        return getattr(self.sock, name)
+
+
+class PublishStats:
+    """Bytes and time spent publishing.  One batch is one publish_group() call."""
+
+    def __init__(self):
+        self.batches = 0
+        self.messages = 0
+        self.bytes_sent = 0
+        self.fallbacks = 0          # batches sent as one publish per feed
+        self.last_messages = 0
+        self.last_bytes = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+
+    def record(self, messages: int, bytes_sent: int, latency: float) -> None:
+        self.batches += 1
+        self.messages += messages
+        self.bytes_sent += bytes_sent
+        self.last_messages = messages
+        self.last_bytes = bytes_sent
+        self.last_latency = latency
+        self.total_latency += latency
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def last_batch(self) -> str:
+        return (f'{self.last_messages} MQTT message(s), {self.last_bytes} bytes, '
+                f'{self.last_latency * 1000:.0f} ms')
+
+    def report(self) -> str:
+        if not self.batches:
+            return 'publish: no batches yet'
+        return (f'publish: {self.batches} batches, {self.messages} messages, {self.bytes_sent} bytes '
+                f'({self.bytes_sent / self.batches:.0f} per batch), latency mean '
+                f'{self.total_latency / self.batches * 1000:.0f} ms max {self.max_latency * 1000:.0f} ms, '
+                f'{self.fallbacks} per-feed fallbacks')
 
 
 class AdaFruitDashboard:
@@ -15,76 +103,223 @@ class AdaFruitDashboard:
                           on_message = None, 
                           on_publish = None,
                           on_subscribe = None,
-                          on_unsubscribe = None):
+                          on_unsubscribe = None,
+                          group_publish: bool = True):
         """
 
+        :param group_publish: publish_group() sends all feeds of a group in one MQTT message.  False: one message
+                              per feed, for feeds that aren't in an Adafruit IO group.
+
+        Nothing is connected yet, not even wifi.  connect_wifi(), open_tls(), connect() in that order, see
+        connection_manager.py.
         """
-        
-        self._connect_to_wifi()
+        self.group_publish = group_publish
+        self.publish_stats = PublishStats()
+        # pump() counters
+        self.packets_received = 0
+        self.pings_sent = 0
+        self._ping_sent_at = None           # time.monotonic() of PINGREQ still waiting for its PINGRESP
+        # board has no battery backed clock.  Server time (epoch seconds) - time.monotonic(), once known
+        self._epoch_offset = None
+        self._time_subscribed = False
         
         # initialize Adafruit IO MQTT helper, not yet connected
         self.io = self._init_ada_io()
         
-        self.io.on_connect = on_connect
+        # connect and message go through here first, for the server time
+        self._on_connect = on_connect
+        self._on_message = on_message
+        self.io.on_connect = self._connected
         self.io.on_disconnect = on_disconnect
-        self.io.on_message = on_message
+        self.io.on_message = self._message
         self.io.on_publish = on_publish
         self.io.on_subscribe = on_subscribe
         self.io.on_unsubscribe = on_unsubscribe
 
         
+    @property
+    def wifi_connected(self) -> bool:
+        return wifi.radio.connected
+
+
     @staticmethod
-    def _connect_to_wifi() -> None:
-        """Expects to find wifi credentials in settings.toml
+    def connect_wifi() -> None:
+        """Expects to find wifi credentials in settings.toml.  Raises ConnectionError if it can't connect.
+
+        Only needed once: after the first successful connect, CircuitPython reconnects wifi on its own.
         """
+        print(f'Connecting to network "{os.getenv("CIRCUITPY_WIFI_SSID")}": ', end='')
         try:
-            print(f'Connecting to network "{os.getenv("CIRCUITPY_WIFI_SSID")}": ', end='')
             wifi.radio.connect(os.getenv("CIRCUITPY_WIFI_SSID"), os.getenv("CIRCUITPY_WIFI_PASSWORD"))
-            print('CONNECTED')
-            print(f'IP address: {wifi.radio.ipv4_address}')
-        except Exception as ex:
-            # TODO: could make this a loop that retries a few times before microcontroller reset
-            # TODO: when you figure out how to write to local log (default: writes are disabled) make sure to log this
-            print('\nFailed to connect. Error:', ex)
-            print('Board will hard reset in 60 seconds.')
-            time.sleep(60)
-            microcontroller.reset()
+        except Exception:
+            print('FAILED')
+            raise
+        print('CONNECTED')
+        print(f'IP address: {wifi.radio.ipv4_address}')
 
     
     def _init_ada_io(self) -> IO_MQTT:
         """Expects to find Adafruit IO credentials in settings.toml"""
 
         # create a socket pool
-        pool = socketpool.SocketPool(wifi.radio)
+        self._pool = socketpool.SocketPool(wifi.radio)
+        self._ssl_context = ssl.create_default_context()
         
         # initial a new MQTT client
         mqtt_client = MQTT.MQTT(
             broker='io.adafruit.com',
             username=os.getenv('ADAFRUIT_AIO_USERNAME'),
             password=os.getenv('ADAFRUIT_AIO_KEY'),
-            socket_pool=pool,
-            ssl_context=ssl.create_default_context()
+            socket_pool=self._pool,
+            ssl_context=self._ssl_context,
+            # minimqtt only uses the ssl context if told to, otherwise it's plain MQTT on port 1883
+            is_ssl=True,
+            socket_timeout=SOCKET_TIMEOUT,
+            # one try per connect().  minimqtt's own retries sleep up to 32 s in between, blocking every task.
+            # connection_manager.py does the retrying
+            connect_retries=1,
             )
         
+        self._mqtt_client = mqtt_client
         io = IO_MQTT(mqtt_client)
         return io
     
 
+    def _connected(self, client: IO_MQTT) -> None:
+        if self._epoch_offset is None:
+            # broker sends this every second, unsubscribed in loop() once one has come in
+            client.subscribe_to_time('seconds')
+            self._time_subscribed = True
+        if self._on_connect is not None:
+            self._on_connect(client)
+
+
+    def _message(self, client: IO_MQTT, feed_id: str, payload) -> None:
+        if feed_id == 'seconds':
+            self._epoch_offset = int(payload) - time.monotonic()
+            return
+        if self._on_message is not None:
+            self._on_message(client, feed_id, payload)
+
+
+    def server_time(self, monotonic: float = None) -> int | None:
+        """Epoch seconds (UTC) at time.monotonic() == `monotonic`, default now.  None until the server has sent its
+        time, shortly after the first connect.
+        """
+        if self._epoch_offset is None:
+            return None
+        if monotonic is None:
+            monotonic = time.monotonic()
+        return int(monotonic + self._epoch_offset)
+
+
     @property
     def is_connected(self) -> bool:
         return self.io.is_connected
        
        
+    def open_tls(self) -> None:
+        """Open the TLS connection to the broker: DNS, TCP connect, TLS handshake.  connect() then uses it.
+
+        On its own so that a failed handshake (or unreachable broker) can be told apart from the broker refusing the
+        MQTT login.
+        """
+        client = self._mqtt_client
+        manager = adafruit_connection_manager.get_connection_manager(self._pool)
+        sock = manager.get_socket(client.broker, client.port, 'mqtt:', timeout=SOCKET_TIMEOUT,
+                                  is_ssl=True, ssl_context=self._ssl_context)
+        # hand it back as available.  minimqtt's connect() asks for the same host/port/proto and gets this one
+        manager.free_socket(sock)
+
+
     def connect(self) -> None:
+        """MQTT login.  Opens the TLS connection first if open_tls() wasn't called."""
         self.io.connect()
+
+
+    def drop_connection(self) -> None:
+        """Close the broker connection after an error, without waiting on the broker.  is_connected is False
+        afterward, connect() starts over.
+        """
+        try:
+            # sends DISCONNECT if the socket still works, closes it either way
+            self._mqtt_client.disconnect()
+        except MQTT.MMQTTException:
+            pass    # already disconnected
+        self._time_subscribed = False
+        self._ping_sent_at = None
         
     
-    def loop(self) -> None:
+    def loop(self, timeout: float = 1) -> None:
         """Manually process messages from Adafruit IO.
 
-        Call this method to check incoming subscription messages.
+        Call this method to check incoming subscription messages.  Always takes at least `timeout`, even if nothing
+        came in, and a keep-alive ping waits for the broker's answer.  See pump() for one that doesn't.
+
+        :param timeout: Socket timeout in seconds.  This is roughly how long this call can block.
         """
-        self.io.loop()
+        self.io.loop(timeout)
+        self._unsubscribe_time()
+
+
+    def pump(self, budget: float = 0.02) -> int:
+        """Handle messages that have already arrived, for at most about `budget` seconds.  Returns packets handled.
+
+        Returns right away if nothing is waiting: the first byte of a packet is polled with timeout 0 instead of
+        waiting out a timeout like loop() does.  A packet is only started if there is budget left, and once started
+        is read whole, with the usual SOCKET_TIMEOUT per read (see _PollingSocket).
+
+        Keep-alive pings are sent without waiting for the answer, it is picked up by a later pump().  No answer
+        within keep_alive seconds raises MMQTTException, same as loop().
+
+        Built on minimqtt internals, as of adafruit_minimqtt 7.10.4 (lib.zip, on the board) and 8.1 (host): _sock,
+        _wait_for_msg() (reads through _sock.recv_into()) and _last_msg_sent_timestamp.  Check them when updating
+        minimqtt.
+
+        :param budget: Seconds this call may take.  Callbacks (on_message) run inside it.
+        """
+        client = self._mqtt_client
+        if not client.is_connected():
+            return 0
+        start = time.monotonic()
+
+        if self._ping_sent_at is not None:
+            if start - self._ping_sent_at > client.keep_alive:
+                raise MQTT.MMQTTException(f'PINGRESP not returned from broker within {client.keep_alive} seconds.')
+        elif ticks_diff(ticks_ms(), client._last_msg_sent_timestamp) / 1000 >= client.keep_alive:
+            # what minimqtt's ping() sends, without waiting for the answer.  7.10 has no _send_bytes()
+            client._sock.send(MQTT.MQTT_PINGREQ)
+            client._last_msg_sent_timestamp = ticks_ms()
+            self._ping_sent_at = start
+            self.pings_sent += 1
+
+        handled = 0
+        sock = client._sock
+        polling = _PollingSocket(sock)
+        client._sock = polling
+        try:
+            while time.monotonic() - start < budget:
+                polling.poll()
+                packet_type = client._wait_for_msg()      # None: nothing waiting (EAGAIN)
+                if packet_type is None:
+                    break
+                if packet_type == MQTT.MQTT_PINGRESP:
+                    self._ping_sent_at = None
+                handled += 1
+        finally:
+            # unless minimqtt dropped the socket meanwhile
+            if client._sock is polling:
+                client._sock = sock
+                sock.settimeout(SOCKET_TIMEOUT)
+        self.packets_received += handled
+        self._unsubscribe_time()
+        return handled
+
+
+    def _unsubscribe_time(self) -> None:
+        if self._time_subscribed and self._epoch_offset is not None:
+            self.io.unsubscribe_from_time('seconds')
+            self._time_subscribed = False
         
         
     def publish(self, feed: str, value) -> None:
@@ -96,3 +331,50 @@ class AdaFruitDashboard:
 
         # TODO: test metadata, is_group parameters
         self.io.publish(feed, value)
+
+
+    def publish_group(self, group: str, values: dict, created_at: int = None) -> None:
+        """Publishes several feeds of an Adafruit IO group in one MQTT message.
+
+        Adafruit IO stores each value in feed `group.key`, same as calling publish(f'{group}.{key}', value) for each,
+        but it is one message (one TLS record, one chance to fail) instead of one per feed.
+
+        Falls back to one publish per feed if group publishing is turned off, or the group message is rejected by
+        the MQTT client.  Connection errors are not handled here, they are raised like publish() does: that includes
+        an MMQTTException from the group publish when the client is no longer connected.
+        Bytes and time are recorded in `publish_stats`.
+
+        :param group: Adafruit IO group key, e.g. 'air-quality-sensors'
+        :param values: feed key (without group prefix) -> value, e.g. {'co2': 812, 'humidity': 45.2}
+        :param created_at: Epoch seconds the values belong to, for backfilling (see server_time()).  Default: now
+        """
+        start = time.monotonic()
+        timestamp = None if created_at is None else iso_time(created_at)
+        if self.group_publish:
+            # not io.publish(..., is_group=True): that also publishes the whole payload to feed `group`
+            topic = f'{self.io._user}/g/{group}'
+            message = {'feeds': values}
+            if timestamp is not None:
+                message['created_at'] = timestamp
+            payload = json.dumps(message)
+            try:
+                self._mqtt_client.publish(topic, payload)
+                self.publish_stats.record(1, mqtt_publish_size(topic, payload), time.monotonic() - start)
+                return
+            except MQTT.MMQTTException as ex:
+                # a lost connection is raised as MMQTTException too: per-feed publishes would only fail the same way
+                if not self._mqtt_client.is_connected():
+                    raise
+                print(f'group publish to "{group}" failed ({ex}), publishing feeds one by one')
+
+        self.publish_stats.fallbacks += 1
+        bytes_sent = 0
+        for key, value in values.items():
+            feed = f'{group}.{key}'
+            if timestamp is not None:
+                # plain feed topic only takes a value, the /json one takes a timestamp too
+                feed += '/json'
+                value = json.dumps({'value': value, 'created_at': timestamp})
+            self.io.publish(feed, value)
+            bytes_sent += mqtt_publish_size(f'{self.io._user}/f/{feed}', str(value))
+        self.publish_stats.record(len(values), bytes_sent, time.monotonic() - start)
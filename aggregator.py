@@ -0,0 +1,121 @@
+import math
+import time
+
+'''
+Running statistics of sensor readings, in fixed memory.
+
+The graphs show one point per minute and the dashboard gets one upload per minute.  Both want the average of the
+readings in that minute, not just the latest reading.  Keeping every reading in a list and doing sum()/len() at the
+end works, but the list grows with every reading - and keeps growing if the loop stalls past the end of the minute.
+
+StreamingStats keeps count, mean, min, max and variance, updated per value with Welford's method (numerically
+stable, no list).  IntervalAggregator keeps one set of those per sensor value for the current interval, and the set
+for the last completed interval.  When an interval ends, the two sets swap places, nothing is allocated.
+
+usage:
+    interval = IntervalAggregator(interval_seconds=60)
+    interval.add(co2=co2, temperature_c=temperature_c, humidity=humidity)     # every reading
+    interval.add(pm2_5=pm2_5)                                                 # sensors report what they measure
+    ...
+    if interval.sequence != last_seen:          # an interval has completed since we last looked
+        last_seen = interval.sequence
+        average_co2 = interval.completed.co2.mean
+'''
+
+
+class StreamingStats:
+    """count, mean, min, max and variance of the values added so far.  O(1) memory."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0     # sum of squared differences from the mean
+
+    def add(self, value: int | float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def variance(self) -> float:
+        """Sample variance.  0 with fewer than 2 values."""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class SensorStats:
+    """StreamingStats for each value the air sensors report.  A value's count is 0 if no sensor reported it"""
+
+    def __init__(self):
+        self.co2 = StreamingStats()
+        self.temperature_c = StreamingStats()
+        self.humidity = StreamingStats()
+        self.pm2_5 = StreamingStats()
+        self.count = 0      # readings, from any sensor
+
+    def add(self, *, co2: int | float = None, temperature_c: float = None, humidity: float = None,
+            pm2_5: int | float = None) -> None:
+        """None: not measured by the sensor this reading is from"""
+        self.count += 1
+        if co2 is not None:
+            self.co2.add(co2)
+        if temperature_c is not None:
+            self.temperature_c.add(temperature_c)
+        if humidity is not None:
+            self.humidity.add(humidity)
+        if pm2_5 is not None:
+            self.pm2_5.add(pm2_5)
+
+    def reset(self) -> None:
+        self.co2.reset()
+        self.temperature_c.reset()
+        self.humidity.reset()
+        self.pm2_5.reset()
+        self.count = 0
+
+
+class IntervalAggregator:
+    """Reduces readings into fixed intervals.  See module docstring."""
+
+    def __init__(self, interval_seconds: float = 60):
+        self.interval_seconds = interval_seconds
+        self.current = SensorStats()
+        self.completed = SensorStats()  # last completed interval.  Empty (count 0) until the first one completes
+        self.sequence = 0               # number of intervals completed so far
+        self._start = time.monotonic()
+
+    def add(self, *, co2: int | float = None, temperature_c: float = None, humidity: float = None,
+            pm2_5: int | float = None) -> bool:
+        """Add a reading, None for what its sensor doesn't measure.  Returns True if this closed the previous interval
+        (reading goes into the new one).
+
+        An interval closes on the first reading after it ran out.  If nothing calls add() for a while, the interval
+        just gets longer, its memory doesn't.  The next interval starts where this one should have ended, not at the
+        reading that closed it, so intervals don't drift later by a reading period each.  After a stall of two
+        intervals or more the grid starts over at the reading, rather than closing a run of short catch-up intervals.
+        """
+        closed = False
+        now = time.monotonic()
+        if now - self._start >= self.interval_seconds and self.current.count:
+            self.current, self.completed = self.completed, self.current
+            self.current.reset()
+            self.sequence += 1
+            self._start += self.interval_seconds
+            if now - self._start >= self.interval_seconds:
+                self._start = now
+            closed = True
+        self.current.add(co2=co2, temperature_c=temperature_c, humidity=humidity, pm2_5=pm2_5)
+        return closed
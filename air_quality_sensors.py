@@ -1,24 +1,108 @@
 # import configparser  lol there is no configparser in CircuitPython
+import asyncio
 import json
 import os
+import time
 # Adafruit imports below
 import adafruit_scd4x
 import board
+from sensor_registry import AirSensor, Measurement, new_measurement
 
 '''
 This wrapper intended to keep command constraints, settings from robot level. 
 Extending the class would be less code, but then all those methods would be available to bot
 I'll keep it this way for now, but revisit this in future tense and decide if you made the right choice
 
- NOTE: could make another layer on top of this that is an interface for different sensors
-       
-even better might be dynamically import wrapper modules (my own wrappers) so this could load up sensors
-without any rewrite?
-    - make this module an interface?
-    - check out importlib
+The interface for different sensors is AirSensor in sensor_registry.py, which also imports this module only when
+settings.toml lists "scd4x" in `sensors`.
+
+Settings (altitude, temperature offset, auto-calibration) can only be read or written while the SCD4x is idle, and
+stopping periodic measurement costs 500 ms plus a whole measurement period (5 s FAST, 30 s SLOW) before data is ready
+again.  So the settings are cached: read or written once at startup, getters return the cached values without
+touching the sensor.  Setters go through configure(), which collects changes and applies them in one idle window,
+one stop and one restart, skipping values that don't change anything.  A setter outside configure() is its own
+window.  See ConfigStats for the cost.
+
+usage:
+    with sensor.configure():
+        sensor.altitude = 100
+        sensor.temperature_offset = 3.5
+        sensor.measurement_mode = AirSensorSCD4x.MeasurementMode.SLOW
+    # sensor was stopped once, here
 '''
 
-class AirSensorSCD4x:
+
+# commands and their execution times in seconds, from the SCD4x datasheet
+_READ_MEASUREMENT = b'\xec\x05'
+_READ_MEASUREMENT_TIME = 0.001
+_START_PERIODIC = b'\x21\xb1'
+_PERIODIC_INTERVAL = 5.0           # first reading is ready this long after start
+_STOP_PERIODIC = b'\x3f\x86'
+_STOP_TIME = 0.5
+_MEASURE_SINGLE_SHOT = b'\x21\x9d'
+_SINGLE_SHOT_TIME = 5.0
+_MEASURE_SINGLE_SHOT_RHT_ONLY = b'\x21\x96'
+_SINGLE_SHOT_RHT_TIME = 0.05
+# extra wait for data_ready after the datasheet time is up, before giving up
+_DATA_READY_TIMEOUT = 1.0
+
+
+# AirSensorSCD4x setting name -> adafruit_scd4x.SCD4X property
+_CHIP_SETTINGS = {
+    'altitude': 'altitude',
+    'temperature_offset': 'temperature_offset',
+    'auto_calibration': 'self_calibration_enabled',
+}
+
+
+class ConfigStats:
+    """What configuration changes cost: idle windows opened, time blocked in them, and the gap in data they caused"""
+
+    def __init__(self):
+        self.transactions = 0       # configure() blocks and single setter calls
+        self.idle_windows = 0       # times periodic measurement was stopped for them
+        self.settings_written = 0
+        self.writes_skipped = 0     # value already on the sensor
+        self.blocked_time = 0.0     # seconds spent in stop + writes + start, in total
+        self.last_blocked_time = 0.0
+        self.data_gaps = 0
+        self.last_data_gap = 0.0    # seconds from stop until the next reading was ready
+        self.max_data_gap = 0.0
+
+    def report(self) -> str:
+        return (f'sensor config: {self.transactions} transactions, {self.idle_windows} idle windows, '
+                f'{self.settings_written} settings written, {self.writes_skipped} skipped, '
+                f'blocked {self.blocked_time:.2f} s (last {self.last_blocked_time:.2f} s), '
+                f'data gap last {self.last_data_gap:.1f} s, max {self.max_data_gap:.1f} s')
+
+
+class _Configuration:
+    """Context manager returned by AirSensorSCD4x.configure().  CircuitPython has no contextlib"""
+
+    def __init__(self, sensor: 'AirSensorSCD4x'):
+        self._sensor = sensor
+
+    def __enter__(self) -> 'AirSensorSCD4x':
+        self._sensor._configuring += 1
+        return self._sensor
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        sensor = self._sensor
+        sensor._configuring -= 1
+        if sensor._configuring == 0:
+            if exc_type is None:
+                sensor.config_stats.transactions += 1
+                sensor._apply()
+            else:
+                # nothing half-applied: drop the changes, sensor keeps measuring as it was
+                sensor._pending.clear()
+                sensor._measurement_mode = sensor._running_mode
+        return False
+
+
+class AirSensorSCD4x(AirSensor):
+    quantities = ('co2', 'temperature_c', 'humidity')
+
     # there are no Enums in CircuitPython.
     class MeasurementMode:
         IDLE = 0,  # Only SCD41 allows single-shot mode.  use for manual measurement cycles longer than 30 seconds
@@ -37,7 +121,8 @@ class AirSensorSCD4x:
     
     def __init__(self, sensor_model: SensorModel = SensorModel.SCD41, 
                        measurement_mode: MeasurementMode = MeasurementMode.SLOW, 
-                       load_settings_file: bool = True):
+                       load_settings_file: bool = True,
+                       single_shot_period: float = 60):
         """Initialize SCD40 or SCD41 using default I2C address 0x62
                 
         :param sensor_model: SensorModel.SCD40 or SensorModel.SCD41.  Only SCD41 allows single-shot measurements
@@ -45,24 +130,49 @@ class AirSensorSCD4x:
         :param load_settings_file: Set to True to utilize local settings file for altitude, temp-offset, and cal-enable.
                                    This will override any on-board settings stored in chip EEPROM
                                    False: On-board settings are used.
+        :param single_shot_period: Seconds between the single shots sample() takes in IDLE mode
         """
         i2c = board.STEMMA_I2C()   # use built-in STEMMA QT connector
         # We can specify I2C address in this constructor, but there is not a way to change address from default 0x62
         # I.e., there are no address pins on Sensirion SCD4x, therefore only 1 of these devices on I2C bus
         self._scd4x = adafruit_scd4x.SCD4X(i2c)
         self._sensor_model = sensor_model
+        self.config_stats = ConfigStats()
+        self._configuring = 0           # configure() nesting depth
+        self._pending = {}              # setting name -> value, applied when the outermost configure() ends
+        self._stopped_at = None         # when the last idle window started, until data is ready again
+        self._reply = bytearray(9)      # read_measurement: 3 words, each with a CRC byte
+        self._measurement = None        # last read()
+        self._busy_until = 0.0          # sensor is executing a single shot or stop until then, see _wait_until_free()
+        self._single_shot_lock = asyncio.Lock()
+        self.single_shots = 0
+        self.single_shot_period = single_shot_period
+        self._last_single_shot = None
+
         # settings from on-chip are loaded automatically when sensor is powered up.
-        self._scd4x.stop_periodic_measurement()
-        if load_settings_file:
-            self._load_settings_from_file()  
-        self.measurement_mode = measurement_mode
+        # SCD4X() has already stopped periodic measurement (sensor may still be measuring from before a soft reload),
+        # that is the only idle window at startup: settings are read (or written) and measurement starts once, below
+        self._running_mode = AirSensorSCD4x.MeasurementMode.IDLE
+        self._settings = {name: getattr(self._scd4x, chip_name) for name, chip_name in _CHIP_SETTINGS.items()}
+        with self.configure():
+            if load_settings_file:
+                self._load_settings_from_file()
+            self.measurement_mode = measurement_mode
         
         
+    @classmethod
+    def from_settings(cls) -> 'AirSensorSCD4x':
+        """For sensor_registry.  settings.toml `scd4x_model = "SCD40"` for an SCD40, SCD41 otherwise.  Starts in FAST"""
+        model = AirSensorSCD4x.SensorModel.SCD40 if os.getenv('scd4x_model') == 'SCD40' \
+                else AirSensorSCD4x.SensorModel.SCD41
+        return cls(sensor_model = model, measurement_mode = AirSensorSCD4x.MeasurementMode.FAST)
+
+
     def _load_settings_from_file(self) -> None:
         """ Load settings from local file.  
 
         This will override settings loaded from on-board EEPROM. 
-        Call .stop_periodic_measurement() prior to this method.
+        Call inside configure(), so they are written in the same idle window.
         """
         # TODO:  switch to using JSON file?  Keep settings.toml for only storing credentials?
 
@@ -76,18 +186,82 @@ class AirSensorSCD4x:
         temperature_offset = os.getenv("scd4x_temperature_offset")
         self_calibration_enabled = os.getenv("scd4x_self_cal_enabled")
                 
-        self._scd4x.self_calibration_enabled = bool(self_calibration_enabled)
-        self._scd4x.altitude = altitude
-        self._scd4x.temperature_offset = temperature_offset
-    
-    
+        self.auto_calibration = bool(self_calibration_enabled)
+        self.altitude = altitude
+        self.temperature_offset = temperature_offset
+
+
+    def configure(self) -> _Configuration:
+        """Group setting and measurement mode changes into one idle window.  Use as `with sensor.configure():`
+
+        Changes are applied when the outermost `with` block ends, dropped if it raises.  Getters return the new
+        values right away.
+        """
+        return _Configuration(self)
+
+
+    def _set(self, name: str, value) -> None:
+        self._pending[name] = value
+        if not self._configuring:
+            self.config_stats.transactions += 1
+            self._apply()
+
+
+    def _apply(self) -> None:
+        """Write pending changes and switch measurement mode, with at most one stop and one start.
+
+        Waits out the stop that ends an SCD40 single shot (up to 500 ms, blocking like the stop here does).  Raises
+        RuntimeError during a single shot, and if the sensor doesn't take a command: then nothing that didn't reach
+        the sensor is lost, the measurement mode stays what the sensor runs and the changes stay pending, so setting
+        them again retries.
+        """
+        stats = self.config_stats
+        changes = {}
+        for name, value in self._pending.items():
+            if self._settings[name] == value:
+                stats.writes_skipped += 1
+            else:
+                changes[name] = value
+        self._pending.clear()
+        if not changes and self._measurement_mode == self._running_mode:
+            return
+
+        started = time.monotonic()
+        try:
+            if self._single_shot_lock.locked():
+                # sensor is in the middle of a measurement (SCD40: a periodic burst), any command now is NACKed
+                raise RuntimeError('SCD4x single shot in progress, configure after it')
+            if self._busy_until > started:
+                time.sleep(self._busy_until - started)
+            if self._running_mode != AirSensorSCD4x.MeasurementMode.IDLE:
+                # 500 ms, and the next reading is a whole measurement period after the restart
+                self._scd4x.stop_periodic_measurement()
+                self._running_mode = AirSensorSCD4x.MeasurementMode.IDLE
+                stats.idle_windows += 1
+                if self._stopped_at is None:
+                    self._stopped_at = started
+            for name, value in changes.items():
+                setattr(self._scd4x, _CHIP_SETTINGS[name], value)
+                self._settings[name] = value
+                stats.settings_written += 1
+            self._start_measurement_mode()
+        except (OSError, RuntimeError):
+            for name, value in changes.items():
+                if self._settings[name] != value:
+                    self._pending[name] = value
+            self._measurement_mode = self._running_mode
+            raise
+
+        stats.last_blocked_time = time.monotonic() - started
+        stats.blocked_time += stats.last_blocked_time
+
+
     def _start_measurement_mode(self) -> None:
         """Sends command to sensor module to commence measurement mode defined in self.measurement_mode
-        """
 
-        # This does nothing if already stopped. But there will be an error generated if we try to start a
-        # periodic measurement mode while already in periodic mode
-        self._scd4x.stop_periodic_measurement()
+        Sensor must be idle: there will be an error generated if we try to start a periodic measurement mode while
+        already in periodic mode.  See _apply()
+        """
 
         # CircuitPython does not currently support match/case syntax
         #match self._measurement_mode:
@@ -104,6 +278,7 @@ class AirSensorSCD4x:
             self._scd4x.start_low_periodic_measurement()
         elif self.measurement_mode == AirSensorSCD4x.MeasurementMode.FAST:
             self._scd4x.start_periodic_measurement()
+        self._running_mode = self.measurement_mode
             
                 
     @property
@@ -113,7 +288,9 @@ class AirSensorSCD4x:
     @measurement_mode.setter
     def measurement_mode(self, mode: MeasurementMode) -> None:
         self._measurement_mode = mode
-        self._start_measurement_mode()
+        if not self._configuring:
+            self.config_stats.transactions += 1
+            self._apply()
         
 
     @property
@@ -131,12 +308,9 @@ class AirSensorSCD4x:
 
         .. note::
                 Retrieving altitude offset cannot be done during periodic measurement modes.
-                This getter stops measurement mode, then returns sensor to previous measurement mode after retrieving altitude offset.
+                Returns the cached value, read at startup or set since.  Measurement keeps going.
         """
-        self._scd4x.stop_periodic_measurement()  # SCD4X must be in idle mode to get value
-        altitude = self._scd4x.altitude
-        self._start_measurement_mode()  # resumes measurement mode
-        return altitude
+        return self._pending.get('altitude', self._settings['altitude'])
         
     @altitude.setter
     def altitude(self, height: int) -> None:
@@ -147,13 +321,12 @@ class AirSensorSCD4x:
         .. note::
                 Setting altitude offset cannot be done during periodic measurement modes.
                 This setter stops measurement mode, then returns sensor to previous measurement mode after altitude offset is set.
+                Inside configure(), that happens once for all changes, at the end of the block.
 
         NOTE: Setting an ambient pressure using `.set_ambient_pressure()` overrides any pressure compensation based
         on altitude offset.
         """
-        self._scd4x.stop_periodic_measurement()  # SCD4X must be in idle mode to set value
-        self._scd4x.altitude = height
-        self._start_measurement_mode()  # resumes measurement mode
+        self._set('altitude', height)
             
             
     @property
@@ -165,13 +338,10 @@ class AirSensorSCD4x:
 
         .. note::
                 Retrieving temperature offset cannot be done during periodic measurement modes.
-                This getter stops measurement mode, then returns sensor to previous measurement mode after retrieving offset.
+                Returns the cached value, read at startup or set since.  Measurement keeps going.
         """
         # NOTE : may need to be in IDLE mode to retrieve value, datasheet suggests this on page 8, but not on page 11
-        self._scd4x.stop_periodic_measurement()
-        offset = self._scd4x.temperature_offset
-        self._start_measurement_mode()  # resumes measurement mode
-        return offset
+        return self._pending.get('temperature_offset', self._settings['temperature_offset'])
     
     @temperature_offset.setter
     def temperature_offset(self, offset: int | float) -> None:
@@ -183,10 +353,9 @@ class AirSensorSCD4x:
         .. note::
                 Setting temperature offset cannot be done during periodic measurement modes.
                 This setter stops measurement mode, then returns sensor to previous measurement mode after temperature offset is set.
+                Inside configure(), that happens once for all changes, at the end of the block.
         """
-        self._scd4x.stop_periodic_measurement()  # SCD4X must be in idle mode to set value
-        self._scd4x.temperature_offset = offset
-        self._start_measurement_mode()  # resumes measurement mode
+        self._set('temperature_offset', offset)
         
         
     @property
@@ -194,14 +363,11 @@ class AirSensorSCD4x:
         """Get auto-calibration enabled status
 
         Enabled by default. Retrieving status cannot be done during periodic measurement modes.
-        This getter stops measurement mode, then returns sensor to previous measurement mode after retrieving status.
+        Returns the cached value, read at startup or set since.  Measurement keeps going.
 
         TODO: put datasheet details here.
         """
-        self._scd4x.stop_periodic_measurement()
-        cal = self._scd4x.self_calibration_enabled
-        self._start_measurement_mode()  # resumes measurement mode
-        return cal
+        return self._pending.get('auto_calibration', self._settings['auto_calibration'])
         
     @auto_calibration.setter
     def auto_calibration(self, enabled: bool) -> None:
@@ -209,65 +375,190 @@ class AirSensorSCD4x:
 
         Enabled by default. Setting status cannot be done during periodic measurement modes.
         This setter stops measurement mode, then returns sensor to previous measurement mode after setting status.
+        Inside configure(), that happens once for all changes, at the end of the block.
 
         TODO: put datasheet details here.
         """
-        self._scd4x.stop_periodic_measurement()  # SCD4X must be in idle mode to set value
-        self._scd4x.self_calibration_enabled = enabled
-        self._start_measurement_mode()  # resumes measurement mode
+        self._set('auto_calibration', enabled)
         
        
-    ###### use these 3 methods when in a periodic measurement mode
+    ###### use these methods when in a periodic measurement mode
     @property
     def data_ready(self) -> bool:
         """Checks if measurement values are ready in output buffer.
 
         This does not read values.  This property is useful if caller only wants new values.
         """
-        return self._scd4x.data_ready
+        ready = self._scd4x.data_ready
+        if ready and self._stopped_at is not None:
+            # first reading since an idle window: that's the gap a configuration change left in the data
+            stats = self.config_stats
+            stats.data_gaps += 1
+            stats.last_data_gap = time.monotonic() - self._stopped_at
+            stats.max_data_gap = max(stats.max_data_gap, stats.last_data_gap)
+            self._stopped_at = None
+        return ready
+
+    def read(self) -> Measurement:
+        """Reads CO2, temperature and humidity together and returns them as one Measurement.
+
+        Call when data_ready is True.  One read_measurement command and one 9-byte reply, CRC checked: 2 bus
+        transactions.  Getting the same three values from the adafruit_scd4x properties takes 8, each property checks
+        data_ready on the bus again first.
+        """
+        reply = self._reply
+        self._send(_READ_MEASUREMENT)
+        time.sleep(_READ_MEASUREMENT_TIME)
+        with self._scd4x.i2c_device as i2c:
+            i2c.readinto(reply)
+        for i in range(0, 9, 3):
+            if adafruit_scd4x.SCD4X._crc8(reply[i:i + 2]) != reply[i + 2]:
+                raise RuntimeError('CRC check failed while reading data')
+
+        # conversions from the SCD4x datasheet, same as adafruit_scd4x
+        self._measurement = Measurement(time.monotonic(),
+                                        (reply[0] << 8) | reply[1],
+                                        -45 + 175 * (((reply[3] << 8) | reply[4]) / 65535),
+                                        100 * (((reply[6] << 8) | reply[7]) / 65535),
+                                        None)
+        return self._measurement
+
+    @property
+    def measurement(self) -> Measurement | None:
+        """Last read() result, None before the first one.  No bus access."""
+        return self._measurement
         
     @property
     def CO2(self) -> int:
         """Returns the CO2 concentration in PPM (parts per million)
 
         .. note::
-            Between measurements, the most recent reading will be cached and returned.
+            Value from the last read(), no bus access.  Use read() to get all three values at once.
         """
-        return self._scd4x.CO2
+        return self._measurement.co2 if self._measurement else None
         
     @property
     def temperature(self) -> float:
         """Returns the current temperature in degrees Celsius
 
         .. note::
-            Between measurements, the most recent reading will be cached and returned.
+            Value from the last read(), no bus access.  Use read() to get all three values at once.
         """
-        return self._scd4x.temperature
+        return self._measurement.temperature_c if self._measurement else None
         
     @property
     def relative_humidity(self) -> float:
         """Returns the current relative humidity in %rH.
 
         .. note::
-            Between measurements, the most recent reading will be cached and returned.
+            Value from the last read(), no bus access.  Use read() to get all three values at once.
         """
-        return self._scd4x.relative_humidity
+        return self._measurement.humidity if self._measurement else None
         
     
         
 
-    # NOTE: for single-shot mode (SCD41 only) may want this be wrapped up in a method that triggers measurement and returns values
+    async def sample(self) -> Measurement | None:
+        """New reading, or None if there is none yet.  In IDLE mode a single shot every single_shot_period seconds:
+        5 s, awaited (the other tasks keep running meanwhile, the calling task shows up as over budget)
+        """
+        if self._measurement_mode == AirSensorSCD4x.MeasurementMode.IDLE:
+            now = time.monotonic()
+            if self._last_single_shot is not None and now - self._last_single_shot < self.single_shot_period:
+                return None
+            self._last_single_shot = now
+            return await self.single_shot()
+        if not self.data_ready:
+            return None
+        # all three values from one bus read
+        return self.read()
+
+
+    ###### single-shot measurements, use in IDLE mode
+    async def single_shot(self) -> Measurement:
+        """On-demand measurement of CO2 concentration, relative humidity, and temperature.  Returns a Measurement.
+
+        Takes 5 s, awaited, so other tasks keep running.  A call while the sensor is still busy (a measurement from
+        another task, or the 500 ms after a stop) waits its turn instead of getting a NACK.
+
+        SCD41: single-shot command.  SCD40 has none, so it is emulated: start periodic measurement, take the first
+        reading (5 s), stop again.  Same result, somewhat more power.
+        """
+        return await self._single_shot(_MEASURE_SINGLE_SHOT, _SINGLE_SHOT_TIME)
+
+    async def single_shot_rht_only(self) -> Measurement:
+        """On-demand measurement of relative humidity and temperature only.  Returns a Measurement, co2 is None.
+
+        SCD41: 50 ms, awaited.  SCD40: emulated like single_shot(), so 5 s, and co2 is filled in after all.
+        """
+        measurement = await self._single_shot(_MEASURE_SINGLE_SHOT_RHT_ONLY, _SINGLE_SHOT_RHT_TIME)
+        if self._sensor_model == AirSensorSCD4x.SensorModel.SCD41:
+            # sensor reports CO2 as 0 here.  None, so nobody averages a 0 into their CO2
+            measurement = new_measurement(measurement.timestamp, temperature_c = measurement.temperature_c,
+                                          humidity = measurement.humidity)
+            self._measurement = measurement
+        return measurement
+
+
+    async def _single_shot(self, command: bytes, duration: float) -> Measurement:
+        if self._measurement_mode != AirSensorSCD4x.MeasurementMode.IDLE:
+            raise Exception(f'Must not be in periodic measurement modes when triggering single-shot measurement. Current mode {self._measurement_mode}')
+
+        # one at a time: the sensor NACKs commands while it is measuring
+        async with self._single_shot_lock:
+            await self._wait_until_free()
+            if self._sensor_model == AirSensorSCD4x.SensorModel.SCD41:
+                self._send(command)
+                await asyncio.sleep(duration)
+                measurement = await self._read_when_ready()
+            else:
+                # SCD40: short periodic burst instead
+                self._send(_START_PERIODIC)
+                await asyncio.sleep(_PERIODIC_INTERVAL)
+                try:
+                    measurement = await self._read_when_ready()
+                finally:
+                    # not the driver's stop_periodic_measurement(), that sleeps for the 500 ms.  Next command waits
+                    self._send(_STOP_PERIODIC)
+                    self._busy_until = time.monotonic() + _STOP_TIME
+            self.single_shots += 1
+            return measurement
+
+
+    async def _wait_until_free(self) -> None:
+        remaining = self._busy_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+
+    async def _read_when_ready(self) -> Measurement:
+        """read() once data_ready.  Normally it already is when the datasheet time is up"""
+        give_up = time.monotonic() + _DATA_READY_TIMEOUT
+        while True:
+            try:
+                if self._scd4x.data_ready:
+                    return self.read()
+            except RuntimeError:
+                pass    # NACK: still measuring.  adafruit_scd4x turns the OSError into RuntimeError
+            if time.monotonic() > give_up:
+                raise RuntimeError('SCD4x measurement not ready in time')
+            await asyncio.sleep(0.05)
+
+
+    def _send(self, command: bytes) -> None:
+        with self._scd4x.i2c_device as i2c:
+            i2c.write(command)
+
     
     def measure_single_shot_all(self) -> None:
         """On-demand measurement of CO2 concentration, relative humidity, and temperature. (SCD41 only)
         
            This does not return values, it sends command to sensor module to perform measurement.
-           Retrieve values by calling `.co2`, `.temperature`, or `.humidity`
+           Retrieve values with `.read()` once `.data_ready`
 
            .. note::
-                currently, caller is responsible for enforcing min delay between calls to this method.
-
-           TODO: Read data sheet to find values and then enforce here?
+                blocks for the 5 s the measurement takes (adafruit_scd4x sleeps), everything else waits.
+                `await single_shot()` doesn't, returns the values, and works on SCD40 too.
         """
         if self._measurement_mode != AirSensorSCD4x.MeasurementMode.IDLE:
             raise Exception(f'Must not be in periodic measurement modes when triggering single-shot measurement. Current mode {self._measurement_mode}')
@@ -275,16 +566,8 @@ class AirSensorSCD4x:
         if self._sensor_model == AirSensorSCD4x.SensorModel.SCD41:
             self._scd4x.measure_single_shot()
         else: 
-            # we are a SCD40, which does not have this capability
-            # we could throw an exception, or allow Adafruit code to throw error (will it?)
-            # 
-            # but we could just fake a single-shot, by: 
-            # * if data_ready, get that data and discard.
-            # * startup periodic measurement mode
-            # * then wait for next data.
-            # * get that data,
-            # * set mode back to IDLE
-            
+            # we are a SCD40, which does not have this capability.  single_shot() fakes one with a periodic burst,
+            # that can't be done without waiting, so not here
             raise Exception(f'This sensor model {self.sensor_model} does not have single-shot measurement capability')
             
 
@@ -292,11 +575,11 @@ class AirSensorSCD4x:
         """On-demand measurement of relative humidity and temperature for SCD41 only
 
            This does not return values, it sends command to sensor module to perform measurement.
-           Retrieve values by calling `.co2`, `.temperature`, or `.humidity`
+           Retrieve values with `.read()` once `.data_ready`
 
            .. note::
-                currently, caller is responsible for enforcing min delay between calls to this method.
-           TODO: Read data sheet to find values and then enforce here?
+                blocks for the 50 ms the measurement takes (adafruit_scd4x sleeps).
+                `await single_shot_rht_only()` doesn't, and returns the values.
         """
         if self._measurement_mode != AirSensorSCD4x.MeasurementMode.IDLE:
             raise Exception(f'Must not be in periodic measurement modes when triggering single-shot measurement. Current mode {self._measurement_mode}')
@@ -304,16 +587,8 @@ class AirSensorSCD4x:
         if self._sensor_model == AirSensorSCD4x.SensorModel.SCD41:
             self._scd4x.measure_single_shot_rht_only()
         else: 
-            # we are a SCD40, which does not have this capability
-            # we could throw an exception, or allow Adafruit code to throw error (will it?)
-            # 
-            # but we could just fake a single-shot, by: 
-            # * if data_ready, get that data and discard.
-            # * startup periodic measurement mode
-            # * then wait for next data.
-            # * get that data,
-            # * set mode back to IDLE
-            
+            # we are a SCD40, which does not have this capability.  single_shot() fakes one with a periodic burst,
+            # that can't be done without waiting, so not here
             raise Exception(f'This sensor model {self.sensor_model} does not have single-shot measurement capability')
 
 
@@ -0,0 +1,24 @@
+"""Host-side analysis of the reading logs the bot writes to its CIRCUITPY drive (see reading_log.py).
+
+This package is NOT copied to the board.  Needs numpy; pyarrow only for Parquet export.
+
+Copy `/log` off the board now and then (the board keeps ~3 weeks), into folders of your own.  Point the reader at
+any number of those copies: files are memory-mapped as numpy structured arrays, nothing is parsed or loaded up front,
+and overlapping copies of the same log are only counted once.
+
+    from analysis import ReadingLogReader, daily_profile, resample
+
+    log = ReadingLogReader(['backups/2024-01', 'backups/2024-02', 'E:/log'])
+    print(log.summary())
+    week = log.between(start, start + 7 * 86400)    # structured array, raw units: see analysis.readings.DTYPE
+    hourly = resample(log, 3600)                     # whole log, a chunk at a time
+    profile = daily_profile(log, bin_minutes=30, utc_offset=-8)
+    log.to_csv('readings.csv')                       # replays in the simulation: traces.from_csv()
+
+or from the repo root:
+
+    python -m analysis E:/log backups/2024-* --resample 3600 --csv hourly.csv
+"""
+from analysis.readings import DTYPE, ReadingLogReader, daily_profile, resample, to_physical
+
+__all__ = ['DTYPE', 'ReadingLogReader', 'daily_profile', 'resample', 'to_physical']
@@ -0,0 +1,57 @@
+"""Summarize reading logs copied off the board, and export them.
+
+    python -m analysis E:/log                                   # what's in there, and the average day
+    python -m analysis E:/log backups/* --utc-offset -8 --profile-minutes 30
+    python -m analysis E:/log --resample 3600 --csv hourly.csv  # hourly averages
+    python -m analysis E:/log --parquet readings.parquet        # every record (needs pyarrow)
+"""
+import argparse
+import time
+
+import numpy as np
+
+from analysis import ReadingLogReader, daily_profile, resample
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='log folders (readings.bin, readings.old.bin) or .bin files')
+    parser.add_argument('--utc-offset', type=float, default=0.0, help='hours, for the daily profile')
+    parser.add_argument('--profile-minutes', type=int, default=60)
+    parser.add_argument('--resample', type=int, metavar='SECONDS', help='export bin averages instead of records')
+    parser.add_argument('--csv', help='export to this CSV file')
+    parser.add_argument('--parquet', help='export to this Parquet file')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    log = ReadingLogReader(args.paths)
+    print(f'{log.summary()}  (opened in {1000 * (time.perf_counter() - started):.1f} ms)')
+    if not len(log):
+        return
+
+    profile = daily_profile(log, bin_minutes=args.profile_minutes, utc_offset=args.utc_offset)
+    print(f'\naverage day (UTC{args.utc_offset:+g})')
+    print('  time   records   CO2 mean    std   min    max    °C     %rH')
+    for row in profile[profile['records'] > 0]:
+        print(f'  {row["minute"] // 60:02}:{row["minute"] % 60:02}  {row["records"]:>7}  {row["co2"]:>9.0f}  '
+              f'{row["co2_std"]:>5.0f}  {row["co2_min"]:>4}  {row["co2_max"]:>5}  {row["temperature_c"]:>5.1f}  '
+              f'{row["humidity"]:>5.1f}')
+
+    if args.resample:
+        resampled = resample(log, args.resample)
+        print(f'\n{len(resampled):,} bins of {args.resample} s')
+        if args.csv:
+            np.savetxt(args.csv, resampled, delimiter=',', header=','.join(resampled.dtype.names), comments='',
+                       fmt=('%d', '%.1f', '%.2f', '%.2f', '%d', '%d', '%d', '%d'))
+            print(f'saved to {args.csv}')
+        if args.parquet:
+            parser.error('--parquet exports records, not bins.  Use --csv with --resample')
+        return
+    if args.csv:
+        print(f'\n{log.to_csv(args.csv):,} records saved to {args.csv}')
+    if args.parquet:
+        print(f'\n{log.to_parquet(args.parquet):,} records saved to {args.parquet}')
+
+
+if __name__ == '__main__':
+    main()
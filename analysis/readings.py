@@ -0,0 +1,280 @@
+"""Memory-mapped access to reading logs (reading_log.py on the board) and vectorized summaries of them.
+
+Record layout comes from reading_log.RECORD_FORMAT, so the two can't drift apart.  Values are stored as the board
+wrote them (temperature and humidity in 0.01 units), to_physical() converts.
+
+Memory stays flat whatever the size of the logs: opening only maps the files, between() copies just the records asked
+for, and resample()/daily_profile()/exports walk the log a chunk at a time.
+"""
+import os
+import sys
+
+# simulation sorts out the repo's own enum.py shadowing the stdlib one (numpy needs the real one), see there.  So it
+# has to come before numpy.
+import simulation
+import numpy as np
+
+if simulation.REPO_ROOT not in sys.path:
+    sys.path.append(simulation.REPO_ROOT)
+import reading_log
+
+# reading_log.RECORD_FORMAT '<IHhHHHH' as a numpy record
+DTYPE = np.dtype([('time', '<u4'), ('co2', '<u2'), ('temperature', '<i2'), ('humidity', '<u2'),
+                  ('co2_min', '<u2'), ('co2_max', '<u2'), ('readings', '<u2')])
+assert DTYPE.itemsize == reading_log.RECORD_SIZE and reading_log.RECORD_FORMAT == '<IHhHHHH', \
+    'reading_log.RECORD_FORMAT changed, update analysis.readings.DTYPE'
+
+# to_physical() and CSV/Parquet exports.  Column names are the ones simulation.traces.from_csv() reads
+PHYSICAL_DTYPE = np.dtype([('time', '<i8'), ('co2', '<f4'), ('temperature_c', '<f4'), ('humidity', '<f4'),
+                           ('co2_min', '<u2'), ('co2_max', '<u2'), ('readings', '<u2')])
+
+# records per chunk: 1M records is 16 MB mapped, ~30 MB of temporaries
+CHUNK_RECORDS = 1 << 20
+
+
+def _log_files(path: str) -> list:
+    """Data files in a reading log folder, oldest first.  A .bin file is taken as is."""
+    if not os.path.isdir(path):
+        return [path]
+    names = ('readings.old.bin', 'readings.bin')
+    return [os.path.join(path, name) for name in names if os.path.exists(os.path.join(path, name))]
+
+
+def _search(times: np.ndarray, t: int, side: str = 'left') -> int:
+    """np.searchsorted() on a time column.  A plain int would make numpy convert the whole column to int64 first,
+    reading every page of the file: keep the key uint32."""
+    return int(np.searchsorted(times, np.uint32(min(max(t, 0), 0xFFFFFFFF)), side=side))
+
+
+def _map(path: str) -> np.ndarray:
+    """Memory-map a data file, without the unused slots at the end of its last page.  Empty array if no records."""
+    count = os.path.getsize(path) // DTYPE.itemsize
+    if not count:
+        return np.empty(0, DTYPE)
+    records = np.memmap(path, dtype=DTYPE, mode='r', shape=(count,))
+    # only the last page can be partly full, and its unused slots have time 0
+    tail_start = max(0, count - reading_log.RECORDS_PER_PAGE)
+    empty = np.flatnonzero(records['time'][tail_start:] == 0)
+    if empty.size:
+        records = records[:tail_start + empty[0]]
+    return records
+
+
+class ReadingLogReader:
+    """One or more reading logs, as one time-ordered series of records.
+
+    :param paths: Log folders (as copied off the board) or .bin files, in any order.  Copies of the same log taken
+        at different times overlap, records already covered by an earlier file are skipped
+    """
+
+    def __init__(self, paths):
+        if isinstance(paths, (str, os.PathLike)):
+            paths = [paths]
+        files = [file for path in paths for file in _log_files(os.fspath(path))]
+        mapped = sorted((records for records in map(_map, files) if len(records)), key=lambda r: int(r['time'][0]))
+
+        # views into the maps, no copies
+        self.segments = []
+        last = None
+        for records in mapped:
+            skip = 0 if last is None else _search(records['time'], last, side='right')
+            if skip < len(records):
+                self.segments.append(records[skip:])
+                last = int(records['time'][-1])
+        self.files = files
+
+    def __len__(self) -> int:
+        return sum(len(segment) for segment in self.segments)
+
+    @property
+    def start(self) -> int | None:
+        """Epoch seconds of the first record"""
+        return int(self.segments[0]['time'][0]) if self.segments else None
+
+    @property
+    def end(self) -> int | None:
+        """Epoch seconds of the last record"""
+        return int(self.segments[-1]['time'][-1]) if self.segments else None
+
+
+    def chunks(self, start: int = None, end: int = None, size: int = CHUNK_RECORDS):
+        """Records with start <= time < end as memory-mapped views of at most `size` records, oldest first."""
+        for segment in self.segments:
+            times = segment['time']
+            first = 0 if start is None else _search(times, start)
+            stop = len(segment) if end is None else _search(times, end)
+            for offset in range(first, stop, size):
+                yield segment[offset:min(offset + size, stop)]
+
+    def between(self, start: int = None, end: int = None) -> np.ndarray:
+        """Records with start <= time < end, copied into one array.  Binary search, only that range is read."""
+        parts = list(self.chunks(start, end))
+        return np.concatenate(parts) if parts else np.empty(0, DTYPE)
+
+
+    def to_csv(self, path: str, start: int = None, end: int = None) -> int:
+        """Write time,co2,temperature_c,humidity,co2_min,co2_max,readings rows.  Returns the number of rows."""
+        rows = 0
+        with open(path, 'w', newline='') as f:
+            f.write(','.join(PHYSICAL_DTYPE.names) + '\n')
+            for chunk in self.chunks(start, end):
+                np.savetxt(f, to_physical(chunk), fmt=('%d', '%.0f', '%.2f', '%.2f', '%d', '%d', '%d'), delimiter=',')
+                rows += len(chunk)
+        return rows
+
+    def to_parquet(self, path: str, start: int = None, end: int = None) -> int:
+        """Same columns as to_csv(), time as a UTC timestamp.  Needs pyarrow.  Returns the number of rows."""
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('Parquet export needs pyarrow: pip install pyarrow') from None
+        schema = pyarrow.schema([('time', pyarrow.timestamp('s', tz='UTC'))] +
+                                [(name, pyarrow.from_numpy_dtype(PHYSICAL_DTYPE[name]))
+                                 for name in PHYSICAL_DTYPE.names[1:]])
+        rows = 0
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for chunk in self.chunks(start, end):
+                physical = to_physical(chunk)
+                writer.write_table(pyarrow.table([physical[name] for name in PHYSICAL_DTYPE.names], schema=schema))
+                rows += len(chunk)
+        return rows
+
+
+    def summary(self) -> str:
+        if not self.segments:
+            return f'reading log: no records in {len(self.files)} files'
+        days = (self.end - self.start) / 86400
+        first = np.datetime64(self.start, 's')
+        last = np.datetime64(self.end, 's')
+        return (f'reading log: {len(self):,} records from {len(self.files)} files, {first} to {last} UTC '
+                f'({days:.1f} days), {len(self.segments)} segments')
+
+
+def to_physical(records: np.ndarray) -> np.ndarray:
+    """Raw records -> PHYSICAL_DTYPE: °C and % instead of 0.01 units."""
+    physical = np.empty(len(records), PHYSICAL_DTYPE)
+    physical['time'] = records['time']
+    physical['co2'] = records['co2']
+    physical['temperature_c'] = records['temperature'] / 100
+    physical['humidity'] = records['humidity'] / 100
+    for name in ('co2_min', 'co2_max', 'readings'):
+        physical[name] = records[name]
+    return physical
+
+
+def _chunks(source, start: int = None, end: int = None):
+    if isinstance(source, ReadingLogReader):
+        yield from source.chunks(start, end)
+        return
+    records = source
+    if start is not None or end is not None:
+        times = records['time']
+        records = records[0 if start is None else _search(times, start):
+                          len(records) if end is None else _search(times, end)]
+    for offset in range(0, len(records), CHUNK_RECORDS):
+        yield records[offset:offset + CHUNK_RECORDS]
+
+
+# region summaries
+RESAMPLED_DTYPE = np.dtype([('time', '<i8'), ('co2', '<f4'), ('temperature_c', '<f4'), ('humidity', '<f4'),
+                            ('co2_min', '<u2'), ('co2_max', '<u2'), ('readings', '<u4'), ('records', '<u4')])
+
+
+def resample(source, seconds: int, start: int = None, end: int = None) -> np.ndarray:
+    """Combine records into `seconds`-long bins, e.g. 3600 for hourly.  Empty bins are left out.
+
+    Means are weighted by each record's reading count, so a record averaged from 2 readings (after a sensor stall)
+    counts less than one averaged from 12.  co2_min/co2_max are the extremes over the bin.
+
+    :param source: ReadingLogReader or an array of records (DTYPE)
+    :return: RESAMPLED_DTYPE, one row per bin, time is the start of the bin
+    """
+    parts = []
+    for chunk in _chunks(source, start, end):
+        times = chunk['time'].astype(np.int64)
+        bins = times // seconds
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(bins)) + 1))
+        weights = np.maximum(chunk['readings'], 1).astype(np.float64)
+
+        part = np.zeros(len(starts), [('bin', '<i8'), ('weight', '<f8'), ('co2', '<f8'), ('temperature', '<f8'),
+                                      ('humidity', '<f8'), ('co2_min', '<u2'), ('co2_max', '<u2'),
+                                      ('readings', '<u4'), ('records', '<u4')])
+        part['bin'] = bins[starts]
+        part['weight'] = np.add.reduceat(weights, starts)
+        for name in ('co2', 'temperature', 'humidity'):
+            part[name] = np.add.reduceat(chunk[name] * weights, starts)
+        part['co2_min'] = np.minimum.reduceat(chunk['co2_min'], starts)
+        part['co2_max'] = np.maximum.reduceat(chunk['co2_max'], starts)
+        part['readings'] = np.add.reduceat(chunk['readings'].astype(np.uint32), starts)
+        part['records'] = np.diff(np.append(starts, len(chunk)))
+
+        # a bin split across two chunks: fold the first row of this chunk into the last row of the previous one
+        if parts and parts[-1]['bin'][-1] == part['bin'][0]:
+            previous, first = parts[-1][-1:], part[:1]     # views, previous is updated in place
+            for name in ('weight', 'co2', 'temperature', 'humidity', 'readings', 'records'):
+                previous[name] += first[name]
+            previous['co2_min'] = np.minimum(previous['co2_min'], first['co2_min'])
+            previous['co2_max'] = np.maximum(previous['co2_max'], first['co2_max'])
+            part = part[1:]
+        if len(part):
+            parts.append(part)
+
+    if not parts:
+        return np.empty(0, RESAMPLED_DTYPE)
+    sums = np.concatenate(parts)
+    resampled = np.empty(len(sums), RESAMPLED_DTYPE)
+    resampled['time'] = sums['bin'] * seconds
+    resampled['co2'] = sums['co2'] / sums['weight']
+    resampled['temperature_c'] = sums['temperature'] / sums['weight'] / 100
+    resampled['humidity'] = sums['humidity'] / sums['weight'] / 100
+    for name in ('co2_min', 'co2_max', 'readings', 'records'):
+        resampled[name] = sums[name]
+    return resampled
+
+
+PROFILE_DTYPE = np.dtype([('minute', '<u2'), ('records', '<u4'), ('co2', '<f4'), ('co2_std', '<f4'),
+                          ('co2_min', '<u2'), ('co2_max', '<u2'), ('temperature_c', '<f4'), ('humidity', '<f4')])
+
+
+def daily_profile(source, bin_minutes: int = 60, utc_offset: float = 0.0, start: int = None,
+                  end: int = None) -> np.ndarray:
+    """Average day: records grouped by time of day, over all days in the log.
+
+    :param source: ReadingLogReader or an array of records (DTYPE)
+    :param bin_minutes: Width of a time-of-day bin, should divide a day
+    :param utc_offset: Hours to add to UTC for local time, e.g. -8 for PST.  The log is in UTC
+    :return: PROFILE_DTYPE, one row per bin (empty bins have records 0), minute is the start of the bin after
+        midnight.  co2_std is the spread of interval means across days
+    """
+    bins = (24 * 60) // bin_minutes
+    counts = np.zeros(bins, np.float64)
+    sums = {name: np.zeros(bins, np.float64) for name in ('co2', 'co2_squared', 'temperature', 'humidity')}
+    co2_min = np.full(bins, 0xFFFF, np.uint16)
+    co2_max = np.zeros(bins, np.uint16)
+    offset = round(utc_offset * 3600)
+    for chunk in _chunks(source, start, end):
+        index = ((chunk['time'].astype(np.int64) + offset) % 86400) // (bin_minutes * 60)
+        co2 = chunk['co2'].astype(np.float64)
+        counts += np.bincount(index, minlength=bins)
+        sums['co2'] += np.bincount(index, co2, minlength=bins)
+        sums['co2_squared'] += np.bincount(index, co2 * co2, minlength=bins)
+        sums['temperature'] += np.bincount(index, chunk['temperature'], minlength=bins)
+        sums['humidity'] += np.bincount(index, chunk['humidity'], minlength=bins)
+        np.minimum.at(co2_min, index, chunk['co2_min'])
+        np.maximum.at(co2_max, index, chunk['co2_max'])
+
+    profile = np.zeros(bins, PROFILE_DTYPE)
+    profile['minute'] = np.arange(bins) * bin_minutes
+    profile['records'] = counts
+    seen = counts > 0
+    n = counts[seen]
+    mean = sums['co2'][seen] / n
+    profile['co2'][seen] = mean
+    profile['co2_std'][seen] = np.sqrt(np.maximum(sums['co2_squared'][seen] / n - mean * mean, 0))
+    profile['co2_min'][seen] = co2_min[seen]
+    profile['co2_max'][seen] = co2_max[seen]
+    profile['temperature_c'][seen] = sums['temperature'][seen] / n / 100
+    profile['humidity'][seen] = sums['humidity'][seen] / n / 100
+    return profile
+# endregion
@@ -0,0 +1,113 @@
+import gc
+import time
+from adafruit_bitmap_font import bitmap_font
+import adafruit_imageload
+import displayio
+
+'''
+Load each font and sprite sheet once, share it with every display that uses it.
+
+Fonts and sprite sheets are big, and every display group used to load its own copy of the same files (the single
+value displays loaded the same two fonts and sprite sheet three times).  Loading from flash is also slow, which is
+most of the boot time spent before the first screen shows up.
+
+Sharing a font also shares its glyph cache: bitmap_font loads glyphs lazily, the first label to show a character pays
+for it and every other label using that font gets it for free.
+
+Shared sprite sheets (Bitmap + Palette) are fine to use in several TileGrids at once.  Don't modify one in place
+(e.g. change a palette color), that changes it everywhere.
+
+usage:
+    font = assets.font('fonts/LeagueSpartan-Bold-16.bdf')
+    sheet, palette = assets.sprite_sheet('bitmaps/sensor_symbols_sprite_210x70.bmp')
+    sheet = assets.generated('digits 16x26', lambda: segment_display.draw_glyphs(16, 26))
+    assets.report()     # load time, RAM and number of users of each asset
+'''
+
+
+class _Asset:
+    """Cache entry: the loaded object and what it cost to load"""
+
+    def __init__(self, value, kind: str, load_seconds: float, ram_bytes: int | None):
+        self.value = value
+        self.kind = kind
+        self.load_seconds = load_seconds
+        self.ram_bytes = ram_bytes  # None if gc.mem_free() isn't available (CPython)
+        self.uses = 1
+
+
+# path -> _Asset
+_cache: dict = {}
+
+
+def _mem_free() -> int | None:
+    if not hasattr(gc, 'mem_free'):
+        return None
+    gc.collect()
+    return gc.mem_free()
+
+
+def _get(path: str, kind: str, loader):
+    asset = _cache.get(path)
+    if asset is not None:
+        asset.uses += 1
+        return asset.value
+
+    free_before = _mem_free()
+    start = time.monotonic_ns()
+    value = loader()
+    load_seconds = (time.monotonic_ns() - start) / 1e9
+    free_after = _mem_free()
+    ram_bytes = free_before - free_after if free_before is not None else None
+
+    _cache[path] = _Asset(value, kind, load_seconds, ram_bytes)
+    return value
+
+
+def font(path: str):
+    """Shared font.
+
+    :param path: .bdf or .pcf file
+    """
+    return _get(path, 'font', lambda: bitmap_font.load_font(path))
+
+
+def sprite_sheet(path: str) -> tuple:
+    """Shared (Bitmap, Palette) of an indexed .bmp, loaded into RAM."""
+    return _get(path, 'sprite', lambda: adafruit_imageload.load(path, bitmap=displayio.Bitmap,
+                                                                 palette=displayio.Palette))
+
+
+def on_disk_bitmap(path: str) -> displayio.OnDiskBitmap:
+    """Shared OnDiskBitmap.  Pixels stay in flash, so costs little RAM but is slower to draw."""
+    return _get(path, 'disk bmp', lambda: displayio.OnDiskBitmap(path))
+
+
+def generated(key: str, builder):
+    """Shared object that is built in code rather than loaded from a file, e.g. a sprite sheet drawn at boot.
+
+    :param key: unique name, shows up in report()
+    :param builder: function taking no arguments, called only the first time
+    """
+    return _get(key, 'generated', builder)
+
+
+def report() -> None:
+    """Print load time, RAM and number of users of each asset."""
+    print(f'{"asset":<46} {"kind":<9} {"load ms":>8} {"RAM":>8} {"uses":>5}')
+    total_seconds = 0.0
+    total_ram = 0
+    for path, asset in _cache.items():
+        total_seconds += asset.load_seconds
+        ram = '?' if asset.ram_bytes is None else f'{asset.ram_bytes:,}'
+        if asset.ram_bytes is not None:
+            total_ram += asset.ram_bytes
+        print(f'{path:<46} {asset.kind:<9} {asset.load_seconds * 1000:8.1f} {ram:>8} {asset.uses:>5}')
+    # each use after the first is a load that didn't happen
+    saved_seconds = sum(a.load_seconds * (a.uses - 1) for a in _cache.values())
+    print(f'{len(_cache)} assets, {total_seconds * 1000:.0f} ms to load, {total_ram:,} bytes.  '
+          f'Sharing saved ~{saved_seconds * 1000:.0f} ms of loading', end='')
+    if _mem_free() is not None:
+        saved_ram = sum(a.ram_bytes * (a.uses - 1) for a in _cache.values())
+        print(f' and ~{saved_ram:,} bytes', end='')
+    print()
@@ -0,0 +1,44 @@
+import time
+import board
+import digitalio
+import microcontroller
+import neopixel
+import storage
+
+'''
+Runs once at power-up/reset, before code.py.  Decides who may write to the CIRCUITPY drive: the computer over USB
+(default, for editing code) or code.py (for the reading log, see reading_log.py).  Both at once would corrupt the
+file system, so it's one or the other.
+
+Hold button D1 while pressing reset to switch between the two.  The choice is kept in non-volatile memory, so it
+survives power cuts and the bot keeps logging when unattended.  The neopixel shows which one is active for a second:
+
+    green   code.py logs readings.  Drive is read-only over USB, hold D1 at reset to edit code again
+    blue    drive is writable over USB.  Nothing is logged
+
+(Don't use D0 for this: held at reset it starts the ROM bootloader.)
+Output of this file ends up in boot_out.txt.
+'''
+
+_NVM_FLAG = 0           # byte in microcontroller.nvm
+_LOGGING = 0x4C         # 'L'.  Anything else, including a fresh board's 0xFF, means USB writable
+
+button = digitalio.DigitalInOut(board.D1)
+button.direction = digitalio.Direction.INPUT
+button.pull = digitalio.Pull.DOWN
+
+logging = microcontroller.nvm[_NVM_FLAG] == _LOGGING
+if button.value:
+    logging = not logging
+    microcontroller.nvm[_NVM_FLAG] = _LOGGING if logging else 0
+button.deinit()
+
+# readonly is from code.py's point of view: False lets code.py write, and the computer sees the drive read-only
+storage.remount('/', readonly = not logging)
+print(f'CIRCUITPY is writable by {"code.py, reading log on" if logging else "USB, reading log off"}')
+
+pixel = neopixel.NeoPixel(board.NEOPIXEL, 1, brightness = 0.1)
+pixel.fill((0, 255, 0) if logging else (0, 0, 255))
+time.sleep(1)
+pixel.fill(0)
+pixel.deinit()
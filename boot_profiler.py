@@ -0,0 +1,213 @@
+import builtins
+import os
+import sys
+import time
+
+'''
+Where boot time goes: every import, font and sprite sheet load, and display group construction, timed.
+
+code.py imports this first and calls start(), finish() right before the scheduler starts.  In between:
+
+    imports             builtins.__import__ is wrapped, each module that actually gets loaded is timed
+    fonts, images       adafruit_bitmap_font's load_font() and adafruit_imageload.load(), wrapped once imported
+    display groups      every `_init_display*` method of a class in a module imported during boot
+    stages              mark('sensors') etc. in code.py: time since the previous mark
+
+Each entry has its total time and its self time (total minus the entries inside it: importing bot_screen includes
+importing displays_graphing, which includes importing ulab...).  Self times don't count anything twice, so the report
+is sorted by self time: the top lines are where to look.  The stages add up to the whole boot, what they spent outside
+of any entry is code.py's own code (creating objects, the sensor starting up...).
+
+finish() puts everything back the way it was (imports and loads after boot cost nothing extra), prints the report
+and keeps the entries for summary(), a one line version for the dashboard.  `boot_profile = 0` in settings.toml
+turns it off.
+
+The clock is time.monotonic_ns(), so entries under a millisecond or so are mostly noise.  A timed call costs a
+couple of function calls on top, fine for imports and file loads, which take milliseconds.
+
+usage:
+    import boot_profiler
+    boot_profiler.start()
+    import ...
+    boot_profiler.mark('imports')
+    ...
+    boot_profiler.finish()      # prints the report
+    boot_profiler.summary()     # 'boot 9.8 s: imports 5.1 s, ...'
+'''
+
+# module -> (function, kind) wrapped once that module is imported
+_FUNCTIONS = {
+    'adafruit_bitmap_font.bitmap_font': ('load_font', 'font'),
+    'adafruit_imageload': ('load', 'image'),
+}
+# methods starting with this are timed, in every class of a module imported during boot
+_METHOD_PREFIX = '_init_display'
+
+# entries: (kind, name, total ns, self ns).  Stages: ('stage', name, ns since previous mark, same)
+entries = []
+started_at = 0.0        # time.monotonic() when start() was called: how long after reset code.py got going
+boot_seconds = 0.0      # start() to finish()
+
+_running = False
+_start_ns = 0
+_mark_ns = 0
+_stack = []             # [start ns, ns spent in nested entries], one per entry being timed
+_original_import = None
+_wrapped = []           # (owner, attribute, original), to put back in finish()
+_scanned = set()        # id() of classes already looked at
+
+
+# region timing
+def _enter() -> None:
+    _stack.append([time.monotonic_ns(), 0])
+
+
+def _exit(kind: str, name: str) -> None:
+    start, nested = _stack.pop()
+    total = time.monotonic_ns() - start
+    if _stack:
+        _stack[-1][1] += total
+    entries.append((kind, name, total, total - nested))
+
+
+def _timed(function, kind: str, name: str):
+    def timed(*args, **kwargs):
+        if not _running:
+            return function(*args, **kwargs)
+        _enter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _exit(kind, name if name else args[0] if args else kind)
+    return timed
+# endregion
+
+
+# region wrapping
+def _loading(name: str, fromlist) -> str | None:
+    """Module this import statement is about to load, None if it is all loaded already (nothing worth timing)"""
+    module = sys.modules.get(name)
+    if module is None:
+        return name
+    for item in fromlist or ():
+        if item != '*' and not hasattr(module, item):
+            return f'{name}.{item}'
+    return None
+
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    loading = _loading(name, fromlist) if level == 0 and _running else None
+    if loading is None:
+        return _original_import(name, globals, locals, fromlist, level)
+    _enter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _exit('import', loading)
+        _instrument(loading)
+
+
+def _wrap(owner, attribute: str, kind: str, name: str = None) -> None:
+    original = getattr(owner, attribute)
+    setattr(owner, attribute, _timed(original, kind, name))
+    _wrapped.append((owner, attribute, original))
+
+
+def _instrument(module_name: str) -> None:
+    """Wrap what a module that was just imported brings: a load function, display group methods.  Only that module,
+    looking through all of sys.modules after every import would cost more than some imports"""
+    for name in list(_FUNCTIONS):
+        module = sys.modules.get(name)
+        attribute, kind = _FUNCTIONS[name]
+        # a module is in sys.modules while it is still being imported, its functions show up later
+        if module is not None and hasattr(module, attribute):
+            del _FUNCTIONS[name]
+            # file path is the first argument, that's the entry's name
+            _wrap(module, attribute, kind)
+    module = sys.modules.get(module_name)
+    if module is None:
+        return
+    for value in list(getattr(module, '__dict__', {}).values()):
+        if not isinstance(value, type) or id(value) in _scanned:
+            continue
+        _scanned.add(id(value))
+        for attribute in dir(value):
+            if attribute.startswith(_METHOD_PREFIX):
+                _wrap(value, attribute, 'display', f'{value.__name__}.{attribute}')
+# endregion
+
+
+def start() -> None:
+    """Start timing.  Call before the imports that should be timed"""
+    global _running, _start_ns, _mark_ns, _original_import, started_at
+    if _running or not os.getenv('boot_profile', 1):
+        return
+    started_at = time.monotonic()
+    _start_ns = _mark_ns = time.monotonic_ns()
+    # whatever is there now: on the host the simulation has its own
+    _original_import = builtins.__import__
+    try:
+        builtins.__import__ = _import
+    except (AttributeError, TypeError):
+        _original_import = None     # builtins can't be replaced on this build, imports show up in the stages only
+    _running = True
+
+
+def mark(stage: str) -> None:
+    """End of a boot stage: the time since the previous mark (or start()) is logged under `stage`"""
+    global _mark_ns
+    if not _running:
+        return
+    now = time.monotonic_ns()
+    entries.append(('stage', stage, now - _mark_ns, now - _mark_ns))
+    _mark_ns = now
+
+
+def finish() -> None:
+    """Stop timing, put imports and wrapped functions back, print the report"""
+    global _running, boot_seconds
+    if not _running:
+        return
+    boot_seconds = (time.monotonic_ns() - _start_ns) / 1e9
+    _running = False
+    if _original_import is not None:
+        builtins.__import__ = _original_import
+    while _wrapped:
+        owner, attribute, original = _wrapped.pop()
+        setattr(owner, attribute, original)
+    _scanned.clear()
+    print(report())
+
+
+def _kind_totals() -> dict:
+    totals = {}
+    for kind, _, _, self_ns in entries:
+        if kind != 'stage':
+            totals[kind] = totals.get(kind, 0) + self_ns
+    return totals
+
+
+def report(limit: int = 20) -> str:
+    """Stages in order, then the `limit` entries with the most self time"""
+    lines = [f'boot: {boot_seconds:.2f} s, code.py started {started_at:.2f} s after reset']
+    for kind, name, total, _ in entries:
+        if kind == 'stage':
+            lines.append(f'  {name:<24} {total / 1e6:9.1f} ms')
+    timed = sorted((entry for entry in entries if entry[0] != 'stage'), key=lambda entry: entry[3], reverse=True)
+    lines.append(f'{"kind":<8} {"name":<48} {"self ms":>9} {"total ms":>9}')
+    for kind, name, total, self_ns in timed[:limit]:
+        lines.append(f'{kind:<8} {name:<48} {self_ns / 1e6:9.1f} {total / 1e6:9.1f}')
+    if len(timed) > limit:
+        rest = sum(entry[3] for entry in timed[limit:])
+        lines.append(f'{len(timed) - limit} more, {rest / 1e6:.1f} ms')
+    totals = ', '.join(f'{kind} {ns / 1e6:.0f} ms' for kind, ns in _kind_totals().items())
+    lines.append(f'self time: {totals}')
+    return '\n'.join(lines)
+
+
+def summary(limit: int = 3) -> str:
+    """One line: boot time, stages, the slowest entries.  Short enough for an Adafruit IO feed value"""
+    stages = ', '.join(f'{name} {total / 1e9:.1f} s' for kind, name, total, _ in entries if kind == 'stage')
+    timed = sorted((entry for entry in entries if entry[0] != 'stage'), key=lambda entry: entry[3], reverse=True)
+    slowest = ', '.join(f'{name} {self_ns / 1e9:.2f} s' for _, name, _, self_ns in timed[:limit])
+    return f'boot {boot_seconds:.1f} s: {stages}.  slowest: {slowest}'
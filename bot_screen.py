@@ -47,17 +47,20 @@ class BotScreen:
 
 
     
-    def __init__(self, settings = None):
+    def __init__(self, settings = None, graph_history_size: int = 120, pm2_5: bool = False):
         """First iteration: don't worry about making this too general.  Just use as
            a spot to keep code out of code.py or robot level
+
+        :param graph_history_size: Points kept per sensor graph, one per minute.  120 is 2 hours.
+        :param pm2_5: Add a PM2.5 screen to the single-value displays (a PM2.5 sensor is configured)
         """
 
         self._display = board.DISPLAY  # we may want to address another screen
 
         # They are assigned to display.root_group to show on screen
         self._display_all_values = AllValuesDisplay(board.DISPLAY)
-        self._displays_single_value = DisplaySingleValue(board.DISPLAY)
-        self._displays_graphs = DisplayGraphs(board.DISPLAY)
+        self._displays_single_value = DisplaySingleValue(board.DISPLAY, pm2_5=pm2_5)
+        self._displays_graphs = DisplayGraphs(board.DISPLAY, history_size=graph_history_size)
 
         self._current_display_level = BotScreen.DisplayLevel.ALL_VALUES
         # not the actual display, just which sensor is current
@@ -69,18 +72,32 @@ class BotScreen:
 
 
 
-    def update_values(self, *, co2: int|float, temperature_c: float, humidity: float) -> None:
-        """Update sensor values (and emoji, if relevant)."""
-        temperature_f = (temperature_c*9/5)+32
+    def update_values(self, *, co2: int|float|None, temperature_c: float|None, humidity: float|None,
+                      pm2_5: int = None) -> None:
+        """Update sensor values (and emoji, if relevant).  A value is None until a sensor measuring it has reported
+        (or none is configured), its readout keeps showing what it showed before
+
+        Every display keeps the latest values, but only the one on screen re-renders.  The others are marked dirty
+        and render when shown.  Graphs are not updated here, see add_graph_point().
+        """
+        temperature_f = (temperature_c*9/5)+32 if temperature_c is not None else None
+        if co2 is not None:
+            co2 = int(co2)
 
-        self._display_all_values.update_values(co2=int(co2), temperature_f=temperature_f, humidity=humidity)
-        self._displays_single_value.update_values(co2=int(co2), temperature_f=temperature_f, humidity=humidity)
-        self._displays_graphs.update_values(co2=int(co2), temperature_f=temperature_f, humidity=humidity)
+        self._display_all_values.update_values(co2=co2, temperature_f=temperature_f, humidity=humidity)
+        self._displays_single_value.update_values(co2=co2, temperature_f=temperature_f, humidity=humidity,
+                                                  pm2_5=pm2_5)
 
         # looks like we don't need this refresh.  display defaults to auto_refresh = True
         #self._display.refresh()
         
         
+    def add_graph_point(self, *, co2: int|float, temperature_c: float, humidity: float) -> None:
+        """Add one point to the graphs.  Call once per graph interval with the interval averages."""
+        temperature_f = (temperature_c*9/5)+32
+        self._displays_graphs.add_point(co2=co2, temperature_f=temperature_f, humidity=humidity)
+
+
     def show_top_display(self) -> None:
         """Shows top-level display on screen."""
         self._display_all_values.show_on_screen()
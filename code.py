@@ -1,3 +1,12 @@
+# first, so it times every import below.  Boot report is printed before the tasks start, see boot_profiler.py
+import boot_profiler
+boot_profiler.start()
+# RAM kept by each boot stage, allocated by each task, high-water marks and fragmentation.  See heap_monitor.py
+from heap_monitor import HeapMonitor
+heap = HeapMonitor()
+import asyncio
+import os
+import sys
 import time
 import traceback
 # below are Adafruit imports
@@ -6,11 +15,32 @@ import board
 import digitalio
 import microcontroller
 import neopixel
+import supervisor
 # below are local modules
-from air_quality_sensors import AirSensorSCD4x
+from aggregator import IntervalAggregator
 from adafruitdashboard import AdaFruitDashboard
 from bot_screen import BotScreen
 import callbacks
+from latency import LatencyStages
+from connection_manager import CONNECTION_ERRORS, ConnectionManager
+from outbox import DropPolicy, Outbox
+from reading_log import ReadingLog
+from sampling_controller import SamplingController
+from scheduler import TaskScheduler
+from sensor_registry import load_sensors, Measurement
+boot_profiler.mark('imports')
+heap.checkpoint('imports')
+
+# p50/p95/max of each stage that can hold up the loop (button lag).  Cheap, always on.  See latency.py
+latency = LatencyStages()
+button_gap = latency.stage('button gap')
+debounce = latency.stage('debounce')
+screen_switch = latency.stage('screen switch')
+serial_print = latency.stage('serial print')
+display_update = latency.stage('display update')
+publish_stage = latency.stage('publish')
+mqtt_pump = latency.stage('mqtt pump')
+connect = latency.stage('connect')
 
 
 # on-board NeoPixel
@@ -19,26 +49,43 @@ import callbacks
 pixel = neopixel.NeoPixel(pin=board.NEOPIXEL, n=1, brightness=0.25)
 pixel.fill(0)
 
-# on-board display 
-# release any currently configured displays, 
+# on-board display
+# release any currently configured displays,
 #displayio.release_displays()
 #You do not need to do this for boards with built-in displays, check if this would create errors
 
-# CO2, temp, humidity sensor
-sensor = AirSensorSCD4x(measurement_mode = AirSensorSCD4x.MeasurementMode.FAST )
-# display screen mounted on ESP32-S2 Reverse TFT
-bot_screen = BotScreen()
+# air sensors listed in settings.toml `sensors`, default "scd4x" (CO2, temp, humidity).  Only their driver modules
+# get imported, see sensor_registry.py
+sensors = load_sensors()
+boot_profiler.mark('sensors')
+heap.checkpoint('sensors')
+# FAST while CO2 or humidity are changing, SLOW / IDLE (single shots every 60 s) while the air is stable.  For the
+# sensors that have those modes.  adaptive_sampling = 0 in settings.toml keeps them in FAST
+samplers = {}
+if os.getenv('adaptive_sampling', 1):
+    samplers = {sensor.name: SamplingController(sensor) for sensor in sensors if hasattr(sensor, 'MeasurementMode')}
+# display screen mounted on ESP32-S2 Reverse TFT.  PM2.5 gets a screen if a sensor measures it
+bot_screen = BotScreen(pm2_5 = any('pm2_5' in sensor.quantities for sensor in sensors))
+boot_profiler.mark('display')
+heap.checkpoint('display')
 
 # connection to Adafruit IO dashboard
 # will have to check API to see if there is a way to determine available feeds
 # right now, this will not error if there is not a feed present at Adafruit IO
-feeds = ['neopixel']
+feeds = ['neopixel', 'commands']
+_latency_requested = False
+def on_command(command: str) -> None:
+    """Text sent to the `commands` feed.  'latency': latency summary to the diagnostics feed"""
+    global _latency_requested
+    if command.strip().lower() == 'latency':
+        _latency_requested = True   # published from the publish task, not from inside the MQTT callback
 connected = callbacks.get_connected_callback(feeds)
-message = callbacks.get_message_callback(pixel)
+message = callbacks.get_message_callback(pixel, on_command)
 io = AdaFruitDashboard(on_connect = connected,
                        on_message = message)
+# wifi, TLS and MQTT login, with backoff between retries.  Connects from the mqtt task, so boot doesn't wait on it
+connection = ConnectionManager(io)
 
-# TODO: move button monitoring to its own object/task?
 d0 = digitalio.DigitalInOut(board.D0)
 d0.direction = digitalio.Direction.INPUT
 d0.pull = digitalio.Pull.UP
@@ -58,25 +105,59 @@ d2.pull = digitalio.Pull.DOWN
 button2 = Debouncer(d2)
 
 
+class LatestReading:
+    """Most recent value of everything the sensors measure, a Measurement snapshot (see sensor_registry.py).  Sensor
+    tasks write, the other tasks read.
 
-timestamp = 0
-dashboard_interval = 60  #Adafruit IO dashboard upload interval in seconds
-while True:
-    try:
-        # keep connect in loop so that it reconnects if odd disconnection
-        if not io.is_connected:
-            print('Connecting to Adafruit IO:')
-            io.connect()
-            print('Connection to Adafruit done.')
+    `sequence` goes up by one on every new reading, so a task can tell if it has already handled this one.
+    """
+    def __init__(self):
+        self.measurement = None
+        self.sequence = 0
+
+    def update(self, measurement: Measurement) -> None:
+        """Take the values a sensor measured, keep the other sensors' values"""
+        if self.measurement is not None:
+            measurement = Measurement(*(new if new is not None else old
+                                        for new, old in zip(measurement, self.measurement)))
+        self.measurement = measurement
+        self.sequence += 1
+
+reading = LatestReading()
+
+# graph points and dashboard uploads are averages over this interval, not the latest reading
+interval_seconds = 60
+# every reading is reduced into running stats once, graphs and dashboard both use the completed interval
+interval = IntervalAggregator(interval_seconds)
 
-        # pump message loop - allows us to respond to dashboard events.
-        # this call is up to a few seconds.  Disabled for now
-        # make sensors, display, and dashboard use their own threads
-        #io.loop()
+# while the dashboard is unreachable, interval averages wait here and are backfilled with their own timestamps later.
+# 720 = 12 hours of intervals, ~8.5 KB.  DropPolicy.THIN would keep all 12+ hours at lower resolution instead
+outbox = Outbox(depth = 720, drop_policy = DropPolicy.OLDEST)
+# seconds between backfill uploads, so the backlog doesn't crowd out live uploads.  Adafruit IO free accounts take
+# 30 data points a minute: live is 3 a minute, backfill 18
+backfill_period = 10
+# seconds between heap reports on the diagnostics feed
+diagnostics_period = 900
 
+# every interval's averages also go to a log on the flash drive, if boot.py made it writable for code.  ~11 days kept
+reading_log = ReadingLog(os.getenv('reading_log_dir') or '/log')
+reading_log.open()
+boot_profiler.mark('dashboard, log')
+heap.checkpoint('dashboard, log')
+
+
+# region tasks
+# each of these runs as its own task, see scheduler setup at bottom of file
+async def poll_buttons() -> None:
+    # time since the last poll: 10 ms unless something held up the loop
+    button_gap.lap()
+    with debounce:
         button0.update()
         button1.update()
         button2.update()
+    if not (button0.rose or button1.rose or button2.rose):
+        return
+    with screen_switch:
         if button0.rose:
             bot_screen.show_top_display()
         if button1.rose:
@@ -85,70 +166,249 @@ while True:
             bot_screen.show_single_graph_display()
 
 
-        if sensor.data_ready:
-            co2 = sensor.CO2
-            temp_c = sensor.temperature
-            temp_f = (temp_c*9/5)+32
-            humidity = sensor.relative_humidity
-            
-            bot_screen.update_values(co2 = co2, temperature_c = temp_c, humidity = humidity)
+def sensor_task(sensor):
+    """Task for one sensor, see scheduler setup at bottom of file"""
+    sampler = samplers.get(sensor.name)
+    # one stage per sensor, a stage can't be timed by two tasks at once
+    sample_stage = latency.stage(f'{sensor.name} sample')
+
+    async def sample_sensor() -> None:
+        # SCD4x in IDLE mode: a single shot, 5 s awaited.  Other tasks keep running, this run shows up as over budget
+        with sample_stage:
+            measurement = await sensor.sample()
+        if measurement is None:
+            return
+        if sampler:
+            # may switch the measurement mode for the next reading
+            sampler.update(measurement)
+        reading.update(measurement)
+
+        # interval averages (graphs, dashboard, log) of each value, over the readings of the sensor that measures it
+        interval.add(co2 = measurement.co2, temperature_c = measurement.temperature_c,
+                     humidity = measurement.humidity, pm2_5 = measurement.pm2_5)
+
+        with serial_print:
+            print()
+            if measurement.co2 is not None:
+                print(f'        CO2 : {measurement.co2:>5} ppm' )
+            if measurement.temperature_c is not None:
+                temp_f = (measurement.temperature_c*9/5)+32
+                print(f'Temperature : {temp_f:>5.1f} {chr(176)}F    ({measurement.temperature_c:.1f} {chr(176)}C)' )
+            if measurement.humidity is not None:
+                print(f'   Humidity : {measurement.humidity:>5.1f}%' )
+            if measurement.pm2_5 is not None:
+                print(f'      PM2.5 : {measurement.pm2_5:>5} {chr(181)}g/m{chr(179)}' )
+
+    return sample_sensor
+
+
+_displayed_sequence = 0
+_graphed_interval = 0
+async def refresh_display() -> None:
+    global _displayed_sequence, _graphed_interval
+    if interval.sequence != _graphed_interval:
+        _graphed_interval = interval.sequence
+        averages = interval.completed
+        if averages.co2.count:
+            with display_update:
+                bot_screen.add_graph_point(co2 = averages.co2.mean,
+                                           temperature_c = averages.temperature_c.mean,
+                                           humidity = averages.humidity.mean)
+
+    if reading.sequence == _displayed_sequence:
+        return
+    _displayed_sequence = reading.sequence
+    measurement = reading.measurement
+    # screens not on screen keep the values too (they render them when shown), so only skip a reading with nothing
+    # any screen shows: a PM1006 on its own still updates the PM2.5 screen
+    if measurement.co2 is None and measurement.temperature_c is None and measurement.humidity is None \
+            and measurement.pm2_5 is None:
+        return
+    with display_update:
+        bot_screen.update_values(co2 = measurement.co2,
+                                 temperature_c = measurement.temperature_c,
+                                 humidity = measurement.humidity,
+                                 pm2_5 = measurement.pm2_5)
+
+
+def interval_values(averages) -> tuple:
+    """(co2, temperature_c, humidity, pm2_5) means of a completed interval, None for what no sensor reported"""
+    return tuple(stats.mean if stats.count else None
+                 for stats in (averages.co2, averages.temperature_c, averages.humidity, averages.pm2_5))
+
+
+def upload(co2: int | float | None, temperature_c: float | None, humidity: float | None, pm2_5: int | float | None,
+           created_at: int = None) -> None:
+    # all feeds in one message, see AdaFruitDashboard.publish_group().  Only what was measured
+    values = {}
+    if co2 is not None:
+        values['co2'] = round(co2)
+    if humidity is not None:
+        values['humidity'] = round(humidity, 1)
+    if temperature_c is not None:
+        values['temperature'] = round((temperature_c*9/5)+32, 1)
+    if pm2_5 is not None:
+        values['pm2-5'] = round(pm2_5)
+    with publish_stage:
+        io.publish_group('air-quality-sensors', values, created_at = created_at)
+
+
+_published_interval = 0
+_last_backfill = 0.0
+_boot_reported = False
+_last_diagnostics = 0.0
+async def publish_to_dashboard() -> None:
+    global _published_interval, _last_backfill, _boot_reported, _last_diagnostics, _latency_requested
+    if _latency_requested and io.is_connected:
+        _latency_requested = False
+        io.publish('diagnostics', latency.summary())
+        return
+    if not _boot_reported and boot_profiler.entries and io.is_connected:
+        # once per boot, so a slow boot shows up on the dashboard too
+        io.publish('diagnostics', boot_profiler.summary())
+        _boot_reported = True
+        return
+    if heap.checks and io.is_connected and time.monotonic() - _last_diagnostics >= diagnostics_period:
+        # RAM trend, so a leak or fragmentation shows up on the dashboard before the board falls over
+        _last_diagnostics = time.monotonic()
+        io.publish('diagnostics', heap.summary())
+        return
+
+    if interval.sequence != _published_interval:
+        # live upload goes first, backlog waits its turn
+        _published_interval = interval.sequence
+        averages = interval.completed
+        values = interval_values(averages)
+        if not io.is_connected:
+            outbox.push(int(time.monotonic()), *values)
+            print(f'\ndashboard offline, upload queued: {outbox.report()}')
+            return
+        print(f'\nuploading to dashboard: {averages.count} readings averaged')
+        try:
+            upload(*values)
+        except Exception:
+            outbox.push(int(time.monotonic()), *values)
+            raise
+        print(f'uploaded: {io.publish_stats.last_batch()}')
+        return
+
+    if not outbox or not io.is_connected or time.monotonic() - _last_backfill < backfill_period:
+        return
+    timestamp, co2, temperature_c, humidity, pm2_5 = outbox.peek()
+    created_at = io.server_time(timestamp)
+    if created_at is None:
+        return      # server time not in yet.  Without it the backlog would be stamped with the wrong time
+    _last_backfill = time.monotonic()
+    upload(co2, temperature_c, humidity, pm2_5, created_at = created_at)
+    outbox.pop()    # only once it went out.  If upload raised, it is tried again
+    print(f'\nbackfilled upload: {outbox.report()}')
+
+
+_logged_interval = 0
+async def log_reading() -> None:
+    global _logged_interval
+    if not reading_log.is_open or interval.sequence == _logged_interval:
+        return
+    timestamp = io.server_time(time.monotonic())
+    if timestamp is None:
+        return      # no server time yet, no clock to stamp the record with.  Interval isn't marked done, tried again
+    _logged_interval = interval.sequence
+    averages = interval.completed
+    if not averages.co2.count:
+        return      # log records are CO2 / temperature / humidity
+    reading_log.append(timestamp, averages.co2.mean, averages.temperature_c.mean, averages.humidity.mean,
+                       co2_min = averages.co2.min, co2_max = averages.co2.max, readings = averages.co2.count)
+
+
+async def check_memory() -> None:
+    # full collection plus a largest-free-block probe, a few ms
+    heap.check()
+
+
+async def serial_console() -> None:
+    # one key on the serial console dumps a report: l latency, h heap, b boot
+    if not supervisor.runtime.serial_bytes_available:
+        return
+    key = sys.stdin.read(1)
+    if key == 'l':
+        print(latency.report())
+    elif key == 'h':
+        print(heap.report())
+    elif key == 'b':
+        print(boot_profiler.report())
+
+
+async def pump_mqtt() -> None:
+    # keep connect in here so that it reconnects if odd disconnection.  One connection step per run at most
+    if connection.is_connected:
+        connected = connection.step()
+    else:
+        # timed only while connecting, the many runs already connected would hide the slow steps
+        with connect:
+            connected = connection.step()
+    if not connected:
+        return
+
+    # pump message loop - allows us to respond to dashboard events.
+    # only handles what has already arrived and returns right away otherwise, so buttons/display don't notice
+    with mqtt_pump:
+        io.pump(budget = 0.02)
+# endregion
+
+
+def handle_task_error(task, ex: Exception) -> None:
+    """Error handler for all tasks."""
+
+    # lost the dashboard: broker hung up ([Errno 128] ENOTCONN, minimqtt wraps it in MMQTTException), wifi dropped...
+    # Readings wait in the outbox, display and sensor keep going, pump_mqtt reconnects.
+    if task.name in ('publish', 'mqtt') and isinstance(ex, CONNECTION_ERRORS):
+        print('#' * 40)
+        print(f'Adafruit connection error in task "{task.name}"')
+        connection.connection_lost(ex)
+        print('#' * 40)
+        return
+
+    # TODO: investigate other Exception types received.  Connection errors are handled above
+
+    # TODO: log these exceptions locally when you get SD support added,
+    print(f'Error in task "{task.name}": {ex}')
+    print(f'using traceback:\n{traceback.print_exception(ex)}')
+    # https://docs.circuitpython.org/en/latest/shared-bindings/wifi/index.html#wifi.Radio.connect
+    # " Reconnections are handled automatically once one connection succeeds."
+
+    # TODO: may not need a
+    reset_delay = 60
+    print(f'error: {ex}\nresetting board in {reset_delay} seconds')
 
+    count = 0
+    for _ in range(reset_delay):
+        time.sleep(1)
+        count += 1
+        if count >= 50:
             print()
-            print(f'        CO2 : {co2:>5} ppm' )
-            print(f'Temperature : {temp_f:>5.1f} {chr(176)}F    ({temp_c:.1f} {"\u00b0"}C)' )
-            print(f'   Humidity : {humidity:>5.1f}%' )
-
-            # probably could publish all at once, it might just be using single publish under the hood
-            # publish to AdaFruit only at a certain interval, 
-            if (time.monotonic() - timestamp) >= dashboard_interval:
-                timestamp = time.monotonic()
-                if io.is_connected:
-                    print(f'\nuploading to dashboard: ')
-                    io.publish('air-quality-sensors.co2', co2)
-                    io.publish('air-quality-sensors.humidity', humidity)
-                    io.publish('air-quality-sensors.temperature', temp_f)
-
-    # exception case seems to originate from .publish but will need on-board logging to catch this.
-    # Recall that file-writes are default disabled
-    except OSError as ex:
-        if 'ENOTCONN' in str(ex):     # [Errno 128] ENOTCONN
-            print('#' * 40)
-            print(ex)
-            print(f'Adafruit connection error: restarting wifi and Adafruit connection')
-            io = AdaFruitDashboard(on_connect = connected,
-                                   on_message = message)
-            print(f'reconnect to AdaFruit IO successful')
-            print('#' * 40)
-
-
-    except Exception as e:  # pylint disable=broad-except
-        # TODO: investigate Exception types received.  probably could just try reinit Ada IO
-        #       a few times before resetting microcontroller
-
-        # TODO: log these exceptions locally when you get SD support added,
-        print(f'Error: {e}')
-        print(f'using traceback:\n{traceback.print_exception(e)}')
-        # https://docs.circuitpython.org/en/latest/shared-bindings/wifi/index.html#wifi.Radio.connect
-        # " Reconnections are handled automatically once one connection succeeds."
-
-
-        # TODO: may not need a
-        reset_delay = 60
-        print(f'error: {e}\nresetting board in {reset_delay} seconds')
-
-        count = 0
-        for _ in range(reset_delay):
-            time.sleep(1)
-            count += 1
-            if count >= 50:
-                print()
-                count = 0
-            print('.', end='')
-            count += 1
-
-        print()
-        microcontroller.reset()
+            count = 0
+        print('.', end='')
+        count += 1
 
+    print()
+    microcontroller.reset()
 
 
+# period and budget are in seconds.  Budget is how long a single run should take, runs over budget get counted.
+# publish and MQTT still go through blocking sockets, so their budgets are larger.
+# heap samples what each task allocates, about once a second per task
+scheduler = TaskScheduler(on_error = handle_task_error, monitor = heap)
+scheduler.add('buttons', poll_buttons,         period = 0.01, budget = 0.05)
+for sensor in sensors:
+    # one task per sensor, named after its driver
+    scheduler.add(sensor.name, sensor_task(sensor), period = 1.0, budget = 0.1)
+scheduler.add('display', refresh_display,      period = 0.5,  budget = 0.25)
+scheduler.add('publish', publish_to_dashboard, period = 1.0,  budget = 2.0)
+scheduler.add('mqtt',    pump_mqtt,            period = 0.25, budget = 0.2)
+scheduler.add('log',     log_reading,          period = 1.0,  budget = 0.1)
+scheduler.add('memory',  check_memory,         period = 60.0, budget = 0.2)
+scheduler.add('console', serial_console,       period = 0.25, budget = 0.05)
 
+boot_profiler.mark('tasks')
+boot_profiler.finish()
+asyncio.run(scheduler.run())
@@ -0,0 +1,195 @@
+import random
+import time
+import adafruit_minimqtt.adafruit_minimqtt as MQTT
+from adafruit_io.adafruit_io_errors import AdafruitIO_MQTTError
+import microcontroller
+
+'''
+Keeps the bot connected to the dashboard, without resetting the board every time something goes wrong.
+
+Getting connected takes three steps, each one its own state:
+
+    WIFI  --radio.connect()-->  TLS  --socket + TLS handshake-->  MQTT  --CONNECT/CONNACK-->  CONNECTED
+
+step() does at most one of those per call (each one blocks for a bit: wifi ~2 s, TLS handshake ~1.5 s), so it can
+be called from a scheduler task.  A failed step is retried after a backoff: base * 2^(failures - 1), capped, half of
+it random (jitter) so a whole house of bots doesn't retry in lockstep after the access point comes back.  Where it
+retries from depends on what is still up: no wifi -> WIFI, otherwise a failed MQTT step also goes back to TLS,
+because minimqtt closes the socket when CONNECT fails.
+
+When the connection is lost while CONNECTED (a publish or loop() raised), call connection_lost().
+
+Only after `retry_budget` failures in a row is the board reset.  The cold boot costs a couple of minutes of data and
+the graphs' history, so it is the last resort, not the first.
+
+Metrics: attempts and failures per state, outages, time to recover (last, mean, max).  See report().
+
+usage:
+    connection = ConnectionManager(io)
+    ...
+    async def pump_mqtt():
+        if connection.step():       # connects/reconnects as needed, returns True when connected
+            io.loop(timeout = 0.05)
+'''
+
+
+# there are no Enums in CircuitPython.
+class ConnectionState:
+    WIFI = 0
+    TLS = 1
+    MQTT = 2
+    CONNECTED = 3
+
+    names = ('wifi', 'tls', 'mqtt', 'connected')
+
+
+# what a failed step raises.  Anything else is a bug, not a connection problem, and goes to the task error handler
+CONNECTION_ERRORS = (OSError, RuntimeError, MemoryError, MQTT.MMQTTException, AdafruitIO_MQTTError)
+
+
+class ConnectionManager:
+
+    def __init__(self, dashboard, *, backoff_base: float = 2.0,
+                                     backoff_max: float = 300.0,
+                                     retry_budget: int = 30,
+                                     on_give_up = None):
+        """
+        :param dashboard: AdaFruitDashboard, provides connect_wifi(), open_tls(), connect(), drop_connection()
+        :param backoff_base: Seconds to wait after the first failure.  Doubles with each failure after that
+        :param backoff_max: Longest wait between attempts, in seconds
+        :param retry_budget: Failures in a row before giving up.  With the defaults that is about 2 hours
+        :param on_give_up: Called with the last exception when the retry budget is used up.  Default resets the board
+        """
+        self._dashboard = dashboard
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget
+        self._on_give_up = on_give_up if on_give_up is not None else self._reset_board
+
+        self.state = ConnectionState.WIFI
+        self.failures = 0                   # in a row, since last connected
+        self._next_attempt = 0.0
+        self._down_since = time.monotonic()
+
+        # metrics
+        self.attempts = [0, 0, 0]           # per state: WIFI, TLS, MQTT
+        self.state_failures = [0, 0, 0]
+        self.outages = 0                    # connection lost after having been connected
+        self.recoveries = 0
+        self.first_connect_time = None      # seconds from start to first connection
+        self.last_recovery_time = 0.0       # seconds from connection lost to connected again
+        self.max_recovery_time = 0.0
+        self.total_recovery_time = 0.0
+
+
+    @property
+    def is_connected(self) -> bool:
+        return self.state == ConnectionState.CONNECTED
+
+    @property
+    def state_name(self) -> str:
+        return ConnectionState.names[self.state]
+
+
+    def step(self) -> bool:
+        """Take the next connection step if one is due.  Returns True if connected."""
+        if self.state == ConnectionState.CONNECTED:
+            if self._dashboard.is_connected:
+                return True
+            # minimqtt noticed on its own (e.g. broker sent nothing back for too long)
+            self.connection_lost()
+
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        if self.state == ConnectionState.WIFI and self._dashboard.wifi_connected:
+            # wifi reconnects on its own once it has connected once
+            self.state = ConnectionState.TLS
+
+        state = self.state
+        self.attempts[state] += 1
+        try:
+            if state == ConnectionState.WIFI:
+                self._dashboard.connect_wifi()
+            elif state == ConnectionState.TLS:
+                self._dashboard.open_tls()
+            else:
+                self._dashboard.connect()
+        except CONNECTION_ERRORS as ex:
+            self._failed(state, ex)
+            return False
+
+        self.state = state + 1
+        if self.state == ConnectionState.CONNECTED:
+            self._connected()
+            return True
+        return False
+
+
+    def connection_lost(self, ex: Exception = None) -> None:
+        """Call when a publish or loop() fails with a connection error.  Next step() starts reconnecting."""
+        if self.state != ConnectionState.CONNECTED:
+            return
+        print(f'dashboard connection lost: {ex}' if ex is not None else 'dashboard connection lost')
+        self._dashboard.drop_connection()
+        self.outages += 1
+        self._down_since = time.monotonic()
+        self.state = ConnectionState.TLS if self._dashboard.wifi_connected else ConnectionState.WIFI
+        self._next_attempt = 0.0        # first try right away, backoff starts with the first failure
+
+
+    def _connected(self) -> None:
+        took = time.monotonic() - self._down_since
+        if self.first_connect_time is None:
+            self.first_connect_time = took
+        else:
+            self.recoveries += 1
+            self.last_recovery_time = took
+            self.total_recovery_time += took
+            if took > self.max_recovery_time:
+                self.max_recovery_time = took
+        self.failures = 0
+        print(f'dashboard connected after {took:.1f} s')
+
+
+    def _failed(self, state: int, ex: Exception) -> None:
+        self.state_failures[state] += 1
+        self.failures += 1
+        if self.failures >= self.retry_budget:
+            print(f'dashboard: {self.failures} connection failures in a row, giving up')
+            self._on_give_up(ex)
+            self.failures = 0       # on_give_up didn't reset the board: start a new budget
+
+        delay = self.backoff_delay(self.failures)
+        self._next_attempt = time.monotonic() + delay
+        if not self._dashboard.wifi_connected:
+            self.state = ConnectionState.WIFI
+        elif state == ConnectionState.MQTT:
+            self.state = ConnectionState.TLS
+        print(f'dashboard {ConnectionState.names[state]} step failed ({ex}), '
+              f'retry #{self.failures} from {self.state_name} in {delay:.1f} s')
+
+
+    def backoff_delay(self, failures: int) -> float:
+        """Seconds to wait after `failures` failures in a row: exponential, capped, upper half jittered."""
+        if failures < 1:
+            return 0.0
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (failures - 1))
+        return delay / 2 + random.random() * delay / 2
+
+
+    @staticmethod
+    def _reset_board(ex: Exception) -> None:
+        print(f'last error: {ex}\nresetting board')
+        microcontroller.reset()
+
+
+    def report(self) -> str:
+        names = ConnectionState.names
+        steps = ', '.join(f'{names[s]} {self.attempts[s]}/{self.state_failures[s]}' for s in range(3))
+        first = 'never' if self.first_connect_time is None else f'{self.first_connect_time:.1f} s'
+        recovery = (f'recovery last {self.last_recovery_time:.1f} s, '
+                    f'mean {self.total_recovery_time / self.recoveries:.1f} s, max {self.max_recovery_time:.1f} s'
+                    if self.recoveries else 'no recoveries')
+        return (f'connection: {self.state_name}, attempts/failures {steps}, first connect {first}, '
+                f'{self.outages} outages, {recovery}')
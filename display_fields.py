@@ -0,0 +1,74 @@
+'''
+Skip display updates that wouldn't change anything.
+
+Sensor values come in every 5 seconds, but the number shown mostly stays the same: temperature and humidity are shown
+as whole numbers and barely move, CO2 moves a few ppm.  Assigning a label's `.text`, or a TileGrid tile, re-renders
+it (and marks that screen area for refresh) even if it is the same as before.
+
+Each field remembers what it last rendered: the text for labels, the tile index for sprites.  update() only touches
+the display object if that changes.  `stats` counts renders done and skipped, over all fields.
+
+usage:
+    co2 = TextField(co2_label)
+    co2.update(f'{co2_ppm: >4}')      # renders
+    co2.update(f'{co2_ppm: >4}')      # same text, skipped
+'''
+
+
+class FieldStats:
+    def __init__(self):
+        self.renders = 0
+        self.skips = 0
+
+    def report(self) -> str:
+        total = self.renders + self.skips
+        skipped = 100 * self.skips / total if total else 0
+        return f'display fields: {self.renders} renders, {self.skips} skipped ({skipped:.0f}% of updates)'
+
+
+# shared by all fields
+stats = FieldStats()
+
+
+class TextField:
+    """Label (anything with a `.text`) that is only re-rendered when its text changes"""
+
+    def __init__(self, label):
+        self.label = label
+        self._text = label.text
+
+    def update(self, text: str) -> bool:
+        """Set text if different from what is shown.  Returns True if it rendered."""
+        if text == self._text:
+            stats.skips += 1
+            return False
+        self.label.text = text
+        self._text = text
+        stats.renders += 1
+        return True
+
+    def invalidate(self) -> None:
+        """Next update() renders, even if the text is the same.  E.g. after changing the label some other way."""
+        self._text = None
+
+
+class TileField:
+    """One tile of a TileGrid (a sprite), only written when the tile index changes"""
+
+    def __init__(self, grid, index: int = 0):
+        self.grid = grid
+        self._index = index
+        self._tile = grid[index]
+
+    def update(self, tile: int) -> bool:
+        """Show `tile` if different from what is shown.  Returns True if it wrote the tile."""
+        if tile == self._tile:
+            stats.skips += 1
+            return False
+        self.grid[self._index] = tile
+        self._tile = tile
+        stats.renders += 1
+        return True
+
+    def invalidate(self) -> None:
+        self._tile = None
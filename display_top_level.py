@@ -1,7 +1,9 @@
-from adafruit_bitmap_font import bitmap_font
 from adafruit_display_text import bitmap_label
 import displayio
 from enum import Enum
+import assets
+from display_fields import TextField
+from segment_display import SegmentLabel
 
 FieldOrderData = Enum(CO2         = 1,
                       TEMPERATURE = 3,
@@ -13,6 +15,14 @@ class AllValuesDisplay:
         settings = None  #
         self._display_group = self._init_group_top(settings)
 
+        # latest values, only drawn into the labels when this display is on screen.  See update_values()
+        self._values: tuple | None = None
+        self._dirty = False
+        # remember what each label shows, so unchanged values don't re-render.  See display_fields.py
+        self._co2_field = TextField(self._display_group[FieldOrderData.CO2])
+        self._temperature_field = TextField(self._display_group[FieldOrderData.TEMPERATURE])
+        self._humidity_field = TextField(self._display_group[FieldOrderData.HUMIDITY])
+
 
 
 
@@ -21,28 +31,25 @@ class AllValuesDisplay:
         # TODO: decide whether these go to a settings file.  That would probably make it easier to use different displays
         #       If so, may want to store percentage in settings file? then could have a helper method (knowing display resolution)
         #       that could translate to x,y values
-        font_file = r".\fonts\Arial-Bold-24.bdf"
-        font_top_values = bitmap_font.load_font(font_file)
-
-        font_file = r'.\fonts\LeagueSpartan-Bold-16.bdf'
-        font_top_units = bitmap_font.load_font(font_file)
+        font_top_units = assets.font('fonts/LeagueSpartan-Bold-16.bdf')
 
-        co2_label = bitmap_label.Label(font_top_values, text='----',
-                                       color=0xFFFFFF, scale=1,
-                                       anchor_point = (1.0, 0.0), anchored_position = (80, 55))
+        # values are seven-segment readouts, see segment_display.py.  Only tile indices change on update
+        co2_label = SegmentLabel(glyph_width=16, glyph_height=26, length=4, text='----',
+                                 color=0xFFFFFF,
+                                 anchor_point = (1.0, 0.0), anchored_position = (80, 55))
         # ppm units label is makes it too long to display all value on this tiny 240x135 display
         # so putting it below CO2 value
         co2_units_label = bitmap_label.Label(font_top_units, text='ppm',
                                              color=0xFFFFFF, scale=1,
                                              anchor_point = (1.0, 0.0), anchored_position = (80, 90))
-        temperature_label = bitmap_label.Label(font_top_values, text=f'---{chr(176)}',
-                                               color=0xFFFFFF, scale=1,
-                                               anchor_point = (1.0, 0.0), anchored_position = (155, 55))
-        humidity_label = bitmap_label.Label(font_top_values, text='--%',
-                                            color=0xFFFFFF, scale=1,
-                                            anchor_point = (1.0, 0.0), anchored_position = (235, 55))
-
-        bitmap_top = displayio.OnDiskBitmap(r".\bitmaps\co2_temp_humidity.bmp")
+        temperature_label = SegmentLabel(glyph_width=16, glyph_height=26, length=4, text=f'---{chr(176)}',
+                                         color=0xFFFFFF,
+                                         anchor_point = (1.0, 0.0), anchored_position = (155, 55))
+        humidity_label = SegmentLabel(glyph_width=16, glyph_height=26, length=4, text='--%',
+                                      color=0xFFFFFF,
+                                      anchor_point = (1.0, 0.0), anchored_position = (235, 55))
+
+        bitmap_top = assets.on_disk_bitmap('bitmaps/co2_temp_humidity.bmp')
         tile_grid_top = displayio.TileGrid(bitmap_top, pixel_shader=bitmap_top.pixel_shader)
 
         group_top = displayio.Group()
@@ -58,20 +65,41 @@ class AllValuesDisplay:
 
         return group_top
 
-    def update_values(self, *, co2: int, temperature_f: float, humidity: float) -> None:
+    def update_values(self, *, co2: int | None, temperature_f: float | None, humidity: float | None) -> None:
+        """Keep latest values.  Labels are only re-rendered if this display is on screen, otherwise marked dirty and
+        rendered when shown.  A None value (no sensor for it) leaves its label as it is.
+        """
+        self._values = (co2, temperature_f, humidity)
+        self._dirty = True
+        if self.is_on_screen:
+            self._render()
+
+
+    def _render(self) -> None:
         """ Only need to update the data fields since the background is static"""
-        # noinspection PyUnresolvedReferences
-        self._display_group[FieldOrderData.CO2].text = f'{co2: >4}'
+        self._dirty = False
+        if self._values is None:
+            return
+        co2, temperature_f, humidity = self._values
+
+        if co2 is not None:
+            self._co2_field.update(f'{co2: >4}')
 
-        # CircuitPython cannot do nested f-strings
-        _ = f'{temperature_f:0.0f}{chr(176)}'
-        # noinspection PyUnresolvedReferences
-        self._display_group[FieldOrderData.TEMPERATURE].text = f'{_: >4}'
+        if temperature_f is not None:
+            # CircuitPython cannot do nested f-strings
+            _ = f'{temperature_f:0.0f}{chr(176)}'
+            self._temperature_field.update(f'{_: >4}')
 
-        # noinspection PyUnresolvedReferences
-        self._display_group[FieldOrderData.HUMIDITY].text = f'{humidity:0.0f}%'
+        if humidity is not None:
+            self._humidity_field.update(f'{humidity:0.0f}%')
 
 
+    @property
+    def is_on_screen(self) -> bool:
+        return self._root.root_group is self._display_group
 
     def show_on_screen(self) -> None:
-        self._root.root_group = self._display_group
\ No newline at end of file
+        # bring labels up to date before showing, so we never flash stale values
+        if self._dirty:
+            self._render()
+        self._root.root_group = self._display_group
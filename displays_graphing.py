@@ -1,10 +1,12 @@
-import time
-from adafruit_bitmap_font import bitmap_font
 from adafruit_itertools import cycle
 from circuitpython_uplot.plot import Plot, color
 from circuitpython_uplot.logging import Logging as Ulogging
 import displayio
 from enum import Enum
+import assets
+from graph_rendering import FullRedrawRenderer, ScrollingRenderer
+from history import DEFAULT_TIERS, TieredHistory
+from ring_buffer import RingBuffer
 
 
 class GraphStruct:
@@ -18,19 +20,101 @@ class GraphStruct:
     Contains:
     - Display group. This is what gets assigned to root_group (which shows it on screen)
     - uplot logging object.  This is what updates new data to plot.  It is not a debug logger
-    - x, y previous data.  The plot doesn't save previous x,y data.  It is just a drawing.
+    - y previous data.  The plot doesn't save previous x,y data.  It is just a drawing.
       We need the previous data when adding new points.
+      This is a tiered history (2h of minutes, 24h of 10 minutes, 7d of hours, see history.py).  Each tier is a ring
+      buffer, preallocated once, so scrolling the graph doesn't allocate anything.
+    - zoom.  Which history tier is shown.  Changing zoom switches the buffer that gets drawn, re-labels the x-axis
+      ticks and title.  Tick positions stay the same, so the plot's axes and grid don't need redrawing.
+    - x positions.  These don't change once the graph is full, so they are just a range, not stored.
+    - renderer.  Gets the points onto the plot, see graph_rendering.py
+    - dirty flag.  Values are appended all the time, but only drawn when the graph is on screen (or about to be).
     """
 
-    def __init__(self, group: displayio.Group, ulog: Ulogging, x: list[int]=None, y: list[int|float]=None):
+    def __init__(self, group: displayio.Group, ulog: Ulogging, history_size: int = 120, incremental: bool = True,
+                 title: str = '', title_label = None, x_tick_labels: list = None):
+        """
+        :param group: Display group holding the uplot Plot
+        :param ulog: uplot logging object drawing on that plot
+        :param history_size: How many points the graph holds at full resolution (1 minute each).  Oldest points
+                             scroll off when full, coarser zoom levels keep them longer.
+        :param incremental: True: only draw the newest segment and scroll.  False: redraw all points every time.
+        :param title: Graph title.  Zoom level gets added to it when zoomed out.
+        :param title_label: Label showing the title.  None: title doesn't change with zoom
+        :param x_tick_labels: Labels of the x-axis ticks, left to right.  None: ticks don't change with zoom
+        """
         self.display_group = group
         self.uplot_logging = ulog
         # uplot logging doesn't actually save the x,y points, it just draws on the plot
-        # so save previous points, since we need to update this list when new data arrives
-        if x is None:
-            self.x = []
-        if y is None:
-            self.y = []
+        # so save previous points, since we need to update this when new data arrives
+        self.history = TieredHistory(((DEFAULT_TIERS[0][0], history_size),) + DEFAULT_TIERS[1:])
+        self.zoom = 0
+        plot = group[0]  # only the Plot object was appended to this group
+        if incremental:
+            self.renderer = ScrollingRenderer(plot, ulog)
+        else:
+            self.renderer = FullRedrawRenderer(plot, ulog)
+        self.dirty = False
+
+        self._title = title
+        self._title_label = title_label
+        self._x_tick_labels = x_tick_labels or []
+        # tick label texts for each zoom level, made once.  Finest level keeps the labels uplot drew
+        self._x_tick_texts = [[label.text for label in self._x_tick_labels]]
+        ticks = len(self._x_tick_labels) - 1
+        for tier in self.history.tiers[1:]:
+            hours = tier.span_seconds / 3600
+            self._x_tick_texts.append([f'{hours * i / ticks:.0f}h' if i else '0' for i in range(ticks, -1, -1)])
+
+    @property
+    def y(self) -> RingBuffer:
+        """Values of the zoom level shown, oldest first"""
+        return self.history.tiers[self.zoom].values
+
+    @property
+    def history_size(self) -> int:
+        return self.history.tiers[0].values.capacity
+
+    @property
+    def zoom_levels(self) -> int:
+        return len(self.history.tiers)
+
+    @property
+    def x(self) -> range:
+        """x position of each y value, oldest first.
+
+        Counting down from the number of points, since x-axis is labelled history_size ----> 0.  The graph fills from
+        the left, once full the newest value is always at x=1.
+        """
+        return range(self.y.capacity, self.y.capacity - len(self.y), -1)
+
+    def append(self, value: int | float) -> None:
+        """Add newest value, O(1).  Drops the oldest value if full."""
+        tiers_updated = self.history.add(value)
+        if self.zoom < tiers_updated:
+            self.dirty = True
+
+    def set_zoom(self, zoom: int) -> None:
+        """Show zoom level `zoom` (0 = finest) next time the graph is drawn."""
+        if zoom == self.zoom:
+            return
+        self.zoom = zoom
+        # tick positions are fractions of the x range, so they line up for every zoom level
+        self.uplot_logging.xmin = self.y.capacity
+        for label, text in zip(self._x_tick_labels, self._x_tick_texts[zoom]):
+            label.text = text
+        if self._title_label is not None:
+            self._title_label.text = f'{self._title} {self.history.tiers[zoom].name}' if zoom else self._title
+        self.renderer.invalidate()
+        self.dirty = True
+
+    def draw(self) -> None:
+        """Update the plot with any values appended since last draw.  Does nothing if there aren't any."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.renderer.draw(self.x, self.y)
+
 
 Sensors = Enum('CO2', 'TEMPERATURE', 'HUMIDITY')
 
@@ -39,8 +123,16 @@ class DisplayGraphs:
 
     _graph_display_sensors = cycle([Sensors.CO2, Sensors.TEMPERATURE, Sensors.HUMIDITY])
 
-    def __init__(self, root_display: displayio.Display):
+    def __init__(self, root_display: displayio.Display, history_size: int = 120, incremental_rendering: bool = True):
+        """
+        :param root_display: Screen the graphs are shown on
+        :param history_size: Points per graph, one point per add_point() call (every 60 seconds).  120 is 2 hours.
+        :param incremental_rendering: Scroll graphs and draw only the newest segment (True), or redraw all points
+                                      on every update (False, what uplot does on its own).
+        """
         self._root = root_display   # need a reference to actual screen display when we are switching graphs on screen
+        self._history_size = history_size
+        self._incremental_rendering = incremental_rendering
         self._graph_displays: list[GraphStruct] = [self._init_display_co2(),
                                                    self._init_display_temp(),
                                                    self._init_display_humidity(), ]
@@ -48,13 +140,7 @@ class DisplayGraphs:
         # keeping the cycle iterator on the index to allow me index into GraphStruct objects.
         # If I didn't have a separate update values method, then probably could just cycle through graph displays directly
         self._current_graph_sensor_idx = next(DisplayGraphs._graph_display_sensors)
-
-        # average any values received (over this interval) before adding to graph
-        self._graph_interval_seconds: int = 60
-        self._co2_interval_values: list[int] = []
-        self._temperature_interval_values: list[float] = []
-        self._humidity_interval_values: list[float] = []
-        self._interval_start_time = time.monotonic()
+        self._zoom = 0  # history tier shown, see GraphStruct
 
 
     # region initialize graph displays
@@ -69,17 +155,18 @@ class DisplayGraphs:
         g = displayio.Group()
         g.append(plot)
 
+        first_tick_label = len(plot)    # Ulogging appends x tick labels to plot, then y tick labels
         my_loggraph = Ulogging(plot=plot,
                                x=[], y=[],
-                               rangex=[120, 0], rangey=[0, 2500],
+                               rangex=[self._history_size, 0], rangey=[0, 2500],
                                line_color=color.YELLOW,
-                               ticksx=[120, 100, 80, 60, 40, 20, 0, ],
+                               ticksx=self._x_ticks(),
                                ticksy=[300, 650, 1000, 1750, 2500],
                                tick_pos=False,
                                # limits=[1000, 1750, ],   # limit lines clutter the small 240x135 screen
                                fill=True)
 
-        return GraphStruct(group=g, ulog=my_loggraph)
+        return self._make_graph_struct(g, my_loggraph, 'CO2', first_tick_label)
 
     def _init_display_temp(self) -> GraphStruct:
         """Initialize temperature graph
@@ -92,17 +179,18 @@ class DisplayGraphs:
         g = displayio.Group()
         g.append(plot)
 
+        first_tick_label = len(plot)    # Ulogging appends x tick labels to plot, then y tick labels
         my_loggraph = Ulogging(plot=plot,
                                x=[], y=[],
-                               rangex=[120, 0], rangey=[30, 110],
+                               rangex=[self._history_size, 0], rangey=[30, 110],
                                line_color=color.YELLOW,
-                               ticksx=[120, 100, 80, 60, 40, 20, 0, ],
+                               ticksx=self._x_ticks(),
                                ticksy=[50, 70, 80, 90, 110],
                                tick_pos=False,
                                # limits=[60, 100, ],    # limit lines clutter the small 240x135 screen
                                fill=True)
 
-        return GraphStruct(group=g, ulog=my_loggraph)
+        return self._make_graph_struct(g, my_loggraph, '°F', first_tick_label)
 
     def _init_display_humidity(self) -> GraphStruct:
         """Initialize humidity graph
@@ -115,18 +203,33 @@ class DisplayGraphs:
         g = displayio.Group()
         g.append(plot)
 
+        first_tick_label = len(plot)    # Ulogging appends x tick labels to plot, then y tick labels
         my_loggraph = Ulogging(plot=plot,
                                x=[], y=[],
-                               rangex=[120, 0], rangey=[0, 100],
+                               rangex=[self._history_size, 0], rangey=[0, 100],
                                line_color=color.YELLOW,
-                               ticksx=[120, 100, 80, 60, 40, 20, 0, ],
+                               ticksx=self._x_ticks(),
                                ticksy=[20, 40, 60, 80, 100],
                                tick_pos=False,
                                ## limit lines clutter the small 240x135 screen
                                #limits=[20, 65, ],
                                fill=True)
 
-        return GraphStruct(group=g, ulog=my_loggraph)
+        return self._make_graph_struct(g, my_loggraph, 'rH %', first_tick_label)
+
+    def _make_graph_struct(self, group: displayio.Group, ulog: Ulogging, title: str,
+                           first_tick_label: int) -> GraphStruct:
+        """GraphStruct with the title and x tick labels that change with zoom"""
+        plot = group[0]
+        return GraphStruct(group=group, ulog=ulog, history_size=self._history_size,
+                           incremental=self._incremental_rendering,
+                           title=title,
+                           title_label=plot[first_tick_label - 1],   # last thing _generate_graph_base_plot added
+                           x_tick_labels=[plot[first_tick_label + i] for i in range(len(self._x_ticks()))])
+
+    def _x_ticks(self) -> list[int]:
+        """6 evenly spaced x-axis ticks, history_size down to 0.  For 120 points: 120, 100, 80, ... 0"""
+        return [round(self._history_size * i / 6) for i in range(6, -1, -1)]
 
     @staticmethod
     def _generate_graph_base_plot(title: str) -> Plot:
@@ -139,8 +242,7 @@ class DisplayGraphs:
                     padding=20, show_box=False,
                     box_color=color.GRAY)
 
-        font_file = r'.\fonts\roundedHeavy-26.bdf'
-        font_to_use = bitmap_font.load_font(font_file)
+        font_to_use = assets.font('fonts/roundedHeavy-26.bdf')
 
         plot.show_text(title,
                        x=28, y=0,
@@ -168,68 +270,34 @@ class DisplayGraphs:
 
 
     # region update values
-    def update_values(self, *, co2: int, temperature_f: float, humidity: float) -> None:
-        """Updates plots on each display, regardless if they are being shown on screen.
+    def add_point(self, *, co2: int | float, temperature_f: float, humidity: float) -> None:
+        """Add one point to each graph, regardless if it is being shown on screen.  Only the graph on screen gets
+        drawn, the others catch up when they are shown.
 
-        Adds values to interval buffer.  If interval expires, then actually update graphs with average value
+        Values should be interval averages (see aggregator.py), one call per graph interval.
 
         :param co2: CO2 value in ppm.
         :param temperature_f: Temperature value in °F
         :param humidity: Relative humidity in %
         """
-
-        # TODO: this works for now, but the interval check should really be on a separate task
-        #
-        if (time.monotonic() - self._interval_start_time) >= self._graph_interval_seconds:
-            if len(self._co2_interval_values) > 0:
-                avg_co2 = sum(self._co2_interval_values) / len(self._co2_interval_values)
-                display: GraphStruct = self._graph_displays[Sensors.CO2]
-                self._update_single_graph(display, avg_co2)
-                self._co2_interval_values = []
-
-            if len(self._temperature_interval_values) > 0:
-                avg_temperature = sum(self._temperature_interval_values) / len(self._temperature_interval_values)
-                display: GraphStruct = self._graph_displays[Sensors.TEMPERATURE]
-                self._update_single_graph(display, avg_temperature)
-                self._temperature_interval_values = []
-
-            if len(self._humidity_interval_values) > 0:
-                avg_humidity = sum(self._humidity_interval_values) / len(self._humidity_interval_values)
-                display: GraphStruct = self._graph_displays[Sensors.HUMIDITY]
-                self._update_single_graph(display, avg_humidity)
-                self._humidity_interval_values = []
-
-            self._interval_start_time = time.monotonic()
-
-        self._co2_interval_values.append(co2)
-        self._temperature_interval_values.append(temperature_f)
-        self._humidity_interval_values.append(humidity)
+        for sensor, value in ((Sensors.CO2, co2), (Sensors.TEMPERATURE, temperature_f), (Sensors.HUMIDITY, humidity)):
+            display: GraphStruct = self._graph_displays[sensor]
+            self._update_single_graph(display, value, self._is_on_screen(display))
 
 
+    def _is_on_screen(self, display: GraphStruct) -> bool:
+        return self._root.root_group is display.display_group
 
     @staticmethod
-    def _update_single_graph(display: GraphStruct, sensor_value: int | float) -> None:
-        """Helper method to update single-sensor graph displays"""
-        display_group = display.display_group
-        ulogger = display.uplot_logging
-        x = display.x
-        y = display.y
-
-        # x,y values needs to be added if we haven't yet filled up graph.
-        # If you have filled up graph, then just update y-values so that graph scrolls
-        if len(x) < 120:
-            next_x = 120 - len(x)   # counting down from 120, since y-axis is labelled 120 ----> 0
-            x.append(next_x)
-            y.append(sensor_value)
-        else:
-            # the x, y lists are at length 120 so just need to update y values so that plot scrolls
-            y.pop()
-            y.insert(0, sensor_value)
+    def _update_single_graph(display: GraphStruct, sensor_value: int | float, draw: bool = True) -> None:
+        """Helper method to update single-sensor graph displays
 
-        plot = display_group[0] # only the Plot object was appended to this group
-
-        # noinspection PyTypeChecker
-        ulogger.draw_points(plot=plot, x=x, y=y, fill=False)
+        :param draw: False: only keep the value, graph is drawn next time it is shown
+        """
+        # ring buffer drops the oldest value once the graph is full, so graph scrolls left
+        display.append(sensor_value)
+        if draw:
+            display.draw()
     # endregion
 
 
@@ -241,13 +309,22 @@ class DisplayGraphs:
         1. Decide whether to cycle between sensors.  If not already in this mode, don't cycle - this will serve to
            remember which graph you had previously viewed.
               - If already in this mode, move to next sensor.
+              - After the last sensor, zoom out: CO2, °F, rH % over 2 hours, then the three over 24 hours, then
+                over 7 days, then back to 2 hours.
         2. Set the display.root_group to show this graph group
         """
 
         if cycle_prior_to_display:
             # we are already at a graph display, so cycle through sensors here
             self._current_graph_sensor_idx = next(DisplayGraphs._graph_display_sensors)
+            if self._current_graph_sensor_idx == Sensors.CO2:
+                # wrapped around to the first sensor, go to next zoom level
+                self._zoom = (self._zoom + 1) % self._graph_displays[0].zoom_levels
 
         display = self._graph_displays[self._current_graph_sensor_idx]
+        # reads from the history tier of this zoom level, nothing is copied
+        display.set_zoom(self._zoom)
+        # catch up on any values that came in while this graph was hidden
+        display.draw()
         # recall assigning to root_group is what actually puts this on physical screen
         self._root.root_group = display.display_group
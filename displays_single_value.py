@@ -1,11 +1,12 @@
-from adafruit_bitmap_font import bitmap_font
 from adafruit_display_text import bitmap_label
-import adafruit_imageload
 from adafruit_itertools import cycle
 import displayio
 from enum import Enum
+import assets
+from display_fields import TextField, TileField
+from segment_display import SegmentLabel
 
-Sensors = Enum('CO2', 'TEMPERATURE', 'HUMIDITY')
+Sensors = Enum('CO2', 'TEMPERATURE', 'HUMIDITY', 'PM2_5')
 Emoji = Enum('VERY_GOOD', 'GOOD', 'OK', 'CONCERNING', 'UNHEALTHY', 'VERY_UNHEALTHY', 'DANGER')
 
 # Index of group appends for single data mode screen
@@ -20,18 +21,33 @@ FieldOrder = Enum(SPRITE_SENSOR = 0,
 class DisplaySingleValue:
     """Class to wrap displays where only a single sensor is being displayed."""
 
-    _single_value_display_sensors = cycle([Sensors.CO2, Sensors.TEMPERATURE, Sensors.HUMIDITY])
-
-    def __init__(self, root_display: displayio.Display):
+    def __init__(self, root_display: displayio.Display, pm2_5: bool = False):
+        """
+        :param pm2_5: Add the PM2.5 group to the cycle.  Only if a PM2.5 sensor is configured: it costs display RAM
+        """
         self._root = root_display  # need a reference to actual screen display when we are switching graphs on screen
         settings = None  #
         self._sensor_groups: list[displayio.Group] = [self._init_display_group_co2(settings),
                                                       self._init_display_group_temp(settings),
                                                       self._init_display_group_humidity(settings), ]
+        if pm2_5:
+            self._sensor_groups.append(self._init_display_group_pm2_5(settings))
 
         # keeping the cycle iterator on the index to allow me index into GraphStruct objects.
         # If I didn't have a separate update values method, then probably could just cycle through graph displays directly
-        self._current_sensor_idx = next(DisplaySingleValue._single_value_display_sensors)
+        # group index == Sensors value
+        self._single_value_display_sensors = cycle(range(len(self._sensor_groups)))
+        self._current_sensor_idx = next(self._single_value_display_sensors)
+
+        # latest values.  A sensor group only gets its labels/emoji re-rendered when it is on screen, otherwise it is
+        # marked dirty and rendered when it is shown.  See update_values()
+        self._values: tuple | None = None
+        self._dirty: list[bool] = [False] * len(self._sensor_groups)
+        # remember what each label/sprite shows, so unchanged values don't re-render.  See display_fields.py
+        self._data_fields = [TextField(group[FieldOrder.DATA]) for group in self._sensor_groups]
+        self._emoji_field = TileField(self._sensor_groups[Sensors.CO2][FieldOrder.SPRITE_EMOJI])
+        self._pm2_5_emoji_field = TileField(self._sensor_groups[Sensors.PM2_5][FieldOrder.SPRITE_EMOJI]) if pm2_5 \
+                                  else None
 
     def _load_settings(self):
         return None
@@ -45,28 +61,23 @@ class DisplaySingleValue:
         #       If so, may want to store percentage in settings file? then could have a helper method (knowing display resolution)
         #       that could translate to x,y values
 
-        font_file = r".\fonts\Arial-Bold-36.bdf"
-        font_value = bitmap_font.load_font(font_file)
+        font_units = assets.font('fonts/LeagueSpartan-Bold-16.bdf')
 
-        font_file = r".\fonts\LeagueSpartan-Bold-16.bdf"
-        font_units = bitmap_font.load_font(font_file)
-
-        data_label = bitmap_label.Label(font_value, text='8888',
-                                        color=0xFFFFFF, scale=1,
-                                        anchor_point=(1.0, 0.0), anchored_position=(90, 80))
+        # seven-segment readout, see segment_display.py.  Only tile indices change on update
+        data_label = SegmentLabel(glyph_width=20, glyph_height=34, length=4, text='8888',
+                                  color=0xFFFFFF,
+                                  anchor_point=(1.0, 0.0), anchored_position=(90, 90))
         unit_label = bitmap_label.Label(font_units, text='ppm',
                                         color=0xFFFFFF, scale=1,
                                         anchor_point=(0.0, 0.0), anchored_position=(100, 80))
 
         # we don't need an explicit black background, since display is already black when pixels are off
-        # bitmap_black_background = displayio.OnDiskBitmap(r".\bitmaps\black_background.bmp")
+        # bitmap_black_background = displayio.OnDiskBitmap('bitmaps/black_background.bmp')
         # tile_grid_background = displayio.TileGrid(bitmap_black_background,
         #                                          pixel_shader=bitmap_black_background.pixel_shader)
 
         # Load the sprite sheet for sensor symbols
-        sprite_sheet1, palette1 = adafruit_imageload.load(r".\bitmaps\sensor_symbols_sprite_210x70.bmp",
-                                                          bitmap=displayio.Bitmap,
-                                                          palette=displayio.Palette)
+        sprite_sheet1, palette1 = assets.sprite_sheet('bitmaps/sensor_symbols_sprite_210x70.bmp')
         # Create a sprite for sensor symbol
         sprite_sensor = displayio.TileGrid(sprite_sheet1, pixel_shader=palette1,
                                            width=1, height=1,
@@ -74,9 +85,7 @@ class DisplaySingleValue:
                                            tile_width=70, tile_height=70)
         sprite_sensor[0] = Sensors.CO2
 
-        sprite_sheet2, palette2 = adafruit_imageload.load(r".\bitmaps\blobs_black_background_680x80.bmp",
-                                                          bitmap=displayio.Bitmap,
-                                                          palette=displayio.Palette)
+        sprite_sheet2, palette2 = assets.sprite_sheet('bitmaps/blobs_black_background_680x80.bmp')
         sprite_emoji = displayio.TileGrid(sprite_sheet2, pixel_shader=palette2,
                                           width=1, height=1,
                                           x=5, y=5,
@@ -94,23 +103,16 @@ class DisplaySingleValue:
     def _init_display_group_temp(self, settings) -> displayio.Group:
         """Initialize display for single-data mode temperature"""
 
-        font_file = r".\fonts\Arial-Bold-36.bdf"
-        font_value = bitmap_font.load_font(font_file)
-
-        font_file = r".\fonts\LeagueSpartan-Bold-16.bdf"
-        font_units = bitmap_font.load_font(font_file)
-
-        data_label = bitmap_label.Label(font_value, text='--',
-                                        color=0xFFFFFF, scale=2,
-                                        anchor_point=(1.0, 1.0), anchored_position=(120, 90))
-        unit_label = bitmap_label.Label(font_units, text='°F',
-                                        color=0xFFFFFF, scale=2,
-                                        anchor_point=(0.0, 1.0), anchored_position=(125, 80))
+        # seven-segment readouts drawn at full size, instead of scale=2 labels (jaggy).  See segment_display.py
+        data_label = SegmentLabel(glyph_width=36, glyph_height=56, length=3, text='--',
+                                  color=0xFFFFFF,
+                                  anchor_point=(1.0, 1.0), anchored_position=(120, 90))
+        unit_label = SegmentLabel(glyph_width=16, glyph_height=26, length=2, text='°F',
+                                  color=0xFFFFFF,
+                                  anchor_point=(0.0, 1.0), anchored_position=(125, 90))
 
         # Load the sprite sheet for sensor symbols
-        sprite_sheet1, palette1 = adafruit_imageload.load(r".\bitmaps\sensor_symbols_sprite_210x70.bmp",
-                                                          bitmap=displayio.Bitmap,
-                                                          palette=displayio.Palette)
+        sprite_sheet1, palette1 = assets.sprite_sheet('bitmaps/sensor_symbols_sprite_210x70.bmp')
         # Create a sprite for sensor symbol
         sprite_sensor = displayio.TileGrid(sprite_sheet1, pixel_shader=palette1,
                                            width=1, height=1,
@@ -129,23 +131,16 @@ class DisplaySingleValue:
     def _init_display_group_humidity(self, settings) -> displayio.Group:
         """Initialize display for single-data mode temperature"""
 
-        font_file = r".\fonts\Arial-Bold-36.bdf"
-        font_value = bitmap_font.load_font(font_file)
-
-        font_file = r".\fonts\LeagueSpartan-Bold-16.bdf"
-        font_units = bitmap_font.load_font(font_file)
-
-        data_label = bitmap_label.Label(font_value, text='--',
-                                        color=0xFFFFFF, scale=2,
-                                        anchor_point=(1.0, 1.0), anchored_position=(120, 90))
-        unit_label = bitmap_label.Label(font_units, text='%',
-                                        color=0xFFFFFF, scale=2,
-                                        anchor_point=(0.0, 1.0), anchored_position=(125, 80))
+        # seven-segment readouts drawn at full size, instead of scale=2 labels (jaggy).  See segment_display.py
+        data_label = SegmentLabel(glyph_width=36, glyph_height=56, length=3, text='--',
+                                  color=0xFFFFFF,
+                                  anchor_point=(1.0, 1.0), anchored_position=(120, 90))
+        unit_label = SegmentLabel(glyph_width=16, glyph_height=26, length=1, text='%',
+                                  color=0xFFFFFF,
+                                  anchor_point=(0.0, 1.0), anchored_position=(125, 90))
 
         # Load the sprite sheet for sensor symbols
-        sprite_sheet1, palette1 = adafruit_imageload.load(r".\bitmaps\sensor_symbols_sprite_210x70.bmp",
-                                                          bitmap=displayio.Bitmap,
-                                                          palette=displayio.Palette)
+        sprite_sheet1, palette1 = assets.sprite_sheet('bitmaps/sensor_symbols_sprite_210x70.bmp')
         # Create a sprite for sensor symbol
         sprite_sensor = displayio.TileGrid(sprite_sheet1, pixel_shader=palette1,
                                            width=1, height=1,
@@ -161,6 +156,37 @@ class DisplaySingleValue:
 
 
 
+        return group_single_display
+
+    def _init_display_group_pm2_5(self, settings) -> displayio.Group:
+        """Initialize display for single-data mode PM2.5"""
+
+        font_units = assets.font('fonts/LeagueSpartan-Bold-16.bdf')
+
+        # no PM2.5 symbol on the sensor sprite sheet, so the name goes where the symbol would be
+        name_label = bitmap_label.Label(font_units, text='PM2.5',
+                                        color=0xFFFFFF, scale=1,
+                                        anchor_point=(0.5, 0.5), anchored_position=(195, 40))
+        data_label = SegmentLabel(glyph_width=20, glyph_height=34, length=3, text='---',
+                                  color=0xFFFFFF,
+                                  anchor_point=(1.0, 0.0), anchored_position=(90, 90))
+        unit_label = bitmap_label.Label(font_units, text='ug/m3',
+                                        color=0xFFFFFF, scale=1,
+                                        anchor_point=(0.0, 0.0), anchored_position=(100, 80))
+
+        sprite_sheet, palette = assets.sprite_sheet('bitmaps/blobs_black_background_680x80.bmp')
+        sprite_emoji = displayio.TileGrid(sprite_sheet, pixel_shader=palette,
+                                          width=1, height=1,
+                                          x=5, y=5,
+                                          tile_width=85, tile_height=80)
+
+        group_single_display = displayio.Group(scale=1)
+        # same order as the other groups, see FieldOrder
+        group_single_display.append(name_label)
+        group_single_display.append(data_label)
+        group_single_display.append(unit_label)
+        group_single_display.append(sprite_emoji)
+
         return group_single_display
 
     # TODO: make a helper method for display group initializers - there is alot of repeated code here
@@ -168,23 +194,39 @@ class DisplaySingleValue:
 
 
     #region update values
-    def update_values(self, *, co2: int, temperature_f: float, humidity: float) -> None:
-        """Updates all the sensor groups, regardless if they are being shown on screen"""
+    def update_values(self, *, co2: int | None, temperature_f: float | None, humidity: float | None,
+                      pm2_5: int = None) -> None:
+        """Keep latest values for all sensor groups.  Only the group on screen (if any) is re-rendered now.
+        A None value (no sensor for it) leaves its group as it is.
+        """
+        self._values = (co2, temperature_f, humidity, pm2_5)
+        for i in range(len(self._dirty)):
+            self._dirty[i] = True
 
-        # if the display groups were really complicated, they could be their own classes to handle complex updates.
+        group = self._sensor_groups[self._current_sensor_idx]
+        if self._root.root_group is group:
+            self._render(self._current_sensor_idx)
 
-        group = self._sensor_groups[Sensors.CO2]
-        # noinspection PyUnresolvedReferences
-        group[FieldOrder.DATA].text = f'{co2: >4}'
-        group[FieldOrder.SPRITE_EMOJI][0] = self._get_emoji_co2(co2)
 
-        group = self._sensor_groups[Sensors.TEMPERATURE]
-        # noinspection PyUnresolvedReferences
-        group[FieldOrder.DATA].text = f'{temperature_f:0.0f}'
+    def _render(self, sensor: int) -> None:
+        """Draw latest values into one sensor group"""
+        self._dirty[sensor] = False
+        if self._values is None:
+            return
+        co2, temperature_f, humidity, pm2_5 = self._values
 
-        group = self._sensor_groups[Sensors.HUMIDITY]
-        # noinspection PyUnresolvedReferences
-        group[FieldOrder.DATA].text = f'{humidity:0.0f}'
+        # if the display groups were really complicated, they could be their own classes to handle complex updates.
+        field = self._data_fields[sensor]
+        if sensor == Sensors.CO2 and co2 is not None:
+            field.update(f'{co2: >4}')
+            self._emoji_field.update(self._get_emoji_co2(co2))
+        elif sensor == Sensors.TEMPERATURE and temperature_f is not None:
+            field.update(f'{temperature_f:0.0f}')
+        elif sensor == Sensors.HUMIDITY and humidity is not None:
+            field.update(f'{humidity:0.0f}')
+        elif sensor == Sensors.PM2_5 and pm2_5 is not None:
+            field.update(f'{pm2_5: >3}')
+            self._pm2_5_emoji_field.update(self._get_emoji_pm2_5(pm2_5))
 
 
     def _get_emoji_co2(self, ppm: int) -> Emoji:
@@ -206,6 +248,22 @@ class DisplaySingleValue:
         if ppm < 5000:
             return Emoji.VERY_UNHEALTHY
         return Emoji.DANGER
+
+    def _get_emoji_pm2_5(self, ug_m3: int) -> Emoji:
+        """Get specific emoji based on PM2.5 µg/m³.  US EPA AQI breakpoints"""
+        if ug_m3 <= 5:
+            return Emoji.VERY_GOOD
+        if ug_m3 <= 12:
+            return Emoji.GOOD
+        if ug_m3 <= 35:
+            return Emoji.OK
+        if ug_m3 <= 55:
+            return Emoji.CONCERNING
+        if ug_m3 <= 150:
+            return Emoji.UNHEALTHY
+        if ug_m3 <= 250:
+            return Emoji.VERY_UNHEALTHY
+        return Emoji.DANGER
     #endregion
 
 
@@ -223,8 +281,11 @@ class DisplaySingleValue:
             pass
         else:
             # we are already at a graph display, so cycle through sensors here
-            self._current_sensor_idx = next(DisplaySingleValue._single_value_display_sensors)
+            self._current_sensor_idx = next(self._single_value_display_sensors)
 
+        # bring group up to date before showing, so we never flash stale values
+        if self._dirty[self._current_sensor_idx]:
+            self._render(self._current_sensor_idx)
         group = self._sensor_groups[self._current_sensor_idx]
         # recall assigning to root_group is what actually puts this on physical screen
         self._root.root_group = group
\ No newline at end of file
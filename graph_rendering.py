@@ -0,0 +1,191 @@
+from bitmaptools import draw_line, fill_region
+from circuitpython_uplot.plot import Plot
+from circuitpython_uplot.logging import Logging as Ulogging
+import displayio
+
+'''
+Two ways of getting graph history onto a uplot Plot.  Both take the same x/y data (see GraphStruct), so they can
+be swapped.
+
+FullRedrawRenderer:  what uplot does on its own.  Clear the plot area and draw every line segment again.
+                     Cost grows with the number of points.  Kept for comparison (simulation/bench_graph_render.py)
+
+ScrollingRenderer:   only draws what changed.  While the graph is filling up, that is one new line segment.  Once
+                     the graph is full, everything has to move left every update.  Copying the plot bitmap over by
+                     a column touches every pixel of the plot area, which is as much work as a full redraw.
+                     So the lines go on their own layer instead: a bitmap shown through a TileGrid with one tile per
+                     pixel column.  The bitmap is used as a ring of columns; scrolling re-points the tiles
+                     (one small write per column) and only the newest column(s) get drawn.  Pixels already drawn
+                     are never touched again.
+                     A full redraw only happens when the y-axis range changes, or when the data didn't change by
+                     exactly one appended point (first draw, cleared history, ...).
+
+NOTE: a point is 194/120 = ~1.6 pixels wide on this screen, so scrolling moves 1 or 2 columns and carries the
+      remainder.  Points can end up 1 pixel off from where a full redraw would put them.
+NOTE: TileGrid tile numbers only go to 255, so the plot area can't be wider than 256 pixels.  The screen is 240.
+'''
+
+
+class FullRedrawRenderer:
+
+    def __init__(self, plot: Plot, ulog: Ulogging):
+        self._plot = plot
+        self._ulog = ulog
+        self.full_redraws = 0
+        self.incremental_draws = 0
+
+    def draw(self, x, y) -> None:
+        """Redraw all points.
+
+        :param x: x value of each point, oldest first
+        :param y: RingBuffer of y values, oldest first
+        """
+        self.full_redraws += 1
+        # noinspection PyTypeChecker
+        self._ulog.draw_points(plot=self._plot, x=x, y=y, fill=False)
+
+
+
+class ScrollingRenderer:
+
+    def __init__(self, plot: Plot, ulog: Ulogging):
+        """Adds a line layer on top of `plot`.  The plot's own bitmap keeps the axes and ticks and isn't drawn on."""
+        self._plot = plot
+        self._ulog = ulog
+
+        # same area uplot's Logging.clear_plot() uses.  right and bottom are exclusive
+        self._left = plot._newxmin + plot._tickheightx + 1
+        self._top = plot._newymax + 1
+        self._width = (plot._newxmax - 1) - self._left
+        self._height = (plot._newymin - plot._tickheighty) - self._top
+
+        palette = displayio.Palette(2)
+        palette[0] = 0x000000
+        palette.make_transparent(0)
+        palette[1] = plot._plot_palette[ulog._line_index]
+        self._bitmap = displayio.Bitmap(self._width, self._height, 2)
+        # one tile per pixel column.  Screen column c shows bitmap column self._bitmap_column(c)
+        self._grid = displayio.TileGrid(self._bitmap, pixel_shader=palette,
+                                        width=self._width, height=1,
+                                        tile_width=1, tile_height=self._height,
+                                        x=self._left, y=self._top)
+        plot.append(self._grid)
+        self._newest_column = self._width - 1   # bitmap column shown at the right edge
+
+        # what the layer currently shows
+        self._y_range = None            # (ymin, ymax) at the last full redraw
+        self._append_count = 0          # RingBuffer.append_count at the last draw
+        self._last_pixel = None         # (screen column, row) of the newest point drawn
+        self._scroll_remainder = 0.0    # fraction of a column not yet scrolled
+
+        self.full_redraws = 0
+        self.incremental_draws = 0
+
+
+    def invalidate(self) -> None:
+        """Force a full redraw next time."""
+        self._y_range = None
+
+
+    def draw(self, x, y) -> None:
+        """Bring the plot up to date with the data.
+
+        :param x: x value of each point, oldest first
+        :param y: RingBuffer of y values, oldest first
+        """
+        y_range = (self._ulog.ymin, self._ulog.ymax)
+        new_points = y.append_count - self._append_count
+        self._append_count = y.append_count
+
+        if y_range != self._y_range or new_points != 1 or len(y) < 2 or self._last_pixel is None:
+            self._y_range = y_range
+            self._redraw_all(x, y)
+            return
+
+        self.incremental_draws += 1
+        last_column, last_row = self._last_pixel
+        if y.is_full:
+            # every point moved one x step to the left
+            self._scroll_remainder += self._pixels_per_point()
+            shift = int(self._scroll_remainder)
+            self._scroll_remainder -= shift
+            if shift:
+                self._scroll_left(shift)
+                last_column -= shift
+
+        column, row = self._to_pixel(x[-1], y[-1])
+        self._draw_segment(last_column, last_row, column, row)
+        self._last_pixel = (column, row)
+
+
+    # region helpers
+    def _pixels_per_point(self) -> float:
+        plot = self._plot
+        return (plot._newxmax - plot._newxmin) / abs(self._ulog.xmax - self._ulog.xmin)
+
+    def _to_pixel(self, x_value, y_value) -> tuple:
+        """Same mapping uplot uses, as (screen column, row) inside the line layer"""
+        plot, ulog = self._plot, self._ulog
+        px = int(Plot.transform(ulog.xmin, ulog.xmax, plot._newxmin, plot._newxmax, x_value)) - self._left
+        py = int(Plot.transform(ulog.ymin, ulog.ymax, plot._newymin, plot._newymax, y_value)) - self._top
+        return min(max(px, 0), self._width - 1), min(max(py, 0), self._height - 1)
+
+    def _bitmap_column(self, screen_column: int) -> int:
+        column = self._newest_column + 1 + screen_column
+        return column - self._width if column >= self._width else column
+
+    def _scroll_left(self, columns: int) -> None:
+        """Move picture left.  Columns coming in at the right edge are the oldest ones, they get cleared."""
+        newest = self._newest_column + columns
+        self._newest_column = newest - self._width if newest >= self._width else newest
+        for screen_column in range(self._width - columns, self._width):
+            column = self._bitmap_column(screen_column)
+            fill_region(self._bitmap, column, 0, column + 1, self._height, 0)
+        self._apply_tiles()
+
+    def _apply_tiles(self) -> None:
+        grid = self._grid
+        column = self._newest_column + 1
+        width = self._width
+        for screen_column in range(width):
+            if column == width:
+                column = 0
+            grid[screen_column] = column
+            column += 1
+
+    def _draw_segment(self, column0: int, row0: int, column1: int, row1: int) -> None:
+        """Line between two points given in screen columns.  Drawn column by column, since neighbouring screen
+        columns aren't necessarily neighbours in the bitmap.
+        """
+        if column1 == column0:
+            self._vertical(column1, row0, row1)
+            return
+        previous_row = row0
+        for screen_column in range(column0 + 1, column1 + 1):
+            row = row0 + (row1 - row0) * (screen_column - column0) // (column1 - column0)
+            # join to previous column's row so steep lines don't have gaps
+            self._vertical(screen_column, previous_row, row)
+            previous_row = row
+
+    def _vertical(self, screen_column: int, row0: int, row1: int) -> None:
+        column = self._bitmap_column(screen_column)
+        if row0 > row1:
+            row0, row1 = row1, row0
+        fill_region(self._bitmap, column, row0, column + 1, row1 + 1, 1)
+
+    def _redraw_all(self, x, y) -> None:
+        self.full_redraws += 1
+        fill_region(self._bitmap, 0, 0, self._width, self._height, 0)
+        self._newest_column = self._width - 1
+        self._apply_tiles()
+        self._scroll_remainder = 0.0
+        previous = None
+        for i in range(len(y)):
+            pixel = self._to_pixel(x[i], y[i])
+            if previous is None:
+                self._vertical(pixel[0], pixel[1], pixel[1])
+            else:
+                draw_line(self._bitmap, previous[0], previous[1], pixel[0], pixel[1], 1)
+            previous = pixel
+        self._last_pixel = previous
+    # endregion
@@ -0,0 +1,240 @@
+import gc
+import time
+
+'''
+Where the RAM goes, and whether the heap is slowly going bad.
+
+    subsystems      RAM each boot stage kept (after gc.collect()), checkpoint('display') etc. in code.py
+    tasks           bytes each scheduler task allocates per run, sampled (see TaskScheduler `monitor`)
+    check()         once a minute: live heap after gc.collect(), free RAM, largest free block.  High-water marks,
+                    and how much the live heap has grown since the first check: a leak shows up as steady growth
+    fragmentation   free RAM in small pieces.  A MemoryError comes when no single free block is big enough, even
+                    with plenty free in total (a TLS record, a bitmap, a list that has to grow)
+
+gc.mem_alloc() / mem_free() walk the heap's allocation table on the board, about a millisecond each.  So task runs
+are sampled: about once a second per task (1 in 100 runs of the 10 ms button task), not every run.  A sample where a
+garbage collection happened during the run is skipped, its delta would be meaningless.  A task that awaits in the
+middle of a run (a single shot measurement) also gets what the other tasks allocated meanwhile.
+
+The largest free block is found by allocating: a bytearray of the size to try, freed right away.  bytearray() zeroes
+its memory, so the search stops at `probe_limit`: it costs a few times that in memory writes per check, and a
+largest block of 256 KB is plenty for anything the bot allocates.  Blocks bigger than that show as '>=256 KB'.
+
+Without gc.mem_free() (CPython) there is nothing to measure and `available` is False.  See simulation/heap.py to get
+numbers on the host.
+
+usage:
+    heap = HeapMonitor()
+    ...
+    heap.checkpoint('display')                          # after creating the display
+    scheduler = TaskScheduler(monitor = heap)           # task allocations
+    scheduler.add('memory', check_memory, period = 60)  # calls heap.check()
+    print(heap.report())
+    io.publish('diagnostics', heap.summary())
+'''
+
+
+class TaskAllocations:
+    """Sampled allocations of one task"""
+
+    def __init__(self, runs_per_second: float):
+        self.runs_per_second = runs_per_second
+        self.samples = 0
+        self.allocated = 0      # bytes, all samples
+        self.max_allocated = 0  # bytes, one run
+        self.collected = 0      # samples skipped, a garbage collection ran in the middle
+
+
+    @property
+    def mean(self) -> float:
+        return self.allocated / self.samples if self.samples else 0.0
+
+
+    @property
+    def per_second(self) -> float:
+        """Bytes allocated per second, estimated from the samples"""
+        return self.mean * self.runs_per_second
+
+
+class HeapMonitor:
+
+    def __init__(self, *, probe_limit: int = 256 * 1024, sample_period: float = 1.0):
+        """
+        :param probe_limit: Largest free block to look for, bytes.  See module docstring
+        :param sample_period: Seconds between allocation samples of one task
+        """
+        self.available = hasattr(gc, 'mem_alloc') and hasattr(gc, 'mem_free')
+        self.probe_limit = probe_limit
+        self.sample_period = sample_period
+
+        # name -> bytes kept, in checkpoint() order
+        self.subsystems = {}
+        # task name -> TaskAllocations
+        self.tasks = {}
+        self._strides = {}      # task name -> sample 1 in this many runs
+
+        # check() results: latest, and high-water marks
+        self.checks = 0
+        self.live = 0                   # bytes in use after gc.collect()
+        self.free = 0
+        self.largest_block = 0
+        self.max_live = 0
+        self.min_free = None
+        self.min_largest_block = None
+        self.first_live = 0             # at the first check, the baseline for growth
+        self._first_check_at = 0.0
+        self._last_check_at = 0.0
+        self.check_duration = 0.0       # seconds, latest check
+
+        self._last_alloc = self._collect() if self.available else 0
+
+
+    @staticmethod
+    def _collect() -> int:
+        gc.collect()
+        return gc.mem_alloc()
+
+
+    def checkpoint(self, name: str) -> None:
+        """Log the RAM kept since the previous checkpoint (or since this monitor was created) under `name`"""
+        if not self.available:
+            return
+        alloc = self._collect()
+        self.subsystems[name] = self.subsystems.get(name, 0) + alloc - self._last_alloc
+        self._last_alloc = alloc
+
+
+    # region TaskScheduler monitor
+    def start(self, task) -> int | None:
+        """Before a run of `task`.  Returns what end() needs, None if this run isn't sampled"""
+        if not self.available:
+            return None
+        stride = self._strides.get(task.name)
+        if stride is None:
+            stride = max(1, int(self.sample_period / task.period)) if task.period else 1
+            self._strides[task.name] = stride
+            self.tasks[task.name] = TaskAllocations(1 / task.period if task.period else 0.0)
+        if task.run_count % stride:
+            return None
+        return gc.mem_alloc()
+
+
+    def end(self, task, started: int | None) -> None:
+        """After a run of `task`, with what start() returned"""
+        if started is None:
+            return
+        allocated = gc.mem_alloc() - started
+        stats = self.tasks[task.name]
+        if allocated < 0:
+            stats.collected += 1
+            return
+        stats.samples += 1
+        stats.allocated += allocated
+        if allocated > stats.max_allocated:
+            stats.max_allocated = allocated
+    # endregion
+
+
+    def check(self) -> None:
+        """Collect, then measure the live heap, free RAM and the largest free block.  Call every minute or so"""
+        if not self.available:
+            return
+        started = time.monotonic()
+        self.live = self._collect()
+        self.free = gc.mem_free()
+        self.largest_block = self._largest_block(self.free)
+        self.check_duration = time.monotonic() - started
+        self._last_check_at = started
+
+        self.checks += 1
+        if self.checks == 1:
+            self.first_live = self.live
+            self._first_check_at = started
+        self.max_live = max(self.max_live, self.live)
+        self.min_free = self.free if self.min_free is None else min(self.min_free, self.free)
+        if self.min_largest_block is None or self.largest_block < self.min_largest_block:
+            self.min_largest_block = self.largest_block
+
+
+    def _largest_block(self, free: int) -> int:
+        """Biggest bytearray that can be allocated right now, up to probe_limit.  To 1 KB"""
+        high = min(self.probe_limit, free)
+        if high <= 0 or self._fits(high):
+            return max(0, high)
+        low = 0
+        while high - low > 1024:
+            middle = (low + high) // 2
+            if self._fits(middle):
+                low = middle
+            else:
+                high = middle
+        return low
+
+
+    @staticmethod
+    def _fits(size: int) -> bool:
+        try:
+            block = bytearray(size)
+        except MemoryError:
+            return False
+        del block
+        return True
+
+
+    @property
+    def fragmentation(self) -> float | None:
+        """Share of free RAM outside the largest free block, 0..1.  None if the largest block is over probe_limit"""
+        if not self.free or self.largest_block >= self.probe_limit:
+            return None
+        return 1 - self.largest_block / self.free
+
+
+    @property
+    def growth_per_hour(self) -> float:
+        """Live heap growth since the first check, bytes per hour"""
+        hours = (self._last_check_at - self._first_check_at) / 3600
+        if self.checks < 2 or hours <= 0:
+            return 0.0
+        return (self.live - self.first_live) / hours
+
+
+    def _block(self, size: int) -> str:
+        if size >= self.probe_limit:
+            return f'>={self.probe_limit // 1024} KB'
+        return f'{size / 1024:.0f} KB'
+
+
+    def report(self) -> str:
+        if not self.available:
+            return 'heap: gc.mem_free() not available'
+        lines = ['heap, kept by each stage of boot (KB):  ' +
+                 ', '.join(f'{name} {size / 1024:.1f}' for name, size in self.subsystems.items())]
+        lines.append(f'{"task":<12} {"samples":>7} {"B/run":>8} {"max B":>8} {"B/s":>8} {"gc":>4}')
+        for name, stats in self.tasks.items():
+            lines.append(f'{name:<12} {stats.samples:>7} {stats.mean:>8.0f} {stats.max_allocated:>8} '
+                         f'{stats.per_second:>8.0f} {stats.collected:>4}')
+        if self.checks:
+            fragmentation = self.fragmentation
+            fragmentation = '-' if fragmentation is None else f'{fragmentation * 100:.0f}%'
+            lines.append(f'live {self.live / 1024:.1f} KB (max {self.max_live / 1024:.1f}), '
+                         f'free {self.free / 1024:.1f} KB (min {self.min_free / 1024:.1f}), '
+                         f'largest block {self._block(self.largest_block)} '
+                         f'(min {self._block(self.min_largest_block)}), fragmentation {fragmentation}')
+            lines.append(f'live heap {(self.live - self.first_live) / 1024:+.1f} KB since first check '
+                         f'({self.growth_per_hour / 1024:+.1f} KB/h), {self.checks} checks, '
+                         f'last took {self.check_duration * 1000:.0f} ms')
+        return '\n'.join(lines)
+
+
+    def summary(self) -> str:
+        """One line for the dashboard: latest check, high-water marks, growth, the task allocating the most"""
+        if not self.checks:
+            return 'heap: no checks yet'
+        busiest = max(self.tasks.items(), key=lambda item: item[1].per_second, default=None)
+        text = (f'heap live {self.live // 1024} KB (max {self.max_live // 1024}), free {self.free // 1024} KB '
+                f'(min {self.min_free // 1024}), largest block {self._block(self.largest_block)} '
+                f'(min {self._block(self.min_largest_block)}), {self.growth_per_hour / 1024:+.1f} KB/h')
+        if busiest is not None and busiest[1].samples:
+            name, stats = busiest
+            text += f', most allocating: {name} {stats.per_second:.0f} B/s'
+        return text
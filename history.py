@@ -0,0 +1,90 @@
+from aggregator import StreamingStats
+from ring_buffer import RingBuffer
+
+'''
+Sensor history at several resolutions, in fixed memory.
+
+The graphs get one point a minute.  Keeping a week of those would be 10080 points per sensor, so instead history is
+kept in tiers, each coarser than the one before:
+
+    tier   bucket    points   covers
+    2h     1 min     120      2 hours
+    24h    10 min    144      24 hours
+    7d     1 hour    168      7 days
+
+Each tier is a RingBuffer (one preallocated float array).  Only the first tier is added to directly.  Every 10 of its
+points are averaged into one point of the 24h tier, every 6 of those into one point of the 7d tier.  The averaging is
+running stats (aggregator.py), so no list of pending points is kept either.
+
+All tiers together are 432 floats, ~1.7 KB per sensor.
+'''
+
+# (bucket seconds, points).  Bucket of each tier must be a whole multiple of the one before
+DEFAULT_TIERS = ((60, 120), (600, 144), (3600, 168))
+
+
+def span_name(seconds: int) -> str:
+    """7200 -> '2h', 86400 -> '24h', 604800 -> '7d', 600 -> '10m'"""
+    if seconds % 86400 == 0 and seconds > 86400:
+        return f'{seconds // 86400}d'
+    if seconds % 3600 == 0:
+        return f'{seconds // 3600}h'
+    return f'{seconds // 60}m'
+
+
+class HistoryTier:
+
+    def __init__(self, bucket_seconds: int, capacity: int, points_per_bucket: int):
+        """
+        :param bucket_seconds: Time covered by one point
+        :param capacity: Points kept
+        :param points_per_bucket: Points of the tier below averaged into one point of this tier
+        """
+        self.bucket_seconds = bucket_seconds
+        self.values = RingBuffer(capacity)
+        self.name = span_name(bucket_seconds * capacity)
+        self._points_per_bucket = points_per_bucket
+        self._pending = StreamingStats()
+
+    @property
+    def span_seconds(self) -> int:
+        return self.bucket_seconds * self.values.capacity
+
+
+class TieredHistory:
+    """History of one sensor value.  See module docstring."""
+
+    def __init__(self, tiers: tuple = DEFAULT_TIERS):
+        """
+        :param tiers: (bucket seconds, points) for each tier, finest first.  add() must be called once per bucket of
+                      the first tier.
+        """
+        self.tiers: list[HistoryTier] = []
+        previous_seconds = tiers[0][0]
+        for bucket_seconds, capacity in tiers:
+            if bucket_seconds % previous_seconds:
+                raise ValueError('tier buckets must be whole multiples of the tier before')
+            self.tiers.append(HistoryTier(bucket_seconds, capacity, bucket_seconds // previous_seconds))
+            previous_seconds = bucket_seconds
+
+    def add(self, value: float) -> int:
+        """Add a point to the finest tier and roll up into coarser tiers as their buckets fill.
+
+        :return: Number of tiers that got a new point (1 = only the finest).  Tiers from this index on are unchanged.
+        """
+        self.tiers[0].values.append(value)
+        updated = 1
+        for tier in self.tiers[1:]:
+            tier._pending.add(value)
+            if tier._pending.count < tier._points_per_bucket:
+                break
+            value = tier._pending.mean
+            tier._pending.reset()
+            tier.values.append(value)
+            updated += 1
+        return updated
+
+    def clear(self) -> None:
+        for tier in self.tiers:
+            tier.values.clear()
+            tier._pending.reset()
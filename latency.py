@@ -0,0 +1,141 @@
+import supervisor
+
+'''
+How long each stage of the loop takes, as histograms: where button lag comes from.
+
+The scheduler's report has mean and max per task.  A mean hides the one slow run in a hundred that makes a button
+press feel sticky, and a task is several stages (the sensor task reads, updates, prints).  So the stages that can
+hold up the loop each get a histogram:
+
+    button gap      time between two button polls, 10 ms if nothing is in the way.  This is the lag itself
+    debounce        the three Debouncer.update() calls
+    <sensor> sample sensor.sample().  SCD4x single shots (IDLE mode) are awaited 5 s, other tasks run meanwhile:
+                    they show up here (as the max), but they don't block anything
+    serial print    printing a reading
+    display update  BotScreen.update_values(), graph point
+    publish         io.publish_group(), live and backfill
+    mqtt pump       io.pump()
+    connect         a connection step: wifi, TLS, MQTT login.  Blocking sockets, seconds when the network is slow
+
+Cheap enough to leave on: a sample is two supervisor.ticks_ms() calls and at most 13 compares, and allocates
+nothing.  ticks_ms() is a small int on the board (time.monotonic_ns() would allocate a long int every call, and
+time.monotonic() a float).  The price is 1 ms resolution: 0 means 'under a millisecond', and any sample can be 1 ms
+off.  Buckets are fixed, 1-2-5 steps (the task periods are 10 ms, 250 ms, 1 s...), so p50/p95 come out as bucket
+upper bounds: 'p95 20' means 95% took 20 ms or less.  Good enough to tell a 2 ms stage from a 200 ms one, which is
+the question.
+
+Dump on demand: 'l' on the serial console prints report(), a `latency` message on the dashboard's `commands` feed
+publishes summary() to the `diagnostics` feed.
+
+usage:
+    latency = LatencyStages()
+    debounce = latency.stage('debounce')
+    ...
+    with debounce:
+        button0.update()
+    print(latency.report())
+'''
+
+_TICKS_MASK = (1 << 29) - 1     # supervisor.ticks_ms() wraps at 2**29
+# bucket upper bounds in ms.  A sample goes in the first bucket it is <= to, the last bucket takes everything above
+BOUNDS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class LatencyStage:
+    """Histogram of one stage.  Time it with `with stage:`, or add() milliseconds measured some other way.
+
+    Not re-entrant: one stage can't be timed twice at once (a stage per sensor task, not one shared).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.count = 0
+        self.max = 0
+        self._started = None
+
+
+    # exit takes its three arguments by name: *args would allocate a tuple every sample
+    def __enter__(self):
+        self._started = supervisor.ticks_ms()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.add((supervisor.ticks_ms() - self._started) & _TICKS_MASK)
+
+
+    def lap(self) -> None:
+        """Add the time since the previous lap() call.  The first call only starts the clock"""
+        now = supervisor.ticks_ms()
+        if self._started is not None:
+            self.add((now - self._started) & _TICKS_MASK)
+        self._started = now
+
+
+    def add(self, ms: int) -> None:
+        i = 0
+        last = len(BOUNDS)
+        while i < last and ms > BOUNDS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        if ms > self.max:
+            self.max = ms
+
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound (ms) of the bucket holding that fraction of the samples.  `max` if it is the last bucket"""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BOUNDS[i], self.max) if i < len(BOUNDS) else self.max
+        return self.max
+
+
+    def reset(self) -> None:
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.count = 0
+        self.max = 0
+
+
+class LatencyStages:
+    """All the stages, for reports"""
+
+    def __init__(self):
+        self.stages = {}    # name -> LatencyStage, in the order they were added
+
+
+    def stage(self, name: str) -> LatencyStage:
+        """The stage called `name`, created the first time"""
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = LatencyStage(name)
+        return stage
+
+
+    def reset(self) -> None:
+        for stage in self.stages.values():
+            stage.reset()
+
+
+    def report(self) -> str:
+        """p50/p95/max and the histogram of each stage.  Milliseconds"""
+        header = ''.join(f' {"<=" + str(bound):>8}' for bound in BOUNDS) + f' {">" + str(BOUNDS[-1]):>8}'
+        lines = [f'{"stage":<16} {"count":>9} {"p50":>5} {"p95":>5} {"max":>6} {header}']
+        for stage in self.stages.values():
+            counts = ''.join(f' {count:>8}' for count in stage.counts)
+            lines.append(f'{stage.name:<16} {stage.count:>9} {stage.percentile(0.5):>5} {stage.percentile(0.95):>5} '
+                         f'{stage.max:>6} {counts}')
+        return '\n'.join(lines)
+
+
+    def summary(self) -> str:
+        """One line for the dashboard: stage p50/p95/max ms"""
+        return 'latency ms p50/p95/max: ' + ', '.join(
+            f'{stage.name} {stage.percentile(0.5)}/{stage.percentile(0.95)}/{stage.max}'
+            for stage in self.stages.values() if stage.count)
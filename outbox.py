@@ -0,0 +1,162 @@
+import struct
+
+'''
+Store-and-forward queue for dashboard uploads.
+
+While the dashboard connection is down, each interval's averages go in here with the time they were taken.  Once
+connected again they are sent oldest first, a few at a time, with their original timestamps (Adafruit IO `created_at`),
+so the dashboard graphs get filled in instead of showing a gap.
+
+Records are struct-packed into one preallocated bytearray used as a ring, 12 bytes each:
+
+    uint32  time         time.monotonic() seconds when the reading was queued
+    uint16  co2          ppm
+    int16   temperature  0.01 °C
+    uint16  humidity     0.01 %
+    uint16  pm2_5        µg/m³
+
+A value no sensor reported (no PM2.5 sensor, say) is stored as the field's largest (temperature: smallest) value and
+comes back as None.  720 records (12 hours of 1-minute intervals) is ~8.5 KB.  Nothing is allocated after the
+constructor.
+
+When the outbox is full, the drop policy decides what is lost:
+    DropPolicy.OLDEST   overwrite the oldest record.  Keeps the last `depth` readings
+    DropPolicy.NEWEST   refuse the new record.  Keeps the start of the outage
+    DropPolicy.THIN     drop every other record.  Keeps the whole outage, at half the resolution each time it fills
+
+usage:
+    outbox = Outbox(depth = 720, drop_policy = DropPolicy.OLDEST)
+    outbox.push(int(time.monotonic()), co2, temperature_c, humidity, pm2_5)  # while offline
+    ...
+    if outbox:                                                              # once back online
+        timestamp, co2, temperature_c, humidity, pm2_5 = outbox.peek()
+        upload(...)
+        outbox.pop()            # only after the upload went through
+'''
+
+_RECORD_FORMAT = '<IHhHH'
+RECORD_SIZE = struct.calcsize(_RECORD_FORMAT)
+# stored for None
+_NO_VALUE = 0xFFFF
+_NO_TEMPERATURE = -0x8000
+
+
+# there are no Enums in CircuitPython.
+class DropPolicy:
+    OLDEST = 0
+    NEWEST = 1
+    THIN = 2
+
+
+class Outbox:
+
+    def __init__(self, depth: int = 720, drop_policy: int = DropPolicy.OLDEST):
+        """
+        :param depth: Max number of readings queued
+        :param drop_policy: What to drop when full, see DropPolicy
+        """
+        if depth < 2:
+            raise ValueError('depth must be at least 2')
+        if drop_policy not in (DropPolicy.OLDEST, DropPolicy.NEWEST, DropPolicy.THIN):
+            raise ValueError(f'unknown drop policy: {drop_policy}')
+        self._buffer = bytearray(depth * RECORD_SIZE)
+        self._depth = depth
+        self.drop_policy = drop_policy
+        self._start = 0     # index of the oldest record
+        self._count = 0
+
+        self.queued = 0     # records pushed
+        self.forwarded = 0  # records popped, i.e. uploaded
+        self.dropped = 0    # records lost to the drop policy
+
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def is_full(self) -> bool:
+        return self._count == self._depth
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+
+    def push(self, timestamp: int, co2: int | float | None, temperature_c: float | None, humidity: float | None,
+             pm2_5: int | float = None) -> bool:
+        """Queue a reading, applying the drop policy if full.
+
+        :param timestamp: time.monotonic() seconds the reading belongs to
+        :param co2: None (or any of the values) if no sensor reported it
+        :return: False if the reading was refused (DropPolicy.NEWEST and full)
+        """
+        if self._count == self._depth:
+            if self.drop_policy == DropPolicy.NEWEST:
+                self.dropped += 1
+                return False
+            if self.drop_policy == DropPolicy.THIN:
+                self._thin()
+            else:
+                self._start = (self._start + 1) % self._depth
+                self._count -= 1
+                self.dropped += 1
+
+        index = (self._start + self._count) % self._depth
+        struct.pack_into(_RECORD_FORMAT, self._buffer, index * RECORD_SIZE,
+                         int(timestamp) & 0xFFFFFFFF,
+                         _NO_VALUE if co2 is None else min(max(round(co2), 0), _NO_VALUE - 1),
+                         _NO_TEMPERATURE if temperature_c is None else
+                         min(max(round(temperature_c * 100), _NO_TEMPERATURE + 1), 0x7FFF),
+                         _NO_VALUE if humidity is None else min(max(round(humidity * 100), 0), _NO_VALUE - 1),
+                         _NO_VALUE if pm2_5 is None else min(max(round(pm2_5), 0), _NO_VALUE - 1))
+        self._count += 1
+        self.queued += 1
+        return True
+
+    def peek(self) -> tuple:
+        """Oldest reading, left in the queue: (timestamp, co2, temperature_c, humidity, pm2_5).  IndexError if empty."""
+        if not self._count:
+            raise IndexError('outbox is empty')
+        timestamp, co2, temperature, humidity, pm2_5 = struct.unpack_from(_RECORD_FORMAT, self._buffer,
+                                                                          self._start * RECORD_SIZE)
+        return (timestamp,
+                None if co2 == _NO_VALUE else co2,
+                None if temperature == _NO_TEMPERATURE else temperature / 100,
+                None if humidity == _NO_VALUE else humidity / 100,
+                None if pm2_5 == _NO_VALUE else pm2_5)
+
+    def pop(self) -> tuple:
+        """Remove and return the oldest reading.  Call once it has been uploaded."""
+        record = self.peek()
+        self._start = (self._start + 1) % self._depth
+        self._count -= 1
+        self.forwarded += 1
+        return record
+
+    def clear(self) -> None:
+        """Forget all queued readings.  Memory is kept."""
+        self._start = 0
+        self._count = 0
+
+
+    def _thin(self) -> None:
+        """Keep every other record (oldest, 3rd, 5th, ...), moved together at the start of the ring."""
+        kept = (self._count + 1) // 2
+        buffer = self._buffer
+        for i in range(1, kept):
+            # record 2i moves to slot i.  Slot i is always behind 2i, so nothing is overwritten before it is read
+            source = ((self._start + 2 * i) % self._depth) * RECORD_SIZE
+            target = ((self._start + i) % self._depth) * RECORD_SIZE
+            # byte by byte: a slice (of the bytearray or of a memoryview) would allocate an object per record
+            for offset in range(RECORD_SIZE):
+                buffer[target + offset] = buffer[source + offset]
+        self.dropped += self._count - kept
+        self._count = kept
+
+
+    def report(self) -> str:
+        return (f'outbox: {self._count} waiting (of {self._depth}), {self.queued} queued, '
+                f'{self.forwarded} forwarded, {self.dropped} dropped')
@@ -0,0 +1,195 @@
+import os
+import time
+import board
+from sensor_registry import AirSensor, Measurement, new_measurement
+
+'''
+PM2.5 from a Cubic PM1006, the particle sensor inside the IKEA Vindriktning.
+
+The Vindriktning hack: IKEA's own microcontroller asks the sensor for a reading every ~20 s, the bot listens in on the
+sensor's answers (its TX line, "REST" pad on the Vindriktning board, to the Feather's RX pin) and doesn't send
+anything.  A PM1006 on its own needs asking: set `pm1006_poll_period` (seconds) in settings.toml and wire TX too.
+
+Answer frame, 9600 baud 8N1, 20 bytes:
+
+    0x16 0x11 0x0B  DF1 ... DF16  CS        header, length (17), command (read), data, checksum
+                    DF3 DF4 = PM2.5 µg/m³, big endian
+                    all 20 bytes add up to 0 (mod 256)
+
+UART bytes come in whenever they come in: a read can end in the middle of a frame, and a tapped line picks up
+garbage (the bot booting halfway through a frame, a loose wire).  PM1006Parser copies whatever arrived into a fixed
+ring and takes complete frames out of it, skipping bytes until the next header if a frame doesn't check out.  No
+allocation per byte or per frame.  The UART is read with timeout 0, so nothing here waits for bytes.
+
+usage:
+    sensors = "scd4x, pm1006"       # settings.toml, see sensor_registry.py
+'''
+
+_HEADER = (0x16, 0x11, 0x0B)
+FRAME_SIZE = 20
+_PM2_5_OFFSET = 5                   # DF3 DF4
+# read request for a PM1006 that isn't in a Vindriktning: 0x11 0x02 0x0B 0x01, checksum
+_REQUEST = b'\x11\x02\x0b\x01\xe1'
+_BAUDRATE = 9600
+
+
+class PM1006Parser:
+    """Byte stream in, PM2.5 values out.  See module docstring."""
+
+    def __init__(self, size: int = 64):
+        """
+        :param size: Ring size in bytes, a power of 2.  A bit over 3 frames at 64
+        """
+        if size < FRAME_SIZE or size & (size - 1):
+            raise ValueError(f'size must be a power of 2, at least {FRAME_SIZE}')
+        self._ring = bytearray(size)
+        self._mask = size - 1
+        self._start = 0     # index of the oldest byte
+        self._count = 0
+
+        # stats
+        self.bytes_received = 0
+        self.frames = 0
+        self.checksum_errors = 0
+        self.skipped_bytes = 0      # not part of any good frame: garbage, or the header of a frame that was bad
+        self.overflowed_bytes = 0   # dropped because more came in than the ring holds, between two parse() calls
+
+
+    def feed(self, data, count: int = None) -> None:
+        """Add the first `count` bytes of `data` (all of it by default).  If the ring is full, the oldest bytes go."""
+        if count is None:
+            count = len(data)
+        ring = self._ring
+        mask = self._mask
+        end = self._start + self._count
+        for i in range(count):
+            ring[(end + i) & mask] = data[i]
+        self._count += count
+        self.bytes_received += count
+        overflow = self._count - len(ring)
+        if overflow > 0:
+            self._start = (self._start + overflow) & mask
+            self._count -= overflow
+            self.overflowed_bytes += overflow
+
+
+    def parse(self) -> int | None:
+        """Take the complete frames out of the ring.  Returns the newest PM2.5 value, None if there was no good frame.
+
+        A partial frame at the end stays for the next call.
+        """
+        ring = self._ring
+        mask = self._mask
+        pm2_5 = None
+        while self._count >= len(_HEADER):
+            start = self._start
+            if (ring[start] != _HEADER[0] or ring[(start + 1) & mask] != _HEADER[1]
+                    or ring[(start + 2) & mask] != _HEADER[2]):
+                self._skip(1)
+                self.skipped_bytes += 1
+                continue
+            if self._count < FRAME_SIZE:
+                break       # rest of the frame isn't here yet
+            total = 0
+            for i in range(FRAME_SIZE):
+                total += ring[(start + i) & mask]
+            if total & 0xFF:
+                # bad frame, or a header-looking run of garbage.  Look for the next header from the byte after
+                self.checksum_errors += 1
+                self._skip(1)
+                self.skipped_bytes += 1
+                continue
+            pm2_5 = (ring[(start + _PM2_5_OFFSET) & mask] << 8) | ring[(start + _PM2_5_OFFSET + 1) & mask]
+            self.frames += 1
+            self._skip(FRAME_SIZE)
+        return pm2_5
+
+
+    def _skip(self, count: int) -> None:
+        self._start = (self._start + count) & self._mask
+        self._count -= count
+
+
+    def report(self) -> str:
+        return (f'{self.frames} frames, {self.checksum_errors} checksum errors, {self.skipped_bytes} bytes skipped, '
+                f'{self.overflowed_bytes} overflowed, {self.bytes_received} bytes received')
+
+
+class AirSensorPM1006(AirSensor):
+    quantities = ('pm2_5',)
+
+    def __init__(self, uart = None, *, poll_period: float = None):
+        """
+        :param uart: Default board.UART(): the Feather's TX/RX pins
+        :param poll_period: None: listen only, something else asks the sensor (Vindriktning).  Seconds: ask the sensor
+                            this often
+        """
+        if uart is None:
+            uart = board.UART()
+        uart.baudrate = _BAUDRATE
+        uart.timeout = 0        # readinto() returns what has arrived, never waits for more
+        self._uart = uart
+        self.poll_period = poll_period
+        self._last_request = None
+        self.parser = PM1006Parser()
+        self._chunk = bytearray(32)     # UART reads land here, then go into the parser's ring
+        self._pm2_5 = None              # newest value not read() yet
+        self._received_at = 0.0
+        self._measurement = None
+
+
+    @classmethod
+    def from_settings(cls) -> 'AirSensorPM1006':
+        """For sensor_registry.  settings.toml `pm1006_poll_period = 20` to ask the sensor, listen only otherwise"""
+        return cls(poll_period = os.getenv('pm1006_poll_period') or None)
+
+
+    def _receive(self) -> None:
+        """Whatever the UART has, into the parser.  Doesn't wait"""
+        uart = self._uart
+        chunk = self._chunk
+        parser = self.parser
+        # bounded: a stuck line can't keep us in here
+        for _ in range(4):
+            if not uart.in_waiting:
+                break
+            count = uart.readinto(chunk)
+            if not count:
+                break
+            # parse each chunk: a partial frame (up to 19 bytes) plus a 32 byte chunk always fits the 64 byte ring
+            parser.feed(chunk, count)
+            pm2_5 = parser.parse()
+            if pm2_5 is not None:
+                self._pm2_5 = pm2_5
+                self._received_at = time.monotonic()
+
+
+    @property
+    def data_ready(self) -> bool:
+        self._receive()
+        return self._pm2_5 is not None
+
+    def read(self) -> Measurement:
+        """Newest PM2.5 value.  Call when data_ready is True"""
+        self._measurement = new_measurement(self._received_at, pm2_5 = self._pm2_5)
+        self._pm2_5 = None
+        return self._measurement
+
+    @property
+    def measurement(self) -> Measurement | None:
+        return self._measurement
+
+
+    async def sample(self) -> Measurement | None:
+        if self.poll_period:
+            now = time.monotonic()
+            if self._last_request is None or now - self._last_request >= self.poll_period:
+                self._last_request = now
+                self._uart.write(_REQUEST)      # 5 bytes, into the UART's transmit buffer
+        if not self.data_ready:
+            return None
+        return self.read()
+
+
+    def report(self) -> str:
+        return f'{self.name}: {self.parser.report()}'
@@ -0,0 +1,260 @@
+import os
+import struct
+
+'''
+Append-only log of readings on the CIRCUITPY flash drive.
+
+One record per completed interval (1 minute), 16 bytes:
+
+    uint32  time          epoch seconds (UTC) the interval ended
+    uint16  co2           ppm, interval mean
+    int16   temperature   0.01 °C, interval mean
+    uint16  humidity      0.01 %, interval mean
+    uint16  co2 min       ppm
+    uint16  co2 max       ppm
+    uint16  readings      number of readings averaged
+
+Flash wear: the flash is erased and written in 4 KB blocks, so writing one small record rewrites a whole block.  Records
+are collected in a RAM page of 4096 bytes (256 records, ~4 hours) and the page is written in one go, page aligned, when
+it is full.  In between, the partly full page is written in place every `flush_seconds` (default hourly), so a power
+cut loses at most that much.  Unused slots of a page are zero: time 0 marks the end of the data.
+
+Index: for each page, the time of its first record (4 bytes per page, in a separate .idx file).  A time range query
+binary searches the index by seeking, then reads only the pages it needs.  Records must be appended in time order.
+
+Size: `max_pages` pages (default 64, 256 KB, ~11 days).  When full, the files are renamed to .old (replacing the
+previous .old) and a new log is started, so the log always covers between max_pages and 2 * max_pages pages.
+
+Writing needs the drive to be writable by code, see boot.py.  open() returns False if it isn't.
+
+usage:
+    log = ReadingLog('/log')
+    if log.open():
+        log.append(time, co2, temperature_c, humidity, co2_min, co2_max, readings)
+        for record in log.records(start=time - 3600):       # last hour
+            ...
+'''
+
+RECORD_FORMAT = '<IHhHHHH'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+PAGE_SIZE = 4096
+RECORDS_PER_PAGE = PAGE_SIZE // RECORD_SIZE
+_INDEX_FORMAT = '<I'
+_INDEX_SIZE = struct.calcsize(_INDEX_FORMAT)
+_EROFS = 30     # errno when CIRCUITPY is read-only for code
+
+
+def _file_size(path: str) -> int:
+    """Size in bytes, 0 if the file doesn't exist.  CircuitPython has no os.path"""
+    try:
+        return os.stat(path)[6]
+    except OSError:
+        return 0
+
+
+def _clamp(value: int, low: int, high: int) -> int:
+    return min(max(value, low), high)
+
+
+class ReadingLog:
+
+    def __init__(self, directory: str = '/log', *, max_pages: int = 64, flush_seconds: float = 3600):
+        """
+        :param directory: Created if missing.  Holds readings.bin/.idx and the rotated readings.old.bin/.idx
+        :param max_pages: Pages (256 records each) per file before rotating
+        :param flush_seconds: Partly full page is written at most this long after its first unwritten record
+        """
+        self.directory = directory
+        self.max_pages = max_pages
+        self.flush_seconds = flush_seconds
+        self._data_path = f'{directory}/readings.bin'
+        self._index_path = f'{directory}/readings.idx'
+        self._old_data_path = f'{directory}/readings.old.bin'
+        self._old_index_path = f'{directory}/readings.old.idx'
+
+        self._page = bytearray(PAGE_SIZE)
+        self._page_number = 0       # page of the file that _page holds
+        self._page_count = 0        # records in _page
+        self._unwritten_since = None  # time of first record not yet on flash
+        self.is_open = False
+
+        # stats
+        self.appended = 0
+        self.page_writes = 0        # full and partial page writes, each one rewrites one flash block
+        self.index_writes = 0
+        self.bytes_written = 0
+        self.reads = 0
+        self.bytes_read = 0
+
+
+    def open(self) -> bool:
+        """Pick up where the log on flash left off.  Returns False (log stays closed) if the drive isn't writable."""
+        try:
+            try:
+                os.mkdir(self.directory)
+            except OSError as ex:
+                if ex.errno == _EROFS:
+                    raise
+                # EEXIST
+            # writable?  Opening for append doesn't change an existing file
+            with open(self._index_path, 'ab'):
+                pass
+        except OSError as ex:
+            if ex.errno != _EROFS:
+                raise
+            print(f'reading log: {self.directory} is read-only, not logging (see boot.py)')
+            return False
+
+        pages = _file_size(self._data_path) // PAGE_SIZE
+        if pages:
+            # last page may be partly full, continue filling it
+            self._page_number = pages - 1
+            with open(self._data_path, 'rb') as f:
+                f.seek(self._page_number * PAGE_SIZE)
+                f.readinto(self._page)
+            self._page_count = RECORDS_PER_PAGE
+            for slot in range(RECORDS_PER_PAGE):
+                if not struct.unpack_from('<I', self._page, slot * RECORD_SIZE)[0]:
+                    self._page_count = slot
+                    break
+            if self._page_count == RECORDS_PER_PAGE:
+                self._next_page()
+        self.is_open = True
+        return True
+
+
+    def append(self, timestamp: int, co2: int | float, temperature_c: float, humidity: float,
+               co2_min: int | float = None, co2_max: int | float = None, readings: int = 1) -> None:
+        """Add a record.  Goes to flash when its page fills up, or at the next flush.
+
+        :param timestamp: Epoch seconds.  Not before the previous record
+        """
+        if not self.is_open:
+            return
+        co2 = round(co2)
+        struct.pack_into(RECORD_FORMAT, self._page, self._page_count * RECORD_SIZE,
+                         int(timestamp),
+                         _clamp(co2, 0, 0xFFFF),
+                         _clamp(round(temperature_c * 100), -0x8000, 0x7FFF),
+                         _clamp(round(humidity * 100), 0, 0xFFFF),
+                         _clamp(round(co2 if co2_min is None else co2_min), 0, 0xFFFF),
+                         _clamp(round(co2 if co2_max is None else co2_max), 0, 0xFFFF),
+                         _clamp(readings, 0, 0xFFFF))
+        self._page_count += 1
+        self.appended += 1
+        if self._unwritten_since is None:
+            self._unwritten_since = timestamp
+
+        if self._page_count == RECORDS_PER_PAGE:
+            self._write_page()
+            self._next_page()
+        elif timestamp - self._unwritten_since >= self.flush_seconds:
+            self._write_page()
+
+
+    def flush(self) -> None:
+        """Write the partly full page now, e.g. before a planned reset."""
+        if self.is_open and self._unwritten_since is not None:
+            self._write_page()
+
+
+    def _write_page(self) -> None:
+        offset = self._page_number * PAGE_SIZE
+        mode = 'r+b' if _file_size(self._data_path) > offset else 'ab'
+        with open(self._data_path, mode) as f:
+            if mode == 'r+b':
+                f.seek(offset)
+            f.write(self._page)
+        self.page_writes += 1
+        self.bytes_written += PAGE_SIZE
+        self._unwritten_since = None
+
+        # first write of this page: index gets the time of its first record
+        if _file_size(self._index_path) < (self._page_number + 1) * _INDEX_SIZE:
+            with open(self._index_path, 'ab') as f:
+                f.write(self._page[:_INDEX_SIZE])
+            self.index_writes += 1
+            self.bytes_written += _INDEX_SIZE
+
+
+    def _next_page(self) -> None:
+        self._page[:] = bytes(PAGE_SIZE)
+        self._page_count = 0
+        self._page_number += 1
+        if self._page_number < self.max_pages:
+            return
+        for path, old_path in ((self._data_path, self._old_data_path), (self._index_path, self._old_index_path)):
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass    # no old one yet
+            os.rename(path, old_path)
+        self._page_number = 0
+
+
+    # region reading
+    def records(self, start: int = 0, end: int = 0xFFFFFFFF):
+        """Records with start <= time < end, oldest first, as tuples:
+        (time, co2, temperature_c, humidity, co2_min, co2_max, readings)
+
+        Includes records still in the RAM page.
+        """
+        yield from self._file_records(self._old_data_path, self._old_index_path, start, end, None)
+        # not open (read-only drive): nothing in RAM, the whole file is on flash
+        yield from self._file_records(self._data_path, self._index_path, start, end,
+                                      self._page_number if self.is_open else None)
+        if self.is_open:
+            yield from self._page_records(self._page, self._page_count, start, end)
+
+    def _file_records(self, data_path: str, index_path: str, start: int, end: int, skip_page: int | None):
+        """Records from one data file.  skip_page: page that is in RAM (and maybe stale on flash)"""
+        pages = _file_size(index_path) // _INDEX_SIZE
+        if skip_page is not None:
+            pages = min(pages, skip_page)
+        if not pages:
+            return
+        page = bytearray(PAGE_SIZE)
+        with open(index_path, 'rb') as index, open(data_path, 'rb') as data:
+            first = self._find_page(index, pages, start)
+            for number in range(first, pages):
+                if self._read_index(index, number) >= end:
+                    return
+                data.seek(number * PAGE_SIZE)
+                data.readinto(page)
+                self.reads += 1
+                self.bytes_read += PAGE_SIZE
+                yield from self._page_records(page, RECORDS_PER_PAGE, start, end)
+
+    def _read_index(self, index, number: int) -> int:
+        index.seek(number * _INDEX_SIZE)
+        self.reads += 1
+        self.bytes_read += _INDEX_SIZE
+        return struct.unpack(_INDEX_FORMAT, index.read(_INDEX_SIZE))[0]
+
+    def _find_page(self, index, pages: int, start: int) -> int:
+        """Last page whose first record is at or before `start` (0 if none): binary search, log2(pages) seeks"""
+        low, high = 0, pages - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._read_index(index, middle) <= start:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    @staticmethod
+    def _page_records(page, count: int, start: int, end: int):
+        for slot in range(count):
+            record = struct.unpack_from(RECORD_FORMAT, page, slot * RECORD_SIZE)
+            timestamp = record[0]
+            if not timestamp or timestamp >= end:
+                return
+            if timestamp >= start:
+                yield (timestamp, record[1], record[2] / 100, record[3] / 100, record[4], record[5], record[6])
+    # endregion
+
+
+    def report(self) -> str:
+        return (f'reading log: {self.appended} records appended, {self.page_writes} page writes, '
+                f'{self.index_writes} index writes, {self.bytes_written} bytes written, '
+                f'{self.reads} reads ({self.bytes_read} bytes)')
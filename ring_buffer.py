@@ -0,0 +1,100 @@
+from array import array
+
+'''
+Fixed-size circular buffer on top of `array`.
+
+All the memory is allocated once, in the constructor.  Appending overwrites the oldest value in place, so a full
+buffer never allocates again - no list growing/shrinking, no heap fragmentation on the board.
+
+Reading is oldest -> newest.  Indexing, len() and iteration work on the buffer directly, nothing is copied.
+'''
+
+
+class RingBuffer:
+
+    def __init__(self, capacity: int, typecode: str = 'f'):
+        """
+        :param capacity: Max number of values kept.  When full, each append drops the oldest value.
+        :param typecode: `array` typecode of the values.  'f' (32-bit float) is plenty for sensor values.
+        """
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self._data = array(typecode, [0] * capacity)
+        self._capacity = capacity
+        self._start = 0     # index of the oldest value
+        self._count = 0
+        self.append_count = 0   # total values ever appended.  Lets a reader tell how many are new since last look
+
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def is_full(self) -> bool:
+        return self._count == self._capacity
+
+    @property
+    def latest(self):
+        """Most recently appended value.  IndexError if empty."""
+        return self[-1]
+
+
+    def append(self, value) -> None:
+        """Add newest value, O(1).  Overwrites the oldest value if full."""
+        self.append_count += 1
+        if self._count < self._capacity:
+            end = self._start + self._count
+            if end >= self._capacity:
+                end -= self._capacity
+            self._data[end] = value
+            self._count += 1
+        else:
+            self._data[self._start] = value
+            self._start += 1
+            if self._start == self._capacity:
+                self._start = 0
+
+    def clear(self) -> None:
+        """Forget all values.  Memory is kept."""
+        self._start = 0
+        self._count = 0
+        self.append_count = 0
+
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int):
+        """index 0 is oldest, -1 is newest"""
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError('ring buffer index out of range')
+        index += self._start
+        if index >= self._capacity:
+            index -= self._capacity
+        return self._data[index]
+
+    def __iter__(self):
+        """Oldest to newest, without copying."""
+        data = self._data
+        capacity = self._capacity
+        i = self._start
+        for _ in range(self._count):
+            yield data[i]
+            i += 1
+            if i == capacity:
+                i = 0
+
+    def segments(self) -> tuple:
+        """Contents as (older, newer) memoryviews into the buffer, oldest first.  Zero copy.
+
+        `newer` is empty unless the values wrap around the end of the array.
+        Views are only valid until the next append().
+        """
+        view = memoryview(self._data)
+        end = self._start + self._count
+        if end <= self._capacity:
+            return view[self._start:end], view[0:0]
+        return view[self._start:], view[:end - self._capacity]
@@ -0,0 +1,207 @@
+import math
+import time
+
+'''
+Picks the sensor's measurement mode from how fast the air is changing.
+
+FAST (a reading every 5 s) around the clock is mostly wasted: overnight CO2 moves a few ppm a minute.  But when
+someone cooks or opens a window, CO2 and humidity move tens of ppm / several % within minutes, and that is what the
+graphs are for.  So:
+
+    FAST    CO2 or humidity changing quickly          reading every 5 s
+    SLOW    changing a little                         reading every 30 s  (SCD4x low power periodic)
+    IDLE    stable                                    single shot every `sensor.single_shot_period` s, idle between
+
+Rate of change is estimated from the readings with exponential smoothing in time (Holt's method): a smoothed level,
+and a smoothed slope of that level, both with time constants in seconds, so they work the same at 5 s and at 60 s
+between readings.  The SCD4x CO2 reading is noisy (~10 ppm), the slope between two raw readings would be useless.
+A big jump away from the trend, in two readings in a row (window opened while in IDLE), counts as fast change
+right away.
+
+Hysteresis, so it doesn't thrash (each switch stops the sensor: 500 ms, plus a period until the next reading):
+    - going up (towards FAST) happens on the first reading over the threshold: no event is missed
+    - going down is one level at a time, only after the rates stayed below half of that level's threshold for
+      `fast_hold` (FAST -> SLOW) or `slow_hold` (SLOW -> IDLE) seconds
+
+NOTE: the sensor heats itself less in SLOW and IDLE than in FAST, so temperature (and with it humidity) reads a bit
+      different after a switch.  The first reading after a switch restarts the level instead of counting as change.
+
+Works with any sensor that has IDLE/SLOW/FAST in its MeasurementMode (AirSensorSCD4x).  Doesn't import one: the
+sensor driver is only imported if settings.toml lists it, see sensor_registry.py.
+
+usage:
+    sampler = SamplingController(sensor)
+    ...
+    measurement = await sensor.sample()
+    if measurement:
+        sampler.update(measurement)     # may switch sensor.measurement_mode
+'''
+
+_NAMES = ('idle', 'slow', 'fast')
+_IDLE, _SLOW, _FAST = 0, 1, 2
+
+
+class SamplingController:
+
+    def __init__(self, sensor, *, co2_slow: float = 6.0,
+                                  co2_fast: float = 20.0,
+                                  humidity_slow: float = 0.4,
+                                  humidity_fast: float = 1.2,
+                                  co2_step: float = 60.0,
+                                  humidity_step: float = 3.0,
+                                  fast_hold: float = 300,
+                                  slow_hold: float = 900,
+                                  level_time: float = 120,
+                                  rate_time: float = 300):
+        """
+        :param sensor: Its measurement_mode is set from here on.  Needs MeasurementMode.IDLE, SLOW and FAST
+        :param co2_slow: ppm per minute.  At or over it: at least SLOW
+        :param co2_fast: ppm per minute.  At or over it: FAST
+        :param humidity_slow: %rH per minute, like co2_slow
+        :param humidity_fast: %rH per minute, like co2_fast
+        :param co2_step: ppm between a reading and the trend that means FAST, if the next reading agrees
+        :param humidity_step: %rH, like co2_step
+        :param fast_hold: Seconds of calm before going from FAST down to SLOW
+        :param slow_hold: Seconds of calm before going from SLOW down to IDLE
+        :param level_time: Time constant of the smoothed level, seconds
+        :param rate_time: Time constant of the smoothed rate, seconds.  Longer is steadier but reacts later
+        """
+        self.sensor = sensor
+        modes = sensor.MeasurementMode
+        self._modes = (modes.IDLE, modes.SLOW, modes.FAST)
+        self.co2_thresholds = (co2_slow, co2_fast)
+        self.humidity_thresholds = (humidity_slow, humidity_fast)
+        self.co2_step = co2_step
+        self.humidity_step = humidity_step
+        self._holds = (0, slow_hold, fast_hold)     # per level, time to stay calm before leaving it
+        self.level_time = level_time
+        self.rate_time = rate_time
+
+        self._level = self._modes.index(sensor.measurement_mode) if sensor.measurement_mode in self._modes else _FAST
+        self._last_time = None
+        self._co2_level = 0.0
+        self._humidity_level = 0.0
+        self.co2_rate = 0.0             # ppm per minute, smoothed.  Signed
+        self.humidity_rate = 0.0        # %rH per minute, smoothed.  Signed
+        self._calm_since = None
+        self._reseed = True             # next reading starts the levels over
+        self._jump = 0                  # last reading's jump from the forecast: +-1 CO2, +-2 humidity, 0 none
+
+        # stats
+        self.switches = 0
+        self.failed_switches = 0        # sensor refused the mode change, tried again later
+        self.readings = [0, 0, 0]       # per level: IDLE, SLOW, FAST
+        self.seconds = [0.0, 0.0, 0.0]
+        self._level_since = time.monotonic()
+
+
+    @property
+    def mode_name(self) -> str:
+        return _NAMES[self._level]
+
+
+    def update(self, measurement) -> None:
+        """Feed a reading (a Measurement).  Switches sensor.measurement_mode if the rates call for it."""
+        if measurement.co2 is None:
+            return      # rht-only single shot, no CO2 to go by
+        self.readings[self._level] += 1
+        now = measurement.timestamp
+        step = self._track(now, measurement.co2, measurement.humidity)
+
+        wanted = self._wanted_level(1.0)
+        if step:
+            wanted = _FAST
+        if wanted > self._level:
+            self._calm_since = None
+            self._switch(wanted)
+            return
+        if self._level == _IDLE:
+            return
+
+        # going down: rates have to stay under half of this level's thresholds for the whole hold time
+        if self._wanted_level(0.5) >= self._level:
+            self._calm_since = None
+            return
+        if self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= self._holds[self._level]:
+            # still calm on the next reading if the sensor refused: it tries again then
+            if self._switch(self._level - 1):
+                self._calm_since = None
+
+
+    def _track(self, now: float, co2: float, humidity: float) -> bool:
+        """Update smoothed levels and rates.  Returns True if the readings jumped away from the trend."""
+        if self._reseed or self._last_time is None:
+            self._co2_level, self._humidity_level = co2, humidity
+            self._last_time = now
+            self._reseed = False
+            self._jump = 0
+            return False
+        dt = now - self._last_time
+        if dt <= 0:
+            return False
+        self._last_time = now
+        # where the trend says the level should be by now, the reading is compared to that
+        co2_forecast = self._co2_level + self.co2_rate * dt / 60
+        humidity_forecast = self._humidity_level + self.humidity_rate * dt / 60
+        # a jump has to show in two readings in a row: one noisy reading shouldn't mean FAST
+        jump = 0
+        if abs(co2 - co2_forecast) >= self.co2_step:
+            jump = 1 if co2 > co2_forecast else -1
+        elif abs(humidity - humidity_forecast) >= self.humidity_step:
+            jump = 2 if humidity > humidity_forecast else -2
+        step = jump != 0 and jump == self._jump
+        self._jump = jump
+
+        level_weight = 1 - math.exp(-dt / self.level_time)
+        rate_weight = 1 - math.exp(-dt / self.rate_time)
+        co2_level = co2_forecast + level_weight * (co2 - co2_forecast)
+        humidity_level = humidity_forecast + level_weight * (humidity - humidity_forecast)
+        # per minute
+        self.co2_rate += rate_weight * ((co2_level - self._co2_level) * 60 / dt - self.co2_rate)
+        self.humidity_rate += rate_weight * ((humidity_level - self._humidity_level) * 60 / dt - self.humidity_rate)
+        self._co2_level, self._humidity_level = co2_level, humidity_level
+        return step
+
+
+    def _wanted_level(self, scale: float) -> int:
+        """Level the current rates call for, with thresholds scaled by `scale`"""
+        co2_rate = abs(self.co2_rate)
+        humidity_rate = abs(self.humidity_rate)
+        for level in (_FAST, _SLOW):
+            if (co2_rate >= self.co2_thresholds[level - 1] * scale or
+                    humidity_rate >= self.humidity_thresholds[level - 1] * scale):
+                return level
+        return _IDLE
+
+
+    def _switch(self, level: int) -> bool:
+        """Sensor first, then this controller's level, so both agree.  Returns False if the sensor refused (busy:
+        the command was NACKed), nothing changes then and the next reading that still calls for it tries again.
+        """
+        try:
+            self.sensor.measurement_mode = self._modes[level]
+        except (OSError, RuntimeError) as ex:
+            self.failed_switches += 1
+            print(f'sampling: {_NAMES[self._level]} -> {_NAMES[level]} failed ({ex}), trying again next reading')
+            return False
+        now = time.monotonic()
+        self.seconds[self._level] += now - self._level_since
+        self._level_since = now
+        print(f'sampling: {_NAMES[self._level]} -> {_NAMES[level]} (CO2 {self.co2_rate:+.1f} ppm/min, '
+              f'humidity {self.humidity_rate:+.2f} %/min)')
+        self._level = level
+        self._reseed = True
+        self.switches += 1
+        return True
+
+
+    def report(self) -> str:
+        seconds = list(self.seconds)
+        seconds[self._level] += time.monotonic() - self._level_since
+        total = sum(seconds) or 1.0
+        shares = ', '.join(f'{_NAMES[level]} {100 * seconds[level] / total:.0f}% ({self.readings[level]} readings)'
+                           for level in (_FAST, _SLOW, _IDLE))
+        return (f'sampling {self.sensor.name}: {self.mode_name} now, {self.switches} switches '
+                f'({self.failed_switches} failed), {shares}')
@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+'''
+Small cooperative scheduler on top of asyncio.
+
+CircuitPython doesn't have `threading`, but it does have `asyncio`.  So instead of one big while-True loop
+that does everything in sequence, each job (buttons, sensor, display, dashboard, ...) gets its own task with its own
+period.  A slow job can no longer make the other jobs wait for a whole loop pass.
+
+NOTE: this is cooperative.  A job that blocks (e.g. a TLS publish inside adafruit_minimqtt) still blocks everybody
+      until it returns.  The time budget does not interrupt anything, it only makes those stalls visible so they
+      can be fixed.
+'''
+
+
+async def yield_to_other_tasks() -> None:
+    """Give the other tasks a chance to run in the middle of a long job.
+
+    A tiny sleep rather than sleep(0): CPython's asyncio resumes a sleep(0) task ahead of tasks whose timers have
+    already expired, so sleep(0) would not actually let the button task in.
+    """
+    await asyncio.sleep(0.001)
+
+
+class PeriodicTask:
+    """Runs an async callable every `period` seconds and keeps timing stats on it.
+
+    Periods are measured start-to-start.  If a run takes longer than the period, the missed runs are
+    skipped (we don't try to catch up with a burst of runs).
+    """
+
+    def __init__(self, name: str, action, period: float, budget: float = None):
+        """
+        :param name: Short name, used in reports.
+        :param action: `async def` function taking no arguments.
+        :param period: Seconds between the start of each run.  0 means run every pass of the event loop.
+        :param budget: Seconds a single run is allowed to take before it is counted as an overrun.
+                       Defaults to the period.
+        """
+        self.name = name
+        self._action = action
+        self.period = period
+        self.budget = budget if budget is not None else period
+
+        self.run_count = 0
+        self.overrun_count = 0
+        self.error_count = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+
+    async def run_forever(self, on_error=None, monitor=None) -> None:
+        """Task body.  Exceptions from the action are handed to `on_error(task, exception)`.
+
+        If there is no error handler, exception propagates and ends the task.
+        """
+        next_run = time.monotonic()
+        while True:
+            sample = monitor.start(self) if monitor is not None else None
+            start = time.monotonic()
+            try:
+                await self._action()
+            except Exception as ex:  # pylint: disable=broad-except
+                self.error_count += 1
+                if on_error is None:
+                    raise
+                on_error(self, ex)
+            duration = time.monotonic() - start
+            if monitor is not None:
+                monitor.end(self, sample)
+            self._record(duration)
+
+            next_run += self.period
+            now = time.monotonic()
+            if next_run < now:
+                # we fell behind. Don't burst through the missed runs, just start over from now
+                next_run = now
+            # always yield, even with a 0 period, otherwise this task would starve the others
+            await asyncio.sleep(next_run - now)
+
+
+    def _record(self, duration: float) -> None:
+        self.run_count += 1
+        self.last_duration = duration
+        self.total_duration += duration
+        if duration > self.max_duration:
+            self.max_duration = duration
+        if duration > self.budget:
+            self.overrun_count += 1
+
+
+    @property
+    def mean_duration(self) -> float:
+        if self.run_count == 0:
+            return 0.0
+        return self.total_duration / self.run_count
+
+
+    def reset_stats(self) -> None:
+        self.run_count = 0
+        self.overrun_count = 0
+        self.error_count = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+
+
+class TaskScheduler:
+    """Holds the PeriodicTasks and runs them on the asyncio event loop.
+
+    usage:
+        scheduler = TaskScheduler(on_error=handle_error)
+        scheduler.add('buttons', poll_buttons, period=0.01)
+        scheduler.add('sensor',  read_sensor,  period=1.0)
+        asyncio.run(scheduler.run())
+    """
+
+    def __init__(self, on_error=None, monitor=None):
+        """
+        :param on_error: Called as `on_error(task, exception)` when a task raises.  If None, first exception ends the
+                         scheduler.
+        :param monitor: Told about every run: `sample = monitor.start(task)` before, `monitor.end(task, sample)`
+                        after.  E.g. HeapMonitor, for what each task allocates.  Not timed as part of the run.
+        """
+        self._tasks: list[PeriodicTask] = []
+        self._on_error = on_error
+        self._monitor = monitor
+
+
+    def add(self, name: str, action, period: float, budget: float = None) -> PeriodicTask:
+        """Register an `async def` action to be called every `period` seconds.  Returns the PeriodicTask so caller
+        can look at its stats.
+        """
+        task = PeriodicTask(name, action, period, budget)
+        self._tasks.append(task)
+        return task
+
+
+    @property
+    def tasks(self) -> list[PeriodicTask]:
+        return self._tasks
+
+
+    def get(self, name: str) -> PeriodicTask:
+        for task in self._tasks:
+            if task.name == name:
+                return task
+        raise KeyError(name)
+
+
+    async def run(self) -> None:
+        """Run all the tasks.  Does not return unless a task ends with an unhandled exception."""
+        await asyncio.gather(*[asyncio.create_task(task.run_forever(self._on_error, self._monitor))
+                               for task in self._tasks])
+
+
+    def report(self) -> str:
+        """Timing table, one line per task.  Durations in milliseconds."""
+        lines = [f'{"task":<12} {"runs":>7} {"mean":>8} {"max":>8} {"budget":>8} {"over":>5} {"err":>4}']
+        for t in self._tasks:
+            lines.append(f'{t.name:<12} {t.run_count:>7} {t.mean_duration * 1000:>8.2f} {t.max_duration * 1000:>8.2f} '
+                         f'{t.budget * 1000:>8.1f} {t.overrun_count:>5} {t.error_count:>4}')
+        return '\n'.join(lines)
@@ -0,0 +1,146 @@
+from bitmaptools import fill_region
+import displayio
+import assets
+
+'''
+Big numeric readouts as seven-segment style digits.
+
+bitmap_label.Label lays out glyphs and rebuilds its bitmap from the BDF font on every `.text` change.  Scaling a label
+up (scale=2) makes it jaggy too.  SegmentLabel instead draws every character it can show once, at the exact pixel
+size wanted, into a sprite sheet.  The readout is a TileGrid with one tile per character, so changing the text only
+changes tile indices - one small write per character that actually changed, no pixel drawing at all.
+
+Sprite sheets are shared (through assets.py) between all labels of the same glyph size.  Color is per label.
+
+Characters: 0-9, '-', '°', '%', 'F', 'C' and space.  Anything else shows as a space.  Text that doesn't fit shows as
+all dashes: cutting digits off would show a wrong number that looks right (12345 ppm as 2345).
+'''
+
+GLYPHS = ' 0123456789-°%FC'
+
+# segments lit for each character.  Usual naming: a top, b upper right, c lower right, d bottom, e lower left,
+# f upper left, g middle
+_SEGMENTS = {
+    '0': 'abcdef', '1': 'bc', '2': 'abdeg', '3': 'abcdg', '4': 'bcfg',
+    '5': 'acdfg', '6': 'acdefg', '7': 'abc', '8': 'abcdefg', '9': 'abcdfg',
+    '-': 'g', 'F': 'aefg', 'C': 'adef',
+}
+
+
+def draw_glyphs(glyph_width: int, glyph_height: int) -> displayio.Bitmap:
+    """Sprite sheet with every character in GLYPHS, in that order, one glyph_width x glyph_height tile each.
+    Pixels are 0 (background) or 1 (lit).  The right part of each tile is left blank as spacing between characters.
+    """
+    sheet = displayio.Bitmap(glyph_width * len(GLYPHS), glyph_height, 2)
+    width = glyph_width - max(2, glyph_width // 8)     # drawn part, rest is spacing
+    thickness = max(2, (width + 3) // 5)
+    gap = 1 if thickness >= 5 else 0                    # little gap between segments on big glyphs, for the segment look
+    middle = glyph_height // 2
+    half = thickness // 2
+
+    # segment -> (x1, y1, x2, y2) inside a tile.  ends exclusive, like fill_region
+    boxes = {
+        'a': (thickness + gap, 0, width - thickness - gap, thickness),
+        'b': (width - thickness, thickness + gap, width, middle - gap),
+        'c': (width - thickness, middle + gap, width, glyph_height - thickness - gap),
+        'd': (thickness + gap, glyph_height - thickness, width - thickness - gap, glyph_height),
+        'e': (0, middle + gap, thickness, glyph_height - thickness - gap),
+        'f': (0, thickness + gap, thickness, middle - gap),
+        'g': (thickness + gap, middle - half, width - thickness - gap, middle - half + thickness),
+    }
+
+    for index, character in enumerate(GLYPHS):
+        left = index * glyph_width
+        if character == '%':
+            _draw_percent(sheet, left, width, glyph_height, thickness)
+            continue
+        if character == '°':
+            # small ring, top left.  The seven-segment one (abfg) is as wide as a digit and reads as an 'o'
+            _draw_ring(sheet, left, 0, max(4, width // 2), max(1, thickness * 2 // 3))
+            continue
+        for segment in _SEGMENTS.get(character, ''):
+            x1, y1, x2, y2 = boxes[segment]
+            fill_region(sheet, left + x1, y1, left + x2, y2, 1)
+    return sheet
+
+
+def _draw_ring(sheet: displayio.Bitmap, x: int, y: int, size: int, line: int) -> None:
+    """Hollow square, size x size, top left corner at x,y"""
+    fill_region(sheet, x, y, x + size, y + size, 1)
+    fill_region(sheet, x + line, y + line, x + size - line, y + size - line, 0)
+
+
+def _draw_percent(sheet: displayio.Bitmap, left: int, width: int, height: int, thickness: int) -> None:
+    """No seven-segment '%', so: small ring top left, small ring bottom right, slash between"""
+    box = max(4, width * 2 // 5)
+    line = max(1, thickness * 2 // 3)
+    _draw_ring(sheet, left, 0, box, line)
+    _draw_ring(sheet, left + width - box, height - box, box, line)
+    # slash, bottom left to top right, one row at a time
+    for row in range(height):
+        center = left + (width - 1) * (height - 1 - row) // (height - 1)
+        fill_region(sheet, max(left, center - line // 2), row, min(left + width, center - line // 2 + line), row + 1, 1)
+
+
+class SegmentLabel(displayio.Group):
+    """Fixed-width numeric readout.  Use like a bitmap_label.Label: set `.text`.
+
+    Text is right aligned, like f'{value: >4}'.  Text longer than `length` shows as `length` dashes.
+    """
+
+    def __init__(self, *, glyph_width: int, glyph_height: int, length: int, text: str = '', color: int = 0xFFFFFF,
+                 anchor_point: tuple = (0.0, 0.0), anchored_position: tuple = (0, 0)):
+        """
+        :param glyph_width: Pixels per character, including spacing to the next character
+        :param glyph_height: Pixels
+        :param length: Number of characters shown
+        :param anchor_point: Same as Label: (0.0, 0.0) top left ... (1.0, 1.0) bottom right of the readout
+        :param anchored_position: Where on screen the anchor point goes
+        """
+        width = glyph_width * length
+        super().__init__(x=int(anchored_position[0] - anchor_point[0] * width),
+                         y=int(anchored_position[1] - anchor_point[1] * glyph_height))
+
+        sheet = assets.generated(f'digits {glyph_width}x{glyph_height}',
+                                 lambda: draw_glyphs(glyph_width, glyph_height))
+        self._palette = displayio.Palette(2)
+        self._palette[0] = 0x000000
+        self._palette.make_transparent(0)
+        self._palette[1] = color
+        self._grid = displayio.TileGrid(sheet, pixel_shader=self._palette,
+                                        width=length, height=1,
+                                        tile_width=glyph_width, tile_height=glyph_height,
+                                        default_tile=0)
+        self.append(self._grid)
+        self._length = length
+        self._text = ''
+        self.index_writes = 0     # tile indices actually changed, over the life of the label
+        self.text = text
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+        length = self._length
+        if len(value) > length:
+            value = '-' * length
+        padding = length - len(value)
+        grid = self._grid
+        for i in range(length):
+            tile = GLYPHS.find(value[i - padding]) if i >= padding else 0
+            if tile < 0:
+                tile = 0
+            if grid[i] != tile:
+                grid[i] = tile
+                self.index_writes += 1
+
+    @property
+    def color(self) -> int:
+        return self._palette[1]
+
+    @color.setter
+    def color(self, value: int) -> None:
+        self._palette[1] = value
@@ -0,0 +1,117 @@
+from collections import namedtuple
+import os
+
+'''
+Sensor drivers behind one interface, loaded from settings.toml.
+
+    sensors = "scd4x"                       # default if not set
+    sensors = "scd4x, pm1006"
+    sensors = "scd4x, my_voc:VocSensor"     # module:class, for a driver that isn't in DRIVERS
+
+Only the modules of the listed drivers are imported.  A driver module pulls in its Adafruit library and its class
+bytecode, on this board that is RAM for good: a board with just an SCD4x doesn't import (or pay for) anything else.
+So a driver module must only import this module and its own hardware library, never another driver.
+
+Every driver produces the same stream: Measurement tuples, with None for the quantities it doesn't measure.  code.py
+runs one task per sensor, `await sensor.sample()` once a second, and handles whatever comes back the same way.  A new
+sensor is a new driver module (subclass AirSensor) and a line in settings.toml, code.py doesn't change.
+
+usage:
+    sensors = load_sensors()
+    ...
+    measurement = await sensors[0].sample()     # None if there's no new reading yet
+'''
+
+
+# One reading: time.monotonic() when it was read, CO2 ppm, °C, %rH, PM2.5 µg/m³.  None for what a sensor doesn't
+# measure.  A tuple, so a snapshot can't change under a task that holds on to it.  No per-instance dict either (on
+# CPython, namedtuple classes have __slots__ = ())
+Measurement = namedtuple('Measurement', ('timestamp', 'co2', 'temperature_c', 'humidity', 'pm2_5'))
+
+
+def new_measurement(timestamp: float, *, co2: int = None, temperature_c: float = None, humidity: float = None,
+                    pm2_5: int = None) -> Measurement:
+    """Measurement with only what a sensor measures filled in.  CircuitPython's namedtuple has no defaults"""
+    return Measurement(timestamp, co2, temperature_c, humidity, pm2_5)
+
+
+class AirSensor:
+    """What code.py uses of a sensor.  Drivers subclass this.
+
+    A driver needs data_ready and read().  sample() does for sensors that measure on their own; a sensor that has to
+    be told to measure overrides it.
+    """
+    name = ''           # as listed in settings.toml `sensors`, set by load_sensors()
+    quantities = ()     # Measurement fields this driver fills in, e.g. ('co2', 'temperature_c', 'humidity')
+
+    @classmethod
+    def from_settings(cls) -> 'AirSensor':
+        """Driver as configured in settings.toml (os.getenv).  Override for drivers that take settings"""
+        return cls()
+
+    @property
+    def data_ready(self) -> bool:
+        """True if there is a reading that read() hasn't returned yet.  Must not block"""
+        raise NotImplementedError
+
+    def read(self) -> Measurement:
+        """Latest reading.  Call when data_ready is True"""
+        raise NotImplementedError
+
+    @property
+    def measurement(self) -> Measurement | None:
+        """Last read() result, None before the first one"""
+        return None
+
+    async def sample(self) -> Measurement | None:
+        """New reading, or None if there is none yet.  code.py's sensor task calls this once a second"""
+        if not self.data_ready:
+            return None
+        return self.read()
+
+    def report(self) -> str:
+        return f'{self.name}: {", ".join(self.quantities)}'
+
+
+# driver name, as listed in settings.toml `sensors` -> (module, class)
+DRIVERS = {
+    'scd4x': ('air_quality_sensors', 'AirSensorSCD4x'),
+    'pm1006': ('pm1006', 'AirSensorPM1006'),
+}
+
+
+def register(name: str, module: str, class_name: str) -> None:
+    """Make a driver available under `name`.  Its module is imported only if settings.toml lists it"""
+    DRIVERS[name] = (module, class_name)
+
+
+def load_driver(name: str) -> type:
+    """Import the driver's module and return its class.  `name` is a DRIVERS key or "module:Class" """
+    if ':' in name:
+        module_name, class_name = name.split(':', 1)
+    elif name in DRIVERS:
+        module_name, class_name = DRIVERS[name]
+    else:
+        raise ValueError(f'unknown sensor driver "{name}", known: {", ".join(DRIVERS)}')
+    # no importlib in CircuitPython.  Modules are flat in CIRCUITPY/, so __import__ returns the module itself
+    module = __import__(module_name)
+    return getattr(module, class_name)
+
+
+def load_sensors(names: str = None) -> list:
+    """Create the sensors listed in `names`, default settings.toml `sensors`, "scd4x" if that isn't set.
+
+    Comma separated.  A driver that fails to start (sensor not plugged in) raises, like creating it directly would.
+    """
+    names = names or os.getenv('sensors') or 'scd4x'
+    sensors = []
+    for name in names.split(','):
+        name = name.strip()
+        if not name:
+            continue
+        sensor = load_driver(name).from_settings()
+        sensor.name = name
+        sensors.append(sensor)
+    if not sensors:
+        raise ValueError('no sensors configured')
+    return sensors
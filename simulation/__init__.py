@@ -0,0 +1,110 @@
+"""Host-side stand-ins for the CircuitPython hardware modules.
+
+This package is NOT copied to the board.  It lets the bot modules be imported and timed on plain CPython (3.11+),
+which is much easier than print-debugging over serial.
+
+usage (from a script in this folder, or anything with the repo root on sys.path):
+
+    import simulation
+    simulation.install()     # registers fake `board`, `digitalio`, ... in sys.modules
+    import scheduler         # bot modules can be imported now
+
+To run the whole bot (code.py) against a simulated sensor, broker and clock, see simulation/sim.py and
+simulation/run_code.py.
+
+Things to know:
+- The repo has its own `enum.py` hack (CircuitPython has no enum).  It shadows the CPython stdlib `enum`, which
+  breaks `re`, `json`, `asyncio`, ...   `install()` hooks imports so that only modules living in the repo root get
+  the hack, everything else keeps the stdlib one.  Same trick for `ssl`: bot modules get the fake one.
+- Only the hardware-bound modules are faked here.  Pure-python Adafruit libraries used by the bot can be pip
+  installed on host (see README, "Running on a PC").
+"""
+import builtins
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# stdlib `enum` has to be in sys.modules before the repo root shows up on sys.path.  If we were started from the repo
+# root (python -m simulation.xxx), repo root is already sys.path[0], so take it out while stdlib loads.
+_repo_paths = [p for p in sys.path if os.path.abspath(p or os.curdir) == REPO_ROOT]
+for _p in _repo_paths:
+    sys.path.remove(_p)
+try:
+    # anything stdlib that imports enum, and that the bot or simulation needs, should be imported here
+    import asyncio
+    import csv
+    import enum
+    import importlib.util
+    import json
+    import re
+    import selectors
+    import ssl
+    import traceback
+finally:
+    # at the end, so a stray `import enum` from outside the repo still finds stdlib first
+    sys.path.extend(p for p in _repo_paths if p not in sys.path)
+
+from simulation.fakes import board, digitalio, microcontroller, micropython, neopixel, socketpool, supervisor, wifi
+from simulation.fakes import ssl as fake_ssl
+
+# module name -> fake module.  These names don't exist on CPython, so they can go straight into sys.modules
+FAKE_MODULES = {
+    'board': board,
+    'digitalio': digitalio,
+    'microcontroller': microcontroller,
+    'micropython': micropython,
+    'neopixel': neopixel,
+    'socketpool': socketpool,
+    'supervisor': supervisor,
+    'wifi': wifi,
+}
+
+# only needed for the graphs (circuitpython_uplot), so numpy is optional for scripts that don't draw them
+try:
+    from simulation.fakes import ulab
+    FAKE_MODULES['ulab'] = ulab
+    FAKE_MODULES['ulab.numpy'] = ulab.numpy
+except ImportError:
+    pass
+
+# module name -> module, only for `import` statements in files in the repo root.  Filled in by install()
+REPO_ONLY_MODULES = {}
+
+_real_import = builtins.__import__
+
+
+def _is_repo_module(module_globals) -> bool:
+    if not module_globals:
+        return False
+    path = module_globals.get('__file__')
+    return bool(path) and os.path.dirname(os.path.abspath(path)) == REPO_ROOT
+
+
+def _import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in REPO_ONLY_MODULES and _is_repo_module(globals):
+        return REPO_ONLY_MODULES[name]
+    return _real_import(name, globals, locals, fromlist, level)
+
+
+def _load_repo_enum():
+    spec = importlib.util.spec_from_file_location('_repo_enum', os.path.join(REPO_ROOT, 'enum.py'))
+    repo_enum = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(repo_enum)
+    return repo_enum
+
+
+def install() -> None:
+    """Register the fake hardware modules and put the repo root on sys.path.
+
+    Safe to call more than once.
+    """
+    sys.modules.update(FAKE_MODULES)
+
+    if REPO_ROOT not in sys.path:
+        sys.path.append(REPO_ROOT)
+
+    if not REPO_ONLY_MODULES:
+        REPO_ONLY_MODULES['enum'] = _load_repo_enum()
+        REPO_ONLY_MODULES['ssl'] = fake_ssl
+    builtins.__import__ = _import
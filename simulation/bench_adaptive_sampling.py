@@ -0,0 +1,112 @@
+"""Adaptive sampling (sampling_controller.py) against the sensor in FAST all day: sensor work and what the graphs lose.
+
+    python simulation/bench_adaptive_sampling.py                        # kitchen, daily_home, car_camping
+    python simulation/bench_adaptive_sampling.py --scenario kitchen --hours 24
+
+Runs the whole bot (code.py) on the simulated SCD41 for each scenario, once with `adaptive_sampling = 0` (FAST
+throughout) and once adaptive, each in its own process.  The sensor's supply current is estimated from the time spent
+in each mode with the SCD41 datasheet typicals at 3.3 V: periodic 15 mA, low power periodic 3.2 mA, idle 0.2 mA,
+plus ~75 mA*s per single shot.  The error is of the logged one-minute CO2 averages against the noise-free trace,
+split into event minutes (CO2 moving 10 ppm/min or more, or humidity 0.5 %/min) and calm ones.
+"""
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation import traces
+from simulation.sim import Simulation
+
+# mA, SCD41 datasheet typicals at 3.3 V
+CURRENT_PERIODIC = 15.0
+CURRENT_LOW_POWER = 3.2
+CURRENT_IDLE = 0.2
+SINGLE_SHOT_CHARGE = 75.0      # mA*s over idle
+SCENARIOS = ('kitchen', 'daily_home', 'car_camping')
+
+
+def interval_truth(trace, start: float, end: float) -> tuple:
+    """Mean noise-free CO2 over [start, end], and how fast CO2 / humidity were moving (per minute)"""
+    steps = max(2, int(end - start) // 5)
+    samples = [trace._interpolate(start + (end - start) * i / (steps - 1)) for i in range(steps)]
+    co2 = sum(s[0] for s in samples) / steps
+    minutes = max(end - start, 1) / 60
+    return (co2, abs(samples[-1][0] - samples[0][0]) / minutes, abs(samples[-1][2] - samples[0][2]) / minutes)
+
+
+def run(scenario: str, hours: float, adaptive: bool) -> dict:
+    sim = Simulation(trace=traces.SCENARIOS[scenario](), duration=hours * 3600, period_floor=0.25,
+                     settings={'adaptive_sampling': int(adaptive)})
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        bot = sim.run_file('code.py')
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    truth = traces.SCENARIOS[scenario]()
+    epoch_offset = bot['io'].server_time(0)
+    errors = {'event': [], 'calm': []}
+    previous = None
+    for record in bot['reading_log'].records():
+        end = record[0] - epoch_offset
+        if previous is not None:
+            co2, co2_rate, humidity_rate = interval_truth(truth, previous, end)
+            kind = 'event' if co2_rate >= 10 or humidity_rate >= 0.5 else 'calm'
+            errors[kind].append(record[1] - co2)
+        previous = end
+
+    sampler = bot['samplers'].get('scd4x')
+    seconds = [0.0, 0.0, hours * 3600]      # idle, slow, fast
+    shots = 0
+    if sampler:
+        seconds = list(sampler.seconds)
+        seconds[sampler._level] += hours * 3600 - sum(seconds)
+        shots = sampler.readings[0]
+    charge = (seconds[0] * CURRENT_IDLE + shots * SINGLE_SHOT_CHARGE + seconds[1] * CURRENT_LOW_POWER
+              + seconds[2] * CURRENT_PERIODIC)
+    return {
+        'transactions': sim.i2c.transactions,
+        'measurements': sim.sensor.measurements_taken,
+        'current_ma': charge / (hours * 3600),
+        'share': [100 * s / (hours * 3600) for s in seconds],
+        'switches': sampler.switches if sampler else 0,
+        'rms': {kind: math.sqrt(sum(e * e for e in values) / len(values)) if values else 0.0
+                for kind, values in errors.items()},
+        'minutes': {kind: len(values) for kind, values in errors.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', choices=sorted(traces.SCENARIOS))
+    parser.add_argument('--hours', type=float, default=24)
+    parser.add_argument('--case', choices=('fast', 'adaptive'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case:
+        print(json.dumps(run(args.scenario, args.hours, args.case == 'adaptive')))
+        return
+
+    print(f'{args.hours:g} h of code.py on a simulated SCD41, per scenario: FAST all day against adaptive')
+    print(f'{"":22} {"I2C":>7} {"sensor":>7} {"est.":>7} {"fast/slow/idle":>15} {"switches":>9} '
+          f'{"CO2 RMS error, ppm":>21}')
+    print(f'{"":22} {"trans.":>7} {"meas.":>7} {"mA":>7} {"% of time":>15} {"":>9} {"event":>10} {"calm":>10}')
+    for scenario in ([args.scenario] if args.scenario else SCENARIOS):
+        for case in ('fast', 'adaptive'):
+            # one Simulation per process
+            output = subprocess.run([sys.executable, __file__, '--scenario', scenario, '--hours', str(args.hours),
+                                     '--case', case], check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            share = '/'.join(f'{s:.0f}' for s in reversed(result['share']))
+            print(f'{scenario + " " + case:22} {result["transactions"]:>7} {result["measurements"]:>7} '
+                  f'{result["current_ma"]:>7.2f} {share:>15} {result["switches"]:>9} '
+                  f'{result["rms"]["event"]:>10.1f} {result["rms"]["calm"]:>10.1f}')
+        print(f'{"":22} ({result["minutes"]["event"]} event minutes, {result["minutes"]["calm"]} calm)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Boot cost of the screen (BotScreen), with and without sharing fonts and sprite sheets (assets.py).
+
+    python simulation/bench_assets.py
+
+Builds BotScreen on Blinka's displayio twice: once the normal way, once with the asset cache disabled (every display
+loads its own copy, like before assets.py).  Prints the per-asset report and total build time and RAM for each.
+
+RAM is measured with tracemalloc (simulation/heap.py), so it is CPython bytes: bigger than on the board, but the
+ratio is what matters.  Same for time: host file reads and python are faster than the board's flash and interpreter.
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+simulation.install()
+from simulation import heap
+from simulation.fakes.framebuffer import FramebufferDisplay
+
+import displayio
+if hasattr(displayio, '_stop_background'):
+    displayio._stop_background()
+if not hasattr(displayio, 'Display'):
+    displayio.Display = FramebufferDisplay
+os.chdir(simulation.REPO_ROOT)   # fonts are loaded from relative paths
+
+import gc
+import assets
+from bot_screen import BotScreen
+
+
+class NoSharing(dict):
+    """Stand-in for assets._cache that never remembers anything, so every request loads the file again"""
+
+    def __init__(self):
+        super().__init__()
+        self.loads = {}
+
+    def __setitem__(self, path, asset) -> None:
+        self.loads[path] = self.loads.get(path, 0) + 1
+
+
+def build() -> tuple:
+    gc.collect()
+    heap_before = gc.mem_alloc()
+    start = time.perf_counter()
+    screen = BotScreen()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    return screen, seconds, gc.mem_alloc() - heap_before
+
+
+def main() -> None:
+    heap.install()
+
+    # not shared.  Keep the screen alive so its RAM is still counted
+    assets._cache = NoSharing()
+    screen_unshared, unshared_seconds, unshared_ram = build()
+    loads = assets._cache.loads
+    del screen_unshared
+    gc.collect()
+
+    assets._cache = {}
+    _, shared_seconds, shared_ram = build()
+
+    print('shared assets (BotScreen):\n')
+    assets.report()
+    print(f'\nasset loads without sharing: {sum(loads.values())}, with sharing: {len(assets._cache)}')
+    print('\nBotScreen()        build ms   RAM bytes')
+    print(f'without sharing  {unshared_seconds * 1000:9.0f}  {unshared_ram:10,}')
+    print(f'with sharing     {shared_seconds * 1000:9.0f}  {shared_ram:10,}')
+    heap.uninstall()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Boot time of code.py, per import, asset load and display group (boot_profiler.py), and how it compares to before.
+
+    python simulation/bench_boot.py --save boot.json          # before a change
+    python simulation/bench_boot.py --compare boot.json       # after: what got slower or faster
+
+Each run boots the bot in a fresh process (nothing imported yet, like after a reset) with host CPU time counted on
+the virtual clock, then stops a few simulated seconds in.  Self times are the median of --runs boots, host CPU is
+noisy.  They are CPython times: the board is many times slower, and flash reads much more so, but what is slow here
+is slow there.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# changes smaller than this are noise
+THRESHOLD_MS = 2.0
+THRESHOLD_RATIO = 0.2
+
+
+def boot(sensors: str) -> dict:
+    """One boot.  Stage and entry self times in ms"""
+    from simulation.sim import Simulation
+    sim = Simulation(duration=5, cpu_scale=1.0, settings={'sensors': sensors})
+    with contextlib.redirect_stdout(io.StringIO()):
+        bot = sim.run_file('code.py')
+    profiler = bot['boot_profiler']
+    return {
+        'boot': profiler.boot_seconds * 1000,
+        'entries': [[kind, name, self_ns / 1e6] for kind, name, _, self_ns in profiler.entries],
+    }
+
+
+def median(values: list) -> float:
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def collect(runs: int, sensors: str) -> dict:
+    """(kind, name) -> median self ms, over `runs` boots.  'stage' entries included, and ('total', 'boot')"""
+    samples = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, '--one', '--sensors', sensors], check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.setdefault('total\tboot', []).append(result['boot'])
+        seen = {}
+        for kind, name, ms in result['entries']:
+            # the same name twice in one boot (not expected, but cheap to handle): add them up
+            key = f'{kind}\t{name}'
+            seen[key] = seen.get(key, 0.0) + ms
+        for key, ms in seen.items():
+            samples.setdefault(key, []).append(ms)
+    return {key: median(values + [0.0] * (runs - len(values))) for key, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--sensors', default='scd4x', help='settings.toml `sensors`')
+    parser.add_argument('--limit', type=int, default=25, help='entries shown')
+    parser.add_argument('--save', metavar='FILE', help='write the medians, for --compare later')
+    parser.add_argument('--compare', metavar='FILE', help='medians saved with --save')
+    parser.add_argument('--one', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.one:
+        print(json.dumps(boot(args.sensors)))
+        return
+
+    medians = collect(args.runs, args.sensors)
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    def row(key: str) -> str:
+        kind, name = key.split('\t')
+        line = f'{kind:<8} {name:<52} {medians.get(key, 0.0):9.1f}'
+        if baseline:
+            before = baseline.get(key, 0.0)
+            change = medians.get(key, 0.0) - before
+            flag = ''
+            if abs(change) >= THRESHOLD_MS and abs(change) >= THRESHOLD_RATIO * before:
+                flag = '  slower' if change > 0 else '  faster'
+            line += f' {before:9.1f} {change:+9.1f}{flag}'
+        return line
+
+    header = f'{"kind":<8} {"name":<52} {"self ms":>9}'
+    if baseline:
+        header += f' {"before":>9} {"change":>9}'
+    print(f'median of {args.runs} boots, sensors "{args.sensors}", host CPU time')
+    print(header)
+    print(row('total\tboot'))
+    for key in medians:
+        if key.startswith('stage\t'):
+            print(row(key))
+    keys = set(medians) | set(baseline)
+    entries = sorted((key for key in keys if not key.startswith(('stage\t', 'total\t'))),
+                     key=lambda key: max(medians.get(key, 0.0), baseline.get(key, 0.0)), reverse=True)
+    for key in entries[:args.limit]:
+        print(row(key))
+    if len(entries) > args.limit:
+        print(f'{len(entries) - args.limit} more')
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(medians, f, indent=1)
+        print(f'saved to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
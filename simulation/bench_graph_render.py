@@ -0,0 +1,221 @@
+"""Compare full-redraw and scrolling graph rendering (graph_rendering.py).
+
+    python simulation/bench_graph_render.py [--history 120] [--updates 240]
+
+Builds the real DisplayGraphs (uplot plots, fonts, ...) on Blinka's displayio and feeds the same values to both
+modes, one update per graph interval, like the bot does.  The first 120 updates fill the graphs, after that they
+scroll.  For each mode it reports:
+
+- bitmaptools calls and pixels they touch per update.  On the board bitmaptools is C, so this (plus the number of
+  calls made from python) is the best predictor of board time.
+- time per update for all three graphs, on the host.  Careful with this one: Blinka's bitmaptools is pure python,
+  one python call per pixel, so here a blit of the plot area costs far more than on the board.
+- screen pixels changed per update (CO2 graph): the plot bitmap's dirty area, plus for the scrolling renderer the
+  columns of its line layer that were re-pointed or drawn on.  This is what displayio has to send over SPI, at
+  2 bytes a pixel, when the graph is on screen.  Once a graph is full every column moves each update, so this is
+  the whole plot area for both modes - scrolling saves drawing work, not SPI.  A graph that isn't on screen costs
+  no SPI either way.
+- how many pixels the final screens differ by.  That is expected, the two aren't meant to be pixel for pixel equal:
+  - left of the plot area.  uplot puts the oldest point on the y-axis, and its first segment is drawn over the
+    ticks.  The scrolling renderer's line layer only covers the plot area, so it clips that bit off.  This is most
+    of the difference for a steep oldest segment, and is reported on its own.
+  - in the plot area.  The scrolling renderer draws new segments column by column (see _draw_segment()), not with
+    draw_line(), so sloped segments can differ by a pixel per column.  Scrolling by whole columns also puts older
+    points up to a column off from where a full redraw puts them (see graph_rendering.py).
+
+Run with a longer history (e.g. `--history 480`) to see full redraw cost grow with the number of points.
+"""
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+simulation.install()
+
+import board
+import displayio
+from simulation.fakes.framebuffer import FramebufferDisplay
+
+if hasattr(displayio, '_stop_background'):
+    displayio._stop_background()
+if not hasattr(displayio, 'Display'):
+    displayio.Display = FramebufferDisplay
+os.chdir(simulation.REPO_ROOT)   # fonts are loaded from relative paths
+
+from circuitpython_uplot import logging as uplot_logging
+import graph_rendering
+from displays_graphing import DisplayGraphs, Sensors
+
+
+class BitmapOpCounter:
+    """Wraps the bitmaptools functions used by uplot and graph_rendering, counts calls and pixels touched."""
+
+    def __init__(self):
+        self.calls = 0
+        self.pixels = 0
+        self._real = {}
+
+    def install(self) -> None:
+        for module in (uplot_logging, graph_rendering):
+            for name in ('draw_line', 'fill_region', 'blit'):
+                if hasattr(module, name):
+                    self._real[(module, name)] = getattr(module, name)
+                    setattr(module, name, self._wrap(name, getattr(module, name)))
+
+    def _wrap(self, name: str, function):
+        def counted(bitmap, *args, **kwargs):
+            self.calls += 1
+            if name == 'draw_line':
+                x1, y1, x2, y2 = args[:4]
+                self.pixels += max(abs(x2 - x1), abs(y2 - y1)) + 1
+            elif name == 'fill_region':
+                x1, y1, x2, y2 = args[:4]
+                self.pixels += max(0, x2 - x1) * max(0, y2 - y1)
+            else:
+                self.pixels += max(0, kwargs['x2'] - kwargs['x1']) * max(0, kwargs['y2'] - kwargs['y1'])
+            return function(bitmap, *args, **kwargs)
+        return counted
+
+    def take(self) -> tuple:
+        counts = (self.calls, self.pixels)
+        self.calls = 0
+        self.pixels = 0
+        return counts
+
+
+counter = BitmapOpCounter()
+counter.install()
+
+
+def sensor_values(count: int, seed: int = 3) -> list[tuple]:
+    """Slowly wandering co2/temperature/humidity, one tuple per graph interval"""
+    rng = random.Random(seed)
+    values = []
+    for i in range(count):
+        co2 = 900 + 600 * math.sin(i / 40) + rng.gauss(0, 30)
+        temperature_f = 70 + 6 * math.sin(i / 90) + rng.gauss(0, 0.3)
+        humidity = 45 + 10 * math.sin(i / 60) + rng.gauss(0, 0.5)
+        values.append((co2, temperature_f, humidity))
+    return values
+
+
+def run(incremental: bool, values: list[tuple], history_size: int) -> dict:
+    graphs = DisplayGraphs(board.DISPLAY, history_size=history_size, incremental_rendering=incremental)
+    structs = [graphs._graph_displays[Sensors.CO2],
+               graphs._graph_displays[Sensors.TEMPERATURE],
+               graphs._graph_displays[Sensors.HUMIDITY]]
+    durations = []
+    dirty_pixels = []
+    bitmap_ops = []
+    counter.take()
+    for co2, temperature_f, humidity in values:
+        before = changed_pixels(structs[0], None)
+        start = time.perf_counter()
+        DisplayGraphs._update_single_graph(structs[0], co2)
+        DisplayGraphs._update_single_graph(structs[1], temperature_f)
+        DisplayGraphs._update_single_graph(structs[2], humidity)
+        durations.append(time.perf_counter() - start)
+        bitmap_ops.append(counter.take())
+        dirty_pixels.append(changed_pixels(structs[0], before))   # CO2 graph, as if it was on screen
+
+    return {
+        'durations': durations,
+        'dirty_pixels': dirty_pixels,
+        'bitmap_ops': bitmap_ops,
+        'groups': [struct.display_group for struct in structs],
+        'full_redraws': sum(struct.renderer.full_redraws for struct in structs),
+        'incremental_draws': sum(struct.renderer.incremental_draws for struct in structs),
+    }
+
+
+def changed_pixels(struct, before) -> int | list:
+    """Call with before=None ahead of an update (starts tracking), then with what that returned after the update.
+
+    Counts the pixels of the graph that changed on screen, see module docstring.
+    """
+    plot_bitmap = struct.display_group[0]._plotbitmap
+    renderer = struct.renderer
+    grid = getattr(renderer, '_grid', None)
+    if before is None:
+        # what a display refresh does: forget the dirty areas
+        plot_bitmap._finish_refresh()
+        if grid is not None:
+            renderer._bitmap._finish_refresh()
+            return [grid[i] for i in range(grid.width)]
+        return []
+
+    area = plot_bitmap._dirty_area
+    pixels = max(0, area.x2 - area.x1) * max(0, area.y2 - area.y1)
+    if grid is not None:
+        columns = {i for i in range(grid.width) if grid[i] != before[i]}
+        area = renderer._bitmap._dirty_area
+        for column in range(area.x1, area.x2):
+            # bitmap column -> screen column it is shown in
+            columns.add(next(i for i in range(grid.width) if grid[i] == column))
+        pixels += len(columns) * grid.tile_height
+    return pixels
+
+
+def summary(name: str, result: dict, phase: slice) -> str:
+    durations = result['durations'][phase]
+    dirty = result['dirty_pixels'][phase]
+    ops = result['bitmap_ops'][phase]
+    count = len(durations)
+    calls = sum(c for c, _ in ops) / count
+    pixels = sum(p for _, p in ops) / count
+    return (f'{name:<12} {calls:6.0f} calls {pixels:8.0f} px   host {sum(durations) / count * 1000:7.2f} ms   '
+            f'dirty {sum(dirty) / count:6.0f} px ({sum(dirty) * 2 / count / 1024:4.1f} KiB SPI)')
+
+
+def differing_pixels(group_a, group_b) -> tuple:
+    """Render both graphs like the screen would and count pixels that differ: (all, left of the plot area)"""
+    screen = FramebufferDisplay()
+    screen.root_group = group_a
+    a = list(screen.render())
+    screen.root_group = group_b
+    b = screen.render()
+    plot = group_a[0]
+    # first screen column of the plot area, where the scrolling renderer's line layer starts
+    left = plot.x + plot._newxmin + plot._tickheightx + 1
+    differing = [i for i in range(len(a)) if a[i] != b[i]]
+    return len(differing), sum(1 for i in differing if i % screen.width < left)
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--history', type=int, default=120, help='points per graph')
+    parser.add_argument('--updates', type=int, default=None, help='default: 2 x history')
+    args = parser.parse_args()
+    history = args.history
+    updates = args.updates or 2 * history
+
+    values = sensor_values(updates)
+    full = run(False, values, history)
+    scrolling = run(True, values, history)
+
+    fill = slice(0, min(history, updates))
+    scroll = slice(history, updates)
+    print(f'{updates} updates of 3 graphs, {history} points each.  Per update of all 3 graphs:\n')
+    print('                   bitmaptools ops')
+    print(f'filling (first {history} updates)')
+    print(summary('full redraw', full, fill))
+    print(summary('scrolling', scrolling, fill))
+    if updates > history:
+        print('\nscrolling (graph full)')
+        print(summary('full redraw', full, scroll))
+        print(summary('scrolling', scrolling, scroll))
+    print(f'\nscrolling renderer: {scrolling["incremental_draws"]} incremental draws, '
+          f'{scrolling["full_redraws"]} full redraws')
+    names = ('CO2', 'temperature', 'humidity')
+    for name, a, b in zip(names, full['groups'], scrolling['groups']):
+        differing, left_of_plot = differing_pixels(a, b)
+        print(f'{name:<12} final screens differ in {differing} of {240 * 135} pixels, '
+              f'{left_of_plot} of them left of the plot area')
+
+
+if __name__ == '__main__':
+    main()
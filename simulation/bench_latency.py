@@ -0,0 +1,87 @@
+"""What a latency.py sample costs: `with stage:` around nothing, against the bare loop, and what it keeps in memory.
+
+    python simulation/bench_latency.py
+    python simulation/bench_latency.py --samples 1000000
+
+The board runs the same bytecode many times slower, so the ns per sample here is only good for comparing versions
+of latency.py, and against the other per-run costs on the host (bench_scheduler.py).  Memory is checked with
+tracemalloc: however many samples, the stages must not hold more than one int object per count.  CPython has an int
+object for each count over 256 (the board doesn't, small ints fit in a pointer there), each replaced by the next, so
+they don't add up.  lap's max is the time between two lapped() runs, it has no meaning here.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+simulation.install()
+
+from latency import BOUNDS, LatencyStages
+
+
+def bare(samples: int) -> float:
+    started = time.perf_counter()
+    for _ in range(samples):
+        pass
+    return time.perf_counter() - started
+
+
+def timed(stage, samples: int) -> float:
+    started = time.perf_counter()
+    for _ in range(samples):
+        with stage:
+            pass
+    return time.perf_counter() - started
+
+
+def lapped(stage, samples: int) -> float:
+    started = time.perf_counter()
+    for _ in range(samples):
+        stage.lap()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--samples', type=int, default=200000)
+    args = parser.parse_args()
+
+    latency = LatencyStages()
+    stage = latency.stage('with')
+    gap = latency.stage('lap')
+    # warm up: past 256 in the first bucket, so every count is already an int object of its own
+    timed(stage, 1000)
+    lapped(gap, 1000)
+
+    loop = bare(args.samples)
+    with_seconds = timed(stage, args.samples)
+    lap_seconds = lapped(gap, args.samples)
+
+    # tracemalloc slows every allocation and free down, so it only runs for the memory check
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    timed(stage, args.samples)
+    lapped(gap, args.samples)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def per_sample(seconds: float) -> float:
+        return (seconds - loop) / args.samples * 1e9
+
+    print(f'samples    : {args.samples} per stage (CPython)')
+    print(f'with stage : {per_sample(with_seconds):,.0f} ns per sample over the bare loop')
+    print(f'lap()      : {per_sample(lap_seconds):,.0f} ns per sample over the bare loop')
+    print(f'kept       : {after - before} bytes more after another {2 * args.samples} samples (ints, see above)')
+    print()
+    print(latency.report())
+    # counts, count, max and the start time of each stage, as int objects
+    limit = 2 * (len(BOUNDS) + 4) * sys.getsizeof(1 << 20)
+    if after - before > limit:
+        print(f'more than {limit} bytes: latency.py allocates per sample')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""PM1006Parser on a dirty byte stream: does every good frame come out, does nothing else, and what it costs.
+
+    python simulation/bench_pm1006.py
+    python simulation/bench_pm1006.py --frames 20000 --seed 3
+
+The stream is good frames mixed with what a tapped Vindriktning line delivers: frames with a bad checksum, runs of
+random garbage (some of it starting with the header bytes), and the tail half of a frame (the bot booted in the
+middle of one).  It is fed in random chunk sizes, the way UART reads land, and parse() is called after each chunk.
+Chunks are at most 45 bytes: with a partial frame (up to 19 bytes) left over from the last parse(), a bigger one
+can overflow the 64 byte ring.  AirSensorPM1006 reads 32.
+
+The checksum is one byte: a run of garbage that starts with the header passes it 1 time in 256, and comes out as a
+frame.  The bench counts those apart from good frames that were missed, only a missed good frame is a parser bug.
+
+Memory is checked with tracemalloc around the parse loop: the peak must not grow with the stream, the parser
+allocates nothing per byte or per frame.  Speed is CPython's, only good for comparing parser versions.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation.fakes.uart import PM1006Device
+from pm1006 import FRAME_SIZE, PM1006Parser
+
+
+def build_stream(frames: int, rng: random.Random) -> tuple[bytes, list[int]]:
+    """Byte stream, and the PM2.5 values of its good frames in order"""
+    device = PM1006Device(noise=0)
+    stream = bytearray()
+    expected = []
+    for _ in range(frames):
+        value = rng.randrange(0, 1000)
+        roll = rng.random()
+        if roll < 0.10:
+            bad = bytearray(device.frame(value))
+            bad[rng.randrange(3, FRAME_SIZE)] ^= 1 << rng.randrange(8)
+            stream += bad
+            continue
+        if roll < 0.20:
+            garbage = bytes(rng.randrange(256) for _ in range(rng.randrange(1, 30)))
+            if rng.random() < 0.5:
+                garbage = b'\x16\x11\x0b' + garbage      # looks like a frame, isn't
+            stream += garbage
+        elif roll < 0.25:
+            stream += device.frame(rng.randrange(1000))[rng.randrange(1, FRAME_SIZE):]
+        stream += device.frame(value)
+        expected.append(value)
+    return bytes(stream), expected
+
+
+def run(stream: bytes, rng: random.Random, max_chunk: int, expected: list[int]) -> tuple[PM1006Parser, int, int,
+                                                                                         float, int]:
+    """Returns parser, values returned, values that match no good frame, seconds, peak bytes allocated"""
+    parser = PM1006Parser()
+    view = memoryview(stream)
+    # chunk sizes picked up front, so the loop measures the parser and not the random module
+    sizes = []
+    total = 0
+    while total < len(stream):
+        size = min(rng.randrange(1, max_chunk + 1), len(stream) - total)
+        sizes.append(size)
+        total += size
+    # parse() returns only the newest value per call: two frames completing in one chunk give one value.  So each
+    # value must be one of the good frames after the last one matched.  Checked as we go, a list of results would be
+    # the biggest allocation in the loop
+    remaining = iter(expected)
+    values = 0
+    false_values = 0
+    position = 0
+    tracemalloc.start()
+    started = time.perf_counter()
+    for size in sizes:
+        parser.feed(view[position:position + size], size)
+        position += size
+        value = parser.parse()
+        if value is not None:
+            values += 1
+            if not any(value == good for good in remaining):
+                false_values += 1
+                remaining = iter(expected)      # lost our place, don't count every later value too
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return parser, values, false_values, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-chunk', type=int, default=32, help='largest read, bytes')
+    args = parser.parse_args()
+    if not 0 < args.max_chunk <= 64 - (FRAME_SIZE - 1):
+        parser.error(f'--max-chunk must be 1..{64 - (FRAME_SIZE - 1)}, or the ring can overflow')
+
+    rng = random.Random(args.seed)
+    stream, expected = build_stream(args.frames, rng)
+    result, values, false_values, elapsed, peak = run(stream, rng, args.max_chunk, expected)
+    # a false frame can cost a good one too (it swallows the good frame's header).  parse() only returns the newest
+    # value, so false frames are a lower bound: allow one missed good frame per false frame seen, no more
+    missed = len(expected) - (result.frames - false_values)
+
+    print(f'stream     : {len(stream)} bytes, {len(expected)} good frames, chunks of 1..{args.max_chunk} bytes')
+    print(f'parser     : {result.report()}')
+    print(f'frames     : {result.frames} parsed, {len(expected)} good frames sent, {values} values returned')
+    print(f'false      : {false_values} values from garbage that passed the 1 byte checksum')
+    print(f'speed      : {result.frames / elapsed:,.0f} frames/s, {len(stream) / elapsed / 1000:,.0f} KB/s (CPython)')
+    # a memoryview slice per chunk is the bench's own, alive one at a time
+    print(f'allocated  : {peak} bytes peak')
+    if missed > false_values:
+        print(f'{missed} good frames missed')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
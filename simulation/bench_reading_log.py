@@ -0,0 +1,150 @@
+"""Reading log (reading_log.py) flash cost: writes, blocks touched and query reads, against a plain per-record append.
+
+    python simulation/bench_reading_log.py              # a week of 1-minute records
+    python simulation/bench_reading_log.py --days 30
+
+Runs on the host file system.  Flash cost is counted, not timed: every write() rewrites each 4 KB flash block it
+touches (erase + program), and every write that grows a file also rewrites the FAT and directory entry.
+
+The log is then read back by a ReadingLog that was never opened (the bot on a read-only drive, analysis tools): it
+must return every record.  Exits with 1 if it doesn't.
+"""
+import argparse
+import builtins
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reading_log
+from reading_log import PAGE_SIZE, RECORD_SIZE, ReadingLog
+
+BLOCK_SIZE = 4096
+START_TIME = 1_700_000_000
+
+
+class FlashCounter:
+    """Wraps open() and counts what each write() costs the flash."""
+
+    def __init__(self):
+        self.writes = 0
+        self.block_writes = 0       # data blocks rewritten
+        self.metadata_writes = 0    # file grew: FAT + directory entry rewritten
+        self.bytes_written = 0
+
+    def open(self, path, mode='r', *args, **kwargs):
+        f = builtins.open(path, mode, *args, **kwargs)
+        if 'r' in mode and '+' not in mode:
+            return f
+        return _CountedFile(f, self)
+
+    def report(self, records: int) -> str:
+        erases = self.block_writes + self.metadata_writes
+        return (f'{self.writes:>6} writes, {self.bytes_written:>9,} bytes, {erases:>6} block erases '
+                f'({erases / records:.3f} per record)')
+
+
+class _CountedFile:
+    """Just enough of a file for ReadingLog: write() counted, seek() and `with` passed through"""
+
+    def __init__(self, f, counter: FlashCounter):
+        self._f = f
+        self._counter = counter
+
+    def write(self, data) -> int:
+        f, counter = self._f, self._counter
+        position = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        written = f.write(data)
+        counter.writes += 1
+        counter.bytes_written += len(data)
+        counter.block_writes += (position + len(data) - 1) // BLOCK_SIZE - position // BLOCK_SIZE + 1
+        if position + len(data) > size:
+            counter.metadata_writes += 1
+        return written
+
+    def seek(self, offset: int) -> int:
+        return self._f.seek(offset)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._f.close()
+
+
+def records(count: int):
+    for i in range(count):
+        co2 = 600 + (i * 7) % 400
+        yield START_TIME + 60 * i, co2, 21.5 + (i % 50) / 10, 45.0 + (i % 30) / 10, co2 - 20, co2 + 20, 12
+
+
+def bench_reading_log(directory: str, count: int) -> tuple:
+    counter = FlashCounter()
+    reading_log.open = counter.open
+    try:
+        log = ReadingLog(directory, max_pages=1_000_000)
+        log.open()
+        started = time.perf_counter()
+        for record in records(count):
+            log.append(*record)
+        log.flush()
+        took = time.perf_counter() - started
+    finally:
+        del reading_log.open
+    return log, counter, took
+
+
+def bench_per_record(directory: str, count: int) -> tuple:
+    """Open, append one record, close: the straightforward way, what `f.write(); f.flush()` per reading costs"""
+    counter = FlashCounter()
+    path = f'{directory}/per_record.bin'
+    started = time.perf_counter()
+    for record in records(count):
+        with counter.open(path, 'ab') as f:
+            f.write(reading_log.struct.pack(reading_log.RECORD_FORMAT, *record[:2], round(record[2] * 100),
+                                            round(record[3] * 100), *record[4:]))
+    took = time.perf_counter() - started
+    return counter, took
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=float, default=7)
+    args = parser.parse_args()
+    count = int(args.days * 24 * 60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        log, counter, took = bench_reading_log(directory, count)
+        naive, naive_took = bench_per_record(directory, count)
+
+        print(f'{count:,} records ({args.days:g} days of 1-minute intervals), {RECORD_SIZE} bytes each, '
+              f'{PAGE_SIZE}-byte pages')
+        print(f'  reading log : {counter.report(count)}, {count / took:>9,.0f} records/s on this host')
+        print(f'  per record  : {naive.report(count)}, {count / naive_took:>9,.0f} records/s on this host')
+
+        # last hour, one hour in the middle, everything
+        end = START_TIME + 60 * count
+        for name, start, stop in (('last hour', end - 3600, end),
+                                  ('middle hour', START_TIME + 30 * count, START_TIME + 30 * count + 3600),
+                                  ('everything', 0, end)):
+            log.reads = log.bytes_read = 0
+            started = time.perf_counter()
+            found = sum(1 for _ in log.records(start, stop))
+            query_took = time.perf_counter() - started
+            print(f'  query {name:11}: {found:>6} records, {log.reads:>4} reads, {log.bytes_read:>9,} bytes read '
+                  f'(full scan {os.stat(log._data_path).st_size:,}), {1000 * query_took:.1f} ms')
+
+        # everything is flushed, so a log that isn't open has to find all of it on flash
+        unopened = ReadingLog(directory, max_pages=1_000_000)
+        read_back = list(unopened.records())
+        expected = [(timestamp, co2, round(temperature * 100) / 100, round(humidity * 100) / 100, *rest)
+                    for timestamp, co2, temperature, humidity, *rest in records(count)]
+        print(f'  read back without open(): {len(read_back)} of {count} records')
+        if read_back != expected:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
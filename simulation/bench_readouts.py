@@ -0,0 +1,71 @@
+"""Cost of updating a big numeric readout: bitmap_label.Label vs SegmentLabel (segment_display.py).
+
+    python simulation/bench_readouts.py [--updates 1000]
+
+Feeds the same CO2 values (4 characters, like the displays) to both and reports time per `.text` change on the host,
+and for SegmentLabel how many tile indices were written.  Label re-lays out glyphs and redraws its bitmap every
+time, SegmentLabel only rewrites the tiles of characters that changed.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+simulation.install()
+from simulation.fakes.framebuffer import FramebufferDisplay
+
+import displayio
+if hasattr(displayio, '_stop_background'):
+    displayio._stop_background()
+if not hasattr(displayio, 'Display'):
+    displayio.Display = FramebufferDisplay
+os.chdir(simulation.REPO_ROOT)   # fonts are loaded from relative paths
+
+from adafruit_display_text import bitmap_label
+import assets
+from segment_display import SegmentLabel
+
+
+def co2_texts(count: int, seed: int = 5) -> list[str]:
+    """CO2 readings drifting around, formatted like the displays do"""
+    rng = random.Random(seed)
+    co2 = 800
+    texts = []
+    for _ in range(count):
+        co2 = min(5000, max(400, co2 + rng.randint(-25, 25)))
+        texts.append(f'{co2: >4}')
+    return texts
+
+
+def time_updates(label, texts: list[str]) -> float:
+    start = time.perf_counter()
+    for text in texts:
+        label.text = text
+    return (time.perf_counter() - start) / len(texts)
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', type=int, default=1000)
+    args = parser.parse_args()
+    texts = co2_texts(args.updates)
+
+    font = assets.font('fonts/Arial-Bold-36.bdf')
+    label = bitmap_label.Label(font, text='8888', color=0xFFFFFF, anchor_point=(1.0, 0.0), anchored_position=(90, 80))
+    segments = SegmentLabel(glyph_width=20, glyph_height=34, length=4, text='8888',
+                            anchor_point=(1.0, 0.0), anchored_position=(90, 90))
+    segments.index_writes = 0
+
+    label_seconds = time_updates(label, texts)
+    segment_seconds = time_updates(segments, texts)
+    print(f'{len(texts)} CO2 readout updates, host time per update:')
+    print(f'bitmap_label.Label  {label_seconds * 1e6:8.1f} us')
+    print(f'SegmentLabel        {segment_seconds * 1e6:8.1f} us   '
+          f'{segments.index_writes / len(texts):.2f} tile index writes per update')
+
+
+if __name__ == '__main__':
+    main()
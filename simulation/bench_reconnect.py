@@ -0,0 +1,101 @@
+"""Connection failure scenarios: how the bot recovers, how long it takes, and whether the board resets.
+
+    python simulation/bench_reconnect.py                    # all scenarios, each in its own process
+    python simulation/bench_reconnect.py --scenario tls     # just one, bot output included
+
+Each scenario runs the whole bot (code.py) on the simulation and breaks something ten minutes in, using the failure
+injection of the fakes: wifi radio, ssl handshakes, MQTT broker.
+"""
+import argparse
+import contextlib
+import io
+import os
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation.sim import Simulation
+from simulation.fakes import microcontroller
+from simulation.fakes import ssl as fake_ssl
+
+BREAK_AT = 600.0
+
+
+def flaky_ap(sim: Simulation) -> None:
+    """Access point drops out, next 4 wifi connects fail."""
+    def drop():
+        sim.radio.drop()
+        sim.radio.fail_next_connects = 4
+    sim.at(BREAK_AT, drop)
+
+
+def tls(sim: Simulation) -> None:
+    """Broker hangs up, next 5 TLS handshakes fail."""
+    def drop():
+        sim.broker.drop_connections()
+        fake_ssl.fail_next_handshakes = 5
+    sim.at(BREAK_AT, drop)
+
+
+def login(sim: Simulation) -> None:
+    """Broker hangs up, next 5 MQTT logins are refused (server unavailable)."""
+    def drop():
+        sim.broker.drop_connections()
+        sim.broker.refuse_next_logins = 5
+    sim.at(BREAK_AT, drop)
+
+
+def outage(sim: Simulation) -> None:
+    """Broker unreachable for 30 minutes."""
+    sim.outage(at=BREAK_AT, duration=1800)
+
+
+def ap_gone(sim: Simulation) -> None:
+    """Access point gone for good.  Retry budget runs out, board resets."""
+    def drop():
+        sim.radio.drop()
+        sim.radio.fail_next_connects = 1_000_000
+    sim.at(BREAK_AT, drop)
+
+
+# name -> (setup, simulated seconds)
+SCENARIOS = {
+    'flaky-ap': (flaky_ap, 1800),
+    'tls':      (tls, 1800),
+    'login':    (login, 1800),
+    'outage':   (outage, 3600),
+    'ap-gone':  (ap_gone, 3 * 3600),
+}
+
+
+def run(name: str, quiet: bool) -> None:
+    setup, duration = SCENARIOS[name]
+    sim = Simulation(duration=duration, period_floor=0.25)
+    setup(sim)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+        bot = sim.run_file('code.py')
+    display = next(task for task in bot['scheduler']._tasks if task.name == 'display')
+    expected = sim.clock.monotonic() / display.period
+    print(f'{name:9} {setup.__doc__}')
+    print(f'          resets {microcontroller.reset_count}, display refreshed {display.run_count} times '
+          f'({100 * display.run_count / expected:.0f}% of schedule)')
+    print(f'          {bot["connection"].report()}')
+    print(f'          {bot["outbox"].report()}')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS))
+    parser.add_argument('--quiet', action='store_true', help="hide the bot's own print output")
+    args = parser.parse_args()
+    if args.scenario:
+        run(args.scenario, quiet=args.quiet)
+        return
+    # one Simulation per process
+    for name in SCENARIOS:
+        subprocess.run([sys.executable, __file__, '--scenario', name, '--quiet'], check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Compare button latency of the old while-True loop against the TaskScheduler.
+
+Runs on CPython with the fake hardware modules, no board needed:
+
+    python simulation/bench_scheduler.py
+
+The work done by each job is modelled with time.sleep() using rough costs measured on the ESP32-S2 (blocking socket
+calls, display label re-render).  A 'finger' thread presses the middle button at random times and we measure how
+long it takes until the press is seen.
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+simulation.install()
+
+import asyncio
+import board
+import digitalio
+from scheduler import TaskScheduler, yield_to_other_tasks
+
+# rough per-call costs in seconds
+COST_DATA_READY = 0.002
+COST_READ_SENSOR = 0.006
+COST_DISPLAY_UPDATE = 0.060
+COST_PRINT = 0.003
+COST_PUBLISH = 0.250     # one io.publish over TLS
+COST_MQTT_LOOP = 0.050   # io.loop() with a short socket timeout
+
+SENSOR_PERIOD = 0.5      # shortened from 5 s so a short run sees a few readings
+PUBLISH_PERIOD = 2.0     # shortened from 60 s for the same reason
+RUN_SECONDS = 8.0
+
+
+class Finger(threading.Thread):
+    """Presses the button (pin goes high) at random times from a background thread, and records how long it takes
+    until bot code notices.
+    """
+
+    def __init__(self, pin):
+        super().__init__(daemon=True)
+        self._pin = pin
+        self._pressed_at = None
+        self._released = threading.Event()
+        self._running = True
+        self.latencies: list[float] = []
+
+    def run(self) -> None:
+        while self._running:
+            time.sleep(random.uniform(0.05, 0.3))
+            self._released.clear()
+            self._pressed_at = time.monotonic()
+            self._pin.level = True
+            self._released.wait(timeout=5)
+
+    def stop(self) -> None:
+        self._running = False
+        self._released.set()
+
+    def seen(self) -> None:
+        """Called by bot code when it sees the press."""
+        if self._pressed_at is not None:
+            self.latencies.append(time.monotonic() - self._pressed_at)
+            self._pressed_at = None
+            self._pin.level = False
+            self._released.set()
+
+
+def summary(name: str, latencies: list[float]) -> str:
+    if not latencies:
+        return f'{name:<10} no presses'
+    ordered = sorted(latencies)
+    p50 = ordered[len(ordered) // 2]
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f'{name:<10} presses {len(ordered):>4}   p50 {p50 * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   '
+            f'max {ordered[-1] * 1000:7.1f} ms')
+
+
+def run_while_true_loop(finger: Finger, button: digitalio.DigitalInOut) -> None:
+    """Same shape as the original code.py main loop."""
+    publish_stamp = 0
+    sensor_stamp = 0
+    end = time.monotonic() + RUN_SECONDS
+    while time.monotonic() < end:
+        if button.value:
+            finger.seen()
+
+        time.sleep(COST_DATA_READY)
+        if time.monotonic() - sensor_stamp >= SENSOR_PERIOD:
+            sensor_stamp = time.monotonic()
+            time.sleep(COST_READ_SENSOR + COST_DISPLAY_UPDATE + COST_PRINT)
+            if time.monotonic() - publish_stamp >= PUBLISH_PERIOD:
+                publish_stamp = time.monotonic()
+                time.sleep(3 * COST_PUBLISH)
+
+
+def run_scheduler(finger: Finger, button: digitalio.DigitalInOut) -> TaskScheduler:
+    """Same jobs, split into tasks the way code.py does it now."""
+
+    async def poll_buttons():
+        if button.value:
+            finger.seen()
+
+    async def sample_sensor():
+        time.sleep(COST_DATA_READY + COST_READ_SENSOR + COST_PRINT)
+
+    async def refresh_display():
+        time.sleep(COST_DISPLAY_UPDATE)
+
+    async def publish():
+        for _ in range(3):
+            time.sleep(COST_PUBLISH)
+            await yield_to_other_tasks()
+
+    async def pump_mqtt():
+        time.sleep(COST_MQTT_LOOP)
+
+    scheduler = TaskScheduler()
+    scheduler.add('buttons', poll_buttons,    period=0.01,  budget=0.05)
+    scheduler.add('sensor',  sample_sensor,   period=SENSOR_PERIOD, budget=0.1)
+    scheduler.add('display', refresh_display, period=SENSOR_PERIOD, budget=0.25)
+    scheduler.add('publish', publish,         period=PUBLISH_PERIOD, budget=2.0)
+    scheduler.add('mqtt',    pump_mqtt,       period=1.0,   budget=0.2)
+
+    async def main():
+        runner = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(RUN_SECONDS)
+        runner.cancel()
+
+    asyncio.run(main())
+    return scheduler
+
+
+def main():
+    random.seed(1)
+    button = digitalio.DigitalInOut(board.D1)
+
+    finger = Finger(board.D1)
+    finger.start()
+    run_while_true_loop(finger, button)
+    finger.stop()
+    loop_latencies = finger.latencies
+
+    finger = Finger(board.D1)
+    finger.start()
+    scheduler = run_scheduler(finger, button)
+    finger.stop()
+
+    print('button press -> handled latency')
+    print(summary('while-True', loop_latencies))
+    print(summary('scheduler', finger.latencies))
+    print()
+    print('scheduler task timing (ms)')
+    print(scheduler.report())
+
+
+if __name__ == '__main__':
+    main()
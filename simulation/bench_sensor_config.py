@@ -0,0 +1,102 @@
+"""What reading and changing SCD4x settings costs: time blocked, and the gap it leaves in the readings.
+
+    python simulation/bench_sensor_config.py
+
+Runs AirSensorSCD4x against the simulated SCD4x (virtual clock, real command timings).  "per call" is what every
+getter and setter used to do: stop periodic measurement, read or write, stop again, restart.  "cached" is the
+current AirSensorSCD4x: getters from the cache, setters batched with configure().
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation.sim import Simulation
+
+
+def wait_for_data(sensor) -> None:
+    while not sensor.data_ready:
+        time.sleep(0.05)
+    sensor.read()   # data_ready goes back to False
+
+
+def per_call(sensor, operation) -> None:
+    """The old getter/setter pattern, straight on the adafruit_scd4x driver"""
+    chip = sensor._scd4x
+    chip.stop_periodic_measurement()
+    operation(chip)
+    chip.stop_periodic_measurement()
+    chip.start_periodic_measurement()
+
+
+def read_per_call(sensor) -> None:
+    for name in ('altitude', 'temperature_offset', 'self_calibration_enabled'):
+        per_call(sensor, lambda chip: getattr(chip, name))
+
+
+def write_per_call(sensor) -> None:
+    for name, value in (('altitude', 150), ('temperature_offset', 3.5), ('self_calibration_enabled', False)):
+        per_call(sensor, lambda chip: setattr(chip, name, value))
+
+
+def read_cached(sensor) -> None:
+    _ = sensor.altitude, sensor.temperature_offset, sensor.auto_calibration
+
+
+def write_cached(sensor) -> None:
+    with sensor.configure():
+        sensor.altitude = 150
+        sensor.temperature_offset = 3.5
+        sensor.auto_calibration = False
+
+
+def write_unchanged(sensor) -> None:
+    """Same values as write_cached(), already on the sensor"""
+    with sensor.configure():
+        sensor.altitude = 150
+        sensor.temperature_offset = 3.5
+
+
+CASES = (
+    ('read 3 settings', read_per_call, read_cached),
+    ('write 3 settings', write_per_call, write_cached),
+    ('write 2 unchanged', None, write_unchanged),
+)
+
+
+def measure(sensor, action) -> tuple:
+    """Seconds blocked in `action`, seconds from its start until the next reading (FAST mode: 5 s or less normally)"""
+    wait_for_data(sensor)
+    started = time.monotonic()
+    action(sensor)
+    blocked = time.monotonic() - started
+    wait_for_data(sensor)
+    return blocked, time.monotonic() - started
+
+
+def main() -> None:
+    sim = Simulation(duration=3600)
+    with sim:
+        from air_quality_sensors import AirSensorSCD4x
+        started = time.monotonic()
+        sensor = AirSensorSCD4x(measurement_mode=AirSensorSCD4x.MeasurementMode.FAST)
+        print(f'startup: {time.monotonic() - started:.2f} s, {sensor.config_stats.report()}')
+        print()
+        print(f'{"":18} {"per call":>20}   {"cached":>20}')
+        print(f'{"":18} {"blocked":>9} {"next data":>10}   {"blocked":>9} {"next data":>10}')
+        for name, old, new in CASES:
+            columns = []
+            for action in (old, new):
+                if action is None:
+                    columns.append(f'{"-":>9} {"-":>10}')
+                    continue
+                blocked, gap = measure(sensor, action)
+                columns.append(f'{blocked:>8.2f}s {gap:>9.2f}s')
+            print(f'{name:18} {columns[0]}   {columns[1]}')
+        print()
+        print(sensor.config_stats.report())
+        print(f'sensor: {sim.sensor.measurements_taken} measurements, {sim.i2c.transactions} I2C transactions')
+
+
+if __name__ == '__main__':
+    main()
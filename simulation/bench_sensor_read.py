@@ -0,0 +1,69 @@
+"""I2C traffic per sensor reading: three adafruit_scd4x properties against one AirSensorSCD4x.read().
+
+    python simulation/bench_sensor_read.py
+    python simulation/bench_sensor_read.py --readings 500
+
+Counted on the fake I2C bus (simulation/fakes/i2c.py): one transaction per START...STOP, like a logic analyzer would.
+Both sides poll data_ready once a second, like the sensor task, and take a reading when it is set.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation.sim import Simulation
+
+
+def properties(sensor) -> tuple:
+    """What code.py used to do: each property checks data_ready on the bus, the first one also reads"""
+    chip = sensor._scd4x
+    return chip.CO2, chip.temperature, chip.relative_humidity
+
+
+def snapshot(sensor) -> tuple:
+    measurement = sensor.read()
+    return measurement.co2, measurement.temperature_c, measurement.humidity
+
+
+def run(sim: Simulation, sensor, read, readings: int) -> tuple:
+    """Returns (values of the last reading, transactions, bytes, transactions spent on reads alone)"""
+    bus = sim.i2c
+    bus.reset_counters()
+    read_transactions = 0
+    taken = 0
+    values = None
+    while taken < readings:
+        time.sleep(1.0)
+        if not sensor.data_ready:
+            continue
+        before = bus.transactions
+        values = read(sensor)
+        read_transactions += bus.transactions - before
+        taken += 1
+    return values, bus.transactions, bus.bytes_written + bus.bytes_read, read_transactions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readings', type=int, default=100)
+    args = parser.parse_args()
+
+    sim = Simulation(duration=24 * 3600)
+    with sim:
+        from air_quality_sensors import AirSensorSCD4x
+        sensor = AirSensorSCD4x(measurement_mode=AirSensorSCD4x.MeasurementMode.FAST)
+        print(f'{args.readings} readings, FAST mode (every 5 s), data_ready polled every 1 s')
+        print(f'{"":22} {"read only":>10} {"with polling":>13} {"bytes":>7}')
+        results = {}
+        for name, read in (('3 driver properties', properties), ('read()', snapshot)):
+            values, transactions, size, read_transactions = run(sim, sensor, read, args.readings)
+            results[name] = values
+            print(f'{name:22} {read_transactions / args.readings:>10.1f} {transactions / args.readings:>13.1f} '
+                  f'{size / args.readings:>7.1f}    per reading')
+        print(f'\nlast values, properties: {results["3 driver properties"]}')
+        print(f'            read()    : {results["read()"]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""What each sensor driver costs to load: modules imported, import time, memory.  What a board doesn't pay for a
+driver that settings.toml doesn't list.
+
+    python simulation/bench_sensor_registry.py
+
+Each driver is loaded through sensor_registry.load_driver() in its own process, after sensor_registry itself, so
+only the driver's own imports are counted.  Memory is CPython's (tracemalloc), several times the board's, good for
+comparing drivers with each other (see simulation/heap.py).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+
+# pulled in on the host only (Blinka's board support, typing), not on CircuitPython
+HOST_ONLY = ('simulation', 'adafruit_blinka', 'adafruit_platformdetect', 'busio', 'circuitpython_typing',
+             'typing_extensions', 'glob')
+
+
+def measure(name: str) -> dict:
+    simulation.install()
+    tracemalloc.start()
+    started = time.perf_counter()
+    import sensor_registry
+    registry_time = time.perf_counter() - started
+    registry_memory = tracemalloc.get_traced_memory()[0]
+    before = set(sys.modules)
+    started = time.perf_counter()
+    if name != '-':
+        sensor_registry.load_driver(name)
+    return {
+        'registry_ms': 1000 * registry_time,
+        'registry_kb': registry_memory / 1024,
+        'ms': 1000 * (time.perf_counter() - started),
+        'kb': (tracemalloc.get_traced_memory()[0] - registry_memory) / 1024,
+        'modules': sorted(set(sys.modules) - before),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--driver', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.driver:
+        print(json.dumps(measure(args.driver)))
+        return
+
+    simulation.install()
+    import sensor_registry
+    print(f'{"driver":10} {"import ms":>10} {"KB":>8}   modules')
+    for name in ['-', *sensor_registry.DRIVERS]:
+        # one process per driver, so nothing is imported already
+        output = subprocess.run([sys.executable, __file__, '--driver', name], check=True, capture_output=True,
+                                text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if name == '-':
+            print(f'{"registry":10} {result["registry_ms"]:>10.1f} {result["registry_kb"]:>8.1f}   sensor_registry')
+            continue
+        modules = [m for m in result['modules'] if '.' not in m and not m.startswith(HOST_ONLY)]
+        print(f'{name:10} {result["ms"]:>10.1f} {result["kb"]:>8.1f}   {", ".join(modules)}')
+
+
+if __name__ == '__main__':
+    main()
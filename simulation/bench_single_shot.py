@@ -0,0 +1,136 @@
+"""Single-shot measurements from a scheduler: awaitable API against send-the-command-and-sleep.
+
+    python simulation/bench_single_shot.py                      # all cases, each in its own process
+    python simulation/bench_single_shot.py --case SCD40-async
+
+A button-like task runs every 10 ms next to a sampler that takes a single shot every 30 s, both on asyncio, on the
+simulated SCD4x (virtual clock, datasheet timings).  The longest gap between button runs is the stall the
+measurements cause.  "blocking" is the old API: measure_single_shot_all() (adafruit_scd4x sleeps the 5 s), then read.
+SCD40 has no single-shot command, its "blocking" case does the periodic burst with time.sleep().
+
+"SCD40-switch" checks a mode change right after an emulated shot, while the shot's stop is still running (the
+sampling controller does that when a shot shows fast change): the sensor must not see a command before it is free.
+Exits with 1 if the change fails or measurement doesn't start.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from simulation.sim import Simulation
+
+SHOTS = 20
+SHOT_PERIOD = 30.0
+
+
+def blocking_scd41(sensor):
+    sensor.measure_single_shot_all()    # adafruit_scd4x sleeps the 5 s in there
+    return sensor.read()
+
+
+def blocking_scd40(sensor):
+    chip = sensor._scd4x
+    chip.start_periodic_measurement()
+    time.sleep(5.0)
+    measurement = sensor.read()
+    chip.stop_periodic_measurement()    # sleeps 500 ms
+    return measurement
+
+
+CASES = {
+    'SCD41-blocking': ('SCD41', blocking_scd41),
+    'SCD41-async':    ('SCD41', None),
+    'SCD40-blocking': ('SCD40', blocking_scd40),
+    'SCD40-async':    ('SCD40', None),
+    'SCD40-switch':   ('SCD40', None),
+}
+
+
+def run_switch() -> None:
+    """Single shot, then straight to SLOW and FAST, like SamplingController after a shot showing fast change"""
+    sim = Simulation(duration=120, sensor_model='SCD40')
+    with sim:
+        from air_quality_sensors import AirSensorSCD4x
+        modes = AirSensorSCD4x.MeasurementMode
+        sensor = AirSensorSCD4x(sensor_model=AirSensorSCD4x.SensorModel.SCD40, measurement_mode=modes.IDLE,
+                                load_settings_file=False)
+        results = {}
+
+        async def main() -> None:
+            await sensor.single_shot()
+            started = time.monotonic()
+            try:
+                sensor.measurement_mode = modes.SLOW
+                results['waited'] = time.monotonic() - started
+                sensor.measurement_mode = modes.FAST
+            except (OSError, RuntimeError) as ex:
+                results['error'] = ex
+                return
+            while not sensor.data_ready:
+                await asyncio.sleep(0.5)
+            results['measurement'] = sensor.read()
+
+        asyncio.run(main())
+    if 'error' in results:
+        print(f'SCD40-switch    mode change after a single shot failed: {results["error"]!r}')
+        sys.exit(1)
+    print(f'SCD40-switch    mode change right after a single shot waited {1000 * results["waited"]:.0f} ms for the '
+          f'stop, then measured CO2 {results["measurement"].co2} ppm')
+    print(f'                {sensor.config_stats.report()}')
+
+
+def run(name: str) -> None:
+    if name == 'SCD40-switch':
+        run_switch()
+        return
+    model, blocking = CASES[name]
+    sim = Simulation(duration=SHOTS * SHOT_PERIOD + 60, sensor_model=model)
+    with sim:
+        from air_quality_sensors import AirSensorSCD4x
+        sensor = AirSensorSCD4x(sensor_model=getattr(AirSensorSCD4x.SensorModel, model),
+                                measurement_mode=AirSensorSCD4x.MeasurementMode.IDLE, load_settings_file=False)
+        sim.i2c.reset_counters()
+        stats = {'max_gap': 0.0, 'shots': 0, 'co2': []}
+
+        async def button() -> None:
+            last = time.monotonic()
+            while stats['shots'] < SHOTS:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                stats['max_gap'] = max(stats['max_gap'], now - last)
+                last = now
+
+        async def sampler() -> None:
+            while stats['shots'] < SHOTS:
+                started = time.monotonic()
+                measurement = blocking(sensor) if blocking else await sensor.single_shot()
+                stats['co2'].append(measurement.co2)
+                stats['shots'] += 1
+                await asyncio.sleep(max(0.0, SHOT_PERIOD - (time.monotonic() - started)))
+
+        async def main() -> None:
+            await asyncio.gather(button(), sampler())
+
+        asyncio.run(main())
+    print(f'{name:15} {stats["shots"]} shots, button task stalled up to {1000 * stats["max_gap"]:>6.0f} ms, '
+          f'{sim.i2c.transactions / stats["shots"]:.1f} I2C transactions per shot, '
+          f'{sim.sensor.measurements_taken} sensor measurements, CO2 {min(stats["co2"])}-{max(stats["co2"])} ppm')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--case', choices=sorted(CASES))
+    args = parser.parse_args()
+    if args.case:
+        run(args.case)
+        return
+    # one Simulation per process
+    for name in CASES:
+        subprocess.run([sys.executable, __file__, '--case', name], check=True)
+
+
+if __name__ == '__main__':
+    main()
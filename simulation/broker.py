@@ -0,0 +1,279 @@
+"""Minimal MQTT 3.1.1 broker standing in for io.adafruit.com.
+
+Enough of the protocol for adafruit_minimqtt/adafruit_io: CONNECT, PUBLISH (QoS 0 and 1), SUBSCRIBE, UNSUBSCRIBE,
+PINGREQ, DISCONNECT.  Everything the bot publishes is recorded in `published`, and dashboard events can be sent to
+the bot with `inject()`.  `feed_values()` gives what Adafruit IO would store in a feed, including values that came in
+as part of a group message.  Subscribing to `time/seconds` gets the current time.time() once (the real broker sends it
+every second).
+
+Network trouble for benchmarks:
+- `latency`: one-way delay in seconds, replies show up on the bot's socket this much later (x2 for a round trip).
+- `drop_connections()`: server side hangs up on everybody.  Next send from the bot raises ENOTCONN.
+- `accepting = False`: new connections are refused.
+- `refuse_next_logins = 3`: next three MQTT CONNECTs get CONNACK 'server unavailable' and are hung up on.
+"""
+import json
+import time
+
+from simulation.fakes import socketpool
+
+# MQTT control packet types (upper nibble of the first byte)
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+SUBSCRIBE = 0x80
+SUBACK = 0x90
+UNSUBSCRIBE = 0xA0
+UNSUBACK = 0xB0
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+
+def encode_length(length: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(out)
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    """MQTT wildcard match: `+` is one level, `#` is the rest."""
+    pattern_levels = pattern.split('/')
+    topic_levels = topic.split('/')
+    for i, level in enumerate(pattern_levels):
+        if level == '#':
+            return True
+        if i >= len(topic_levels) or (level != '+' and level != topic_levels[i]):
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class PublishedMessage:
+    def __init__(self, time_received: float, client_id: str, topic: str, payload: bytes, qos: int, retain: bool):
+        self.time = time_received
+        self.client_id = client_id
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+    def __repr__(self):
+        return f'PublishedMessage(t={self.time:.2f}, topic={self.topic!r}, payload={self.payload!r})'
+
+
+
+class _Session:
+    """One client connection."""
+
+    def __init__(self, broker: 'FakeBroker', sock):
+        self.broker = broker
+        self.sock = sock
+        self.client_id = None
+        self.username = None
+        self.connected = False
+        self.subscriptions: list[str] = []
+        self._buffer = bytearray()
+
+    # region called by the fake socket
+    def receive(self, data: bytes) -> None:
+        """Bytes from the bot.  minimqtt writes packets in pieces, so buffer until a packet is complete."""
+        self.broker.bytes_received += len(data)
+        self._buffer += data
+        while True:
+            packet = self._next_packet()
+            if packet is None:
+                return
+            self.broker.packets_received += 1
+            self._handle(*packet)
+
+    def client_closed(self) -> None:
+        self.connected = False
+        self.broker._remove(self)
+    # endregion
+
+    def _next_packet(self):
+        buffer = self._buffer
+        if len(buffer) < 2:
+            return None
+        length, multiplier, index = 0, 1, 1
+        while True:
+            if index >= len(buffer):
+                return None
+            byte = buffer[index]
+            length += (byte & 0x7F) * multiplier
+            multiplier <<= 7
+            index += 1
+            if not byte & 0x80:
+                break
+        if len(buffer) < index + length:
+            return None
+        header = buffer[0]
+        body = bytes(buffer[index:index + length])
+        del buffer[:index + length]
+        return header, body
+
+    def send(self, data: bytes) -> None:
+        self.broker.bytes_sent += len(data)
+        self.sock.deliver(data, self.broker.latency * 2)   # round trip: request travelled one way already
+
+    def _handle(self, header: int, body: bytes) -> None:
+        packet_type = header & 0xF0
+        if packet_type == CONNECT:
+            self._on_connect(body)
+        elif packet_type == PUBLISH:
+            self._on_publish(header, body)
+        elif packet_type == SUBSCRIBE:
+            self._on_subscribe(body)
+        elif packet_type == UNSUBSCRIBE:
+            self._on_unsubscribe(body)
+        elif packet_type == PINGREQ:
+            self.broker.ping_count += 1
+            self.send(bytes((PINGRESP, 0)))
+        elif packet_type == DISCONNECT:
+            self.connected = False
+            self.sock.server_closed()
+            self.broker._remove(self)
+        # anything else (PUBACK from the client etc.) needs no answer
+
+    @staticmethod
+    def _read_string(body: bytes, index: int):
+        length = (body[index] << 8) | body[index + 1]
+        return body[index + 2:index + 2 + length].decode(), index + 2 + length
+
+    def _on_connect(self, body: bytes) -> None:
+        _, index = self._read_string(body, 0)          # protocol name 'MQTT'
+        flags = body[index + 1]
+        index += 4                                     # level, flags, keep alive
+        self.client_id, index = self._read_string(body, index)
+        if flags & 0x04:                               # will topic + message
+            _, index = self._read_string(body, index)
+            _, index = self._read_string(body, index)
+        if flags & 0x80:
+            self.username, index = self._read_string(body, index)
+        if self.broker.refuse_next_logins > 0:
+            self.broker.refuse_next_logins -= 1
+            self.send(bytes((CONNACK, 2, 0, 3)))        # 3: server unavailable
+            self.broker._remove(self)
+            return
+        self.connected = True
+        self.broker.connect_count += 1
+        self.send(bytes((CONNACK, 2, 0, 0)))
+
+    def _on_publish(self, header: int, body: bytes) -> None:
+        qos = (header >> 1) & 0x03
+        topic, index = self._read_string(body, 0)
+        packet_id = None
+        if qos:
+            packet_id = body[index:index + 2]
+            index += 2
+        self.broker.published.append(PublishedMessage(time.monotonic(), self.client_id, topic, body[index:], qos,
+                                                      bool(header & 0x01)))
+        if qos:
+            self.send(bytes((PUBACK, 2)) + packet_id)
+
+    def _on_subscribe(self, body: bytes) -> None:
+        packet_id = body[:2]
+        index = 2
+        granted = bytearray()
+        while index < len(body):
+            topic, index = self._read_string(body, index)
+            qos = body[index]
+            index += 1
+            self.subscriptions.append(topic)
+            granted.append(min(qos, 1))
+        self.send(bytes((SUBACK,)) + encode_length(2 + len(granted)) + packet_id + granted)
+        if 'time/seconds' in self.subscriptions:
+            self.broker.inject('time/seconds', str(int(time.time())))
+
+    def _on_unsubscribe(self, body: bytes) -> None:
+        packet_id = body[:2]
+        index = 2
+        while index < len(body):
+            topic, index = self._read_string(body, index)
+            if topic in self.subscriptions:
+                self.subscriptions.remove(topic)
+        self.send(bytes((UNSUBACK, 2)) + packet_id)
+
+
+
+class FakeBroker:
+
+    def __init__(self, hostname: str = 'io.adafruit.com', *, latency: float = 0.05):
+        """
+        :param hostname: Name the bot connects to.  The broker registers itself with the fake socketpool.
+        :param latency: One-way network delay in seconds.
+        """
+        self.hostname = hostname
+        self.latency = latency
+        self.accepting = True
+        self.refuse_next_logins = 0
+        self.sessions: list[_Session] = []
+        self.published: list[PublishedMessage] = []
+
+        self.connect_count = 0
+        self.ping_count = 0
+        self.packets_received = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        socketpool.SERVERS[hostname] = self
+
+    def open_session(self, sock) -> _Session:
+        session = _Session(self, sock)
+        self.sessions.append(session)
+        return session
+
+    def _remove(self, session: _Session) -> None:
+        if session in self.sessions:
+            self.sessions.remove(session)
+
+    def drop_connections(self) -> None:
+        """Hang up on every client, like the broker restarting or a NAT timeout."""
+        for session in list(self.sessions):
+            session.connected = False
+            session.sock.server_closed()
+        self.sessions.clear()
+
+    def inject(self, topic: str, payload) -> int:
+        """Send a message to every client subscribed to `topic`, like a dashboard toggle.  Returns receiver count."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        topic_bytes = topic.encode()
+        body = bytes(((len(topic_bytes) >> 8) & 0xFF, len(topic_bytes) & 0xFF)) + topic_bytes + payload
+        packet = bytes((PUBLISH,)) + encode_length(len(body)) + body
+        count = 0
+        for session in self.sessions:
+            if session.connected and any(topic_matches(pattern, topic) for pattern in session.subscriptions):
+                self.bytes_sent += len(packet)
+                session.sock.deliver(packet, self.latency)
+                count += 1
+        return count
+
+    def messages(self, topic_suffix: str = '') -> list[PublishedMessage]:
+        """Published messages whose topic ends with `topic_suffix`, e.g. 'f/air-quality-sensors.co2'."""
+        return [m for m in self.published if m.topic.endswith(topic_suffix)]
+
+    def feed_values(self, feed_key: str) -> list[tuple[float, str, str | None]]:
+        """(received time, value, created_at) stored in feed `feed_key`, e.g. 'air-quality-sensors.co2'.
+
+        Counts per-feed messages (`user/f/group.key`, or `user/f/group.key/json` with `{"value", "created_at"}`) and
+        group messages (`user/g/group` with JSON `{"feeds": {"key": value}, "created_at"}`), the way Adafruit IO
+        splits a group message into its feeds.  created_at is the ISO 8601 string sent along, None if there wasn't one.
+        """
+        group, _, key = feed_key.rpartition('.')
+        values = []
+        for message in self.published:
+            if message.topic.endswith(f'/f/{feed_key}'):
+                values.append((message.time, message.payload.decode(), None))
+            elif message.topic.endswith(f'/f/{feed_key}/json'):
+                data = json.loads(message.payload)
+                values.append((message.time, str(data['value']), data.get('created_at')))
+            elif group and message.topic.endswith(f'/g/{group}'):
+                data = json.loads(message.payload)
+                if key in data.get('feeds', {}):
+                    values.append((message.time, str(data['feeds'][key]), data.get('created_at')))
+        return values
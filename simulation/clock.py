@@ -0,0 +1,169 @@
+"""Virtual clock for the simulation.
+
+`time.monotonic()`, `time.sleep()`, ... are replaced so that waiting costs no real time.  A `time.sleep(60)` or an
+asyncio task sleeping until its next period just moves the clock forward, which is how a week of bot time can
+run in a few minutes.
+
+Time spent actually running Python can optionally be counted too (`cpu_scale`).  The ESP32-S2 is a lot slower than a
+PC, so e.g. cpu_scale=20 makes every millisecond of host CPU show up as 20 ms of bot time.  With cpu_scale=0 the
+clock only moves when something sleeps, and runs are repeatable.
+"""
+import asyncio
+import heapq
+import selectors
+import time
+
+
+class SimulationComplete(BaseException):
+    """Raised from the clock when the simulation end time is reached.
+
+    BaseException so that the `except Exception` handlers in bot code don't catch it.
+    """
+
+
+class VirtualClock:
+
+    def __init__(self, *, start: float = 0.0, cpu_scale: float = 0.0, realtime_factor: float = None,
+                 epoch: float = 1735689600.0):
+        """
+        :param start: Initial value of time.monotonic().
+        :param cpu_scale: How much bot time one second of host CPU time is worth.  0 means CPU time is free.
+        :param realtime_factor: None runs as fast as possible.  Otherwise sleeps really wait, sped up by this factor.
+        :param epoch: What time.time() returns at monotonic() == 0.  Default is 2025-01-01 00:00 UTC.
+        """
+        self._skipped = start
+        self.cpu_scale = cpu_scale
+        self.realtime_factor = realtime_factor
+        self.epoch = epoch
+        self.end_time = None
+
+        self._real = {name: getattr(time, name) for name in ('monotonic', 'monotonic_ns', 'time', 'sleep')}
+        self._real_sleep = time.sleep
+        self._real_perf_counter = time.perf_counter
+        self._cpu_start = self._real_perf_counter()
+
+        self._callbacks = []    # heap of (when, sequence, callback)
+        self._callback_sequence = 0
+        self._installed = False
+        self.sleep_calls = 0
+        self.slept = 0.0
+
+
+    # region clock
+    def monotonic(self) -> float:
+        now = self._skipped
+        if self.cpu_scale:
+            now += (self._real_perf_counter() - self._cpu_start) * self.cpu_scale
+        return now
+
+    def monotonic_ns(self) -> int:
+        return int(self.monotonic() * 1_000_000_000)
+
+    def time(self) -> float:
+        return self.epoch + self.monotonic()
+
+    def ticks_ms(self) -> int:
+        """supervisor.ticks_ms(): wraps at 2**29 like on the board."""
+        return int(self.monotonic() * 1000) & ((1 << 29) - 1)
+
+    def sleep(self, seconds: float) -> None:
+        """Replacement for time.sleep().  Also used for anything that would block on the board."""
+        if seconds is None or seconds <= 0:
+            self._run_due_callbacks()
+            self._check_end()
+            return
+        self.sleep_calls += 1
+        self.slept += seconds
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward, running any scheduled callbacks on the way."""
+        target = self.monotonic() + seconds
+        if self.end_time is not None and target > self.end_time:
+            target = self.end_time
+        while self._callbacks and self._callbacks[0][0] <= target:
+            when = self._callbacks[0][0]
+            self._move_to(when)
+            self._run_due_callbacks()
+        self._move_to(target)
+        self._check_end()
+
+    def _move_to(self, when: float) -> None:
+        step = when - self.monotonic()
+        if step <= 0:
+            return
+        if self.realtime_factor:
+            self._real_sleep(step / self.realtime_factor)
+        self._skipped += step
+
+    def _check_end(self) -> None:
+        if self.end_time is not None and self.monotonic() >= self.end_time:
+            raise SimulationComplete(f'reached end of simulation at t={self.end_time:.0f} s')
+    # endregion
+
+
+    # region scheduled callbacks
+    def call_at(self, when: float, callback) -> None:
+        """Run `callback()` once the clock reaches `when` (monotonic seconds)."""
+        self._callback_sequence += 1
+        heapq.heappush(self._callbacks, (when, self._callback_sequence, callback))
+
+    def call_later(self, delay: float, callback) -> None:
+        self.call_at(self.monotonic() + delay, callback)
+
+    def _run_due_callbacks(self) -> None:
+        now = self.monotonic()
+        while self._callbacks and self._callbacks[0][0] <= now:
+            _, _, callback = heapq.heappop(self._callbacks)
+            callback()
+    # endregion
+
+
+    def install(self) -> None:
+        """Patch the `time` module.  Everything that calls time.monotonic()/sleep() after this uses the clock."""
+        if self._installed:
+            return
+        time.monotonic = self.monotonic
+        time.monotonic_ns = self.monotonic_ns
+        time.time = self.time
+        time.sleep = self.sleep
+        asyncio.set_event_loop_policy(VirtualClockEventLoopPolicy(self))
+        self._installed = True
+
+    def uninstall(self) -> None:
+        if not self._installed:
+            return
+        for name, function in self._real.items():
+            setattr(time, name, function)
+        asyncio.set_event_loop_policy(None)
+        self._installed = False
+
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """Selector that never blocks for real.  Waiting for the next timer moves the virtual clock instead."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self._clock = clock
+
+    def select(self, timeout=None):
+        events = super().select(0)
+        if events:
+            return events
+        if timeout is None:
+            # nothing scheduled at all, only a real socket could wake us up.  There are none in the simulation.
+            raise RuntimeError('event loop would wait forever: no tasks are scheduled')
+        self._clock.sleep(timeout)
+        return []
+
+
+class VirtualClockEventLoopPolicy(asyncio.DefaultEventLoopPolicy):
+    """asyncio.run() picks this up and creates loops that use the virtual clock."""
+
+    def __init__(self, clock: VirtualClock):
+        super().__init__()
+        self._clock = clock
+
+    def new_event_loop(self):
+        return asyncio.SelectorEventLoop(_VirtualSelector(self._clock))
@@ -0,0 +1,3 @@
+"""Fake CircuitPython modules.  Each module here is registered in sys.modules under the real module name by
+`simulation.install()`, so they only implement the parts the bot actually uses.
+"""
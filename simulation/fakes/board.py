@@ -0,0 +1,55 @@
+"""Fake `board` for the ESP32-S2 Reverse TFT Feather.  Only the pins/objects the bot uses.
+
+DISPLAY and the I2C bus are module-level singletons like on the board.  A Simulation can swap in its own before the
+bot code is imported.
+"""
+from simulation.fakes.framebuffer import FramebufferDisplay
+from simulation.fakes.i2c import I2CBus
+from simulation.fakes.uart import UART as _UART
+
+
+class Pin:
+    """Stands in for microcontroller.Pin.
+
+    Also holds the electrical level of the pin, so a test/benchmark can 'press' a button by setting `level`.
+    """
+
+    def __init__(self, name: str, level: bool = False):
+        self.name = name
+        self.level = level
+
+    def __repr__(self):
+        return f'board.{self.name}'
+
+
+# D0 is pulled up on the Feather (pressed == low), D1 and D2 are pulled down (pressed == high)
+D0 = Pin('D0', level=True)
+D1 = Pin('D1')
+D2 = Pin('D2')
+NEOPIXEL = Pin('NEOPIXEL')
+SCL = Pin('SCL')
+SDA = Pin('SDA')
+TX = Pin('TX')
+RX = Pin('RX')
+
+# built-in 240x135 TFT
+DISPLAY = FramebufferDisplay(width=240, height=135)
+
+# the STEMMA QT connector.  Devices (e.g. the fake SCD4x) get attached to this bus by the simulation
+_stemma_i2c = I2CBus()
+
+
+def STEMMA_I2C() -> I2CBus:
+    return _stemma_i2c
+
+
+def I2C() -> I2CBus:
+    return _stemma_i2c
+
+
+# TX/RX pins.  A simulated device (e.g. the fake PM1006) gets attached to it by the simulation
+_uart = _UART()
+
+
+def UART() -> _UART:
+    return _uart
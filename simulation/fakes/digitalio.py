@@ -0,0 +1,30 @@
+"""Fake `digitalio`.  DigitalInOut reads/writes the level held on the fake board.Pin."""
+
+
+class Direction:
+    INPUT = 0
+    OUTPUT = 1
+
+
+class Pull:
+    UP = 1
+    DOWN = 2
+
+
+class DigitalInOut:
+
+    def __init__(self, pin):
+        self._pin = pin
+        self.direction = Direction.INPUT
+        self.pull = None
+
+    @property
+    def value(self) -> bool:
+        return self._pin.level
+
+    @value.setter
+    def value(self, level: bool) -> None:
+        self._pin.level = bool(level)
+
+    def deinit(self) -> None:
+        pass
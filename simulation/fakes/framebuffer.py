@@ -0,0 +1,112 @@
+"""In-memory stand-in for board.DISPLAY (busdisplay.BusDisplay on the 240x135 TFT).
+
+The display objects themselves (Group, TileGrid, Bitmap, Palette, ...) come from Blinka's displayio, which runs
+fine on CPython.  This class only does what the physical display does: hold a root_group and turn it into pixels.
+
+Rendering is pure python and slow, so it only happens when asked for (`render()`), not on every refresh.
+"""
+from array import array
+
+
+class FramebufferDisplay:
+
+    def __init__(self, width: int = 240, height: int = 135):
+        self.width = width
+        self.height = height
+        self.auto_refresh = True
+        self.brightness = 1.0
+        self.rotation = 0
+        self._root_group = None
+
+        self.framebuffer = array('L', [0]) * (width * height)   # 0xRRGGBB per pixel
+        self.root_group_changes = 0
+        self.refresh_count = 0
+
+    @property
+    def root_group(self):
+        return self._root_group
+
+    @root_group.setter
+    def root_group(self, group) -> None:
+        if group is not self._root_group:
+            self.root_group_changes += 1
+        self._root_group = group
+
+    def refresh(self, *, target_frames_per_second: int = None, minimum_frames_per_second: int = 0) -> bool:
+        self.refresh_count += 1
+        return True
+
+
+    # region rendering
+    def render(self) -> array:
+        """Composite the current root_group into `framebuffer` and return it."""
+        fb = self.framebuffer
+        for i in range(len(fb)):
+            fb[i] = 0
+        if self._root_group is not None:
+            self._draw(self._root_group, 0, 0, 1)
+        return fb
+
+    def pixel(self, x: int, y: int) -> int:
+        return self.framebuffer[y * self.width + x]
+
+    def save_ppm(self, path: str) -> None:
+        """Write the framebuffer as a binary PPM, most image viewers open these."""
+        self.render()
+        with open(path, 'wb') as f:
+            f.write(f'P6 {self.width} {self.height} 255\n'.encode())
+            rgb = bytearray()
+            for color in self.framebuffer:
+                rgb += bytes(((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF))
+            f.write(rgb)
+
+    def _draw(self, layer, origin_x: int, origin_y: int, scale: int) -> None:
+        if getattr(layer, 'hidden', False):
+            return
+        if hasattr(layer, 'tile_width'):
+            self._draw_tilegrid(layer, origin_x + layer.x * scale, origin_y + layer.y * scale, scale)
+        elif hasattr(layer, '__len__') and hasattr(layer, 'scale'):
+            # displayio.Group (and subclasses: labels, uplot Plot, ...)
+            child_x = origin_x + layer.x * scale
+            child_y = origin_y + layer.y * scale
+            child_scale = scale * layer.scale
+            for child in layer:
+                self._draw(child, child_x, child_y, child_scale)
+        # vectorio shapes are not drawn, the bot doesn't use them
+
+    def _draw_tilegrid(self, grid, left: int, top: int, scale: int) -> None:
+        bitmap = grid.bitmap
+        shader = grid.pixel_shader
+        tile_w = grid.tile_width
+        tile_h = grid.tile_height
+        tiles_per_row = max(1, bitmap.width // tile_w)
+        get_pixel = getattr(bitmap, '_get_pixel', None) if not hasattr(bitmap, '__getitem__') else None
+        is_palette = hasattr(shader, 'is_transparent')
+        width, height, fb = self.width, self.height, self.framebuffer
+
+        for tile_y in range(grid.height):
+            for tile_x in range(grid.width):
+                tile = grid[tile_x, tile_y]
+                src_left = (tile % tiles_per_row) * tile_w
+                src_top = (tile // tiles_per_row) * tile_h
+                for py in range(tile_h):
+                    for px in range(tile_w):
+                        sx, sy = src_left + px, src_top + py
+                        value = get_pixel(sx, sy) if get_pixel else bitmap[sx, sy]
+                        if is_palette:
+                            if shader.is_transparent(value):
+                                continue
+                            color = shader[value]
+                        else:
+                            color = shader.convert(value) if shader is not None else value
+                        dest_x = left + (tile_x * tile_w + px) * scale
+                        dest_y = top + (tile_y * tile_h + py) * scale
+                        for dy in range(scale):
+                            y = dest_y + dy
+                            if y < 0 or y >= height:
+                                continue
+                            for dx in range(scale):
+                                x = dest_x + dx
+                                if 0 <= x < width:
+                                    fb[y * width + x] = color
+    # endregion
@@ -0,0 +1,73 @@
+"""Fake I2C bus (busio.I2C).  Counts every transaction so bus traffic can be compared between code versions."""
+import errno
+
+
+class I2CDevice:
+    """Base class for simulated I2C targets."""
+
+    def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def read(self, count: int) -> bytes:
+        raise NotImplementedError
+
+
+class I2CBus:
+
+    def __init__(self):
+        self.devices: dict[int, I2CDevice] = {}
+        self._locked = False
+        self.reset_counters()
+
+    def reset_counters(self) -> None:
+        self.transactions = 0   # one per writeto/readfrom_into, like a START...STOP on the wire
+        self.bytes_written = 0
+        self.bytes_read = 0
+
+    def attach(self, address: int, device: I2CDevice) -> None:
+        self.devices[address] = device
+
+    def _device(self, address: int) -> I2CDevice:
+        try:
+            return self.devices[address]
+        except KeyError:
+            # what busio raises when nobody ACKs the address
+            raise OSError(errno.ENODEV, 'No such device') from None
+
+    # region busio.I2C API
+    def try_lock(self) -> bool:
+        if self._locked:
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self) -> None:
+        self._locked = False
+
+    def scan(self) -> list[int]:
+        return sorted(self.devices)
+
+    def writeto(self, address: int, buffer, *, start: int = 0, end: int = None) -> None:
+        data = bytes(buffer[start:end])
+        self.transactions += 1
+        self.bytes_written += len(data)
+        device = self._device(address)
+        if data:
+            device.write(data)
+
+    def readfrom_into(self, address: int, buffer, *, start: int = 0, end: int = None) -> None:
+        if end is None:
+            end = len(buffer)
+        self.transactions += 1
+        data = self._device(address).read(end - start)
+        self.bytes_read += len(data)
+        buffer[start:end] = data
+
+    def writeto_then_readfrom(self, address: int, out_buffer, in_buffer, *, out_start: int = 0, out_end: int = None,
+                              in_start: int = 0, in_end: int = None) -> None:
+        self.writeto(address, out_buffer, start=out_start, end=out_end)
+        self.readfrom_into(address, in_buffer, start=in_start, end=in_end)
+
+    def deinit(self) -> None:
+        pass
+    # endregion
@@ -0,0 +1,16 @@
+"""Fake `microcontroller`.  reset() raises instead of rebooting, so a simulation can see that the board would
+have reset.
+"""
+
+
+class SimulatedReset(SystemExit):
+    """Raised by reset().  Subclass of SystemExit so that `except Exception` in bot code does not swallow it."""
+
+
+reset_count = 0
+
+
+def reset() -> None:
+    global reset_count
+    reset_count += 1
+    raise SimulatedReset('microcontroller.reset() called')
@@ -0,0 +1,12 @@
+"""Fake `micropython`.  Adafruit libraries import const() from here."""
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+viper = native
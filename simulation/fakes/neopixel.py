@@ -0,0 +1,27 @@
+"""Fake `neopixel`.  Just remembers the colors."""
+
+
+class NeoPixel:
+
+    def __init__(self, pin, n: int, *, brightness: float = 1.0, auto_write: bool = True, **kwargs):
+        self.pin = pin
+        self.n = n
+        self.brightness = brightness
+        self.auto_write = auto_write
+        self._pixels = [0] * n
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, index):
+        return self._pixels[index]
+
+    def __setitem__(self, index, color):
+        self._pixels[index] = color
+
+    def fill(self, color) -> None:
+        for i in range(self.n):
+            self._pixels[i] = color
+
+    def show(self) -> None:
+        pass
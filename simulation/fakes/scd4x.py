@@ -0,0 +1,224 @@
+"""Simulated Sensirion SCD40/SCD41 on the fake I2C bus.
+
+The real `adafruit_scd4x` driver talks to this, so the wrapper in air_quality_sensors.py is exercised for real:
+command words, CRCs, measurement timing, idle-only commands.  Readings come from a Trace (see simulation/traces.py).
+
+Timing follows the datasheet: periodic measurement every 5 s, low power periodic every 30 s, single shot 5 s,
+single shot RHT-only 50 ms.
+"""
+import errno
+import time
+
+from simulation.fakes.i2c import I2CDevice
+
+SCD4X_ADDRESS = 0x62
+
+# command words (datasheet section 3)
+START_PERIODIC = 0x21B1
+START_LOW_POWER_PERIODIC = 0x21AC
+READ_MEASUREMENT = 0xEC05
+STOP_PERIODIC = 0x3F86
+SET_TEMPERATURE_OFFSET = 0x241D
+GET_TEMPERATURE_OFFSET = 0x2318
+SET_ALTITUDE = 0x2427
+GET_ALTITUDE = 0x2322
+SET_AMBIENT_PRESSURE = 0xE000
+SET_ASC_ENABLED = 0x2416
+GET_ASC_ENABLED = 0x2313
+DATA_READY = 0xE4B8
+PERSIST_SETTINGS = 0x3615
+SERIAL_NUMBER = 0x3682
+SELF_TEST = 0x3639
+FACTORY_RESET = 0x3632
+REINIT = 0x3646
+MEASURE_SINGLE_SHOT = 0x219D
+MEASURE_SINGLE_SHOT_RHT_ONLY = 0x2196
+POWER_DOWN = 0x36E0
+WAKE_UP = 0x36F6
+GET_SENSOR_VARIANT = 0x202F
+
+# commands that are allowed while a periodic measurement is running.  Everything else is NACKed.
+_ALLOWED_WHILE_PERIODIC = (READ_MEASUREMENT, DATA_READY, STOP_PERIODIC, SET_AMBIENT_PRESSURE)
+# commands that take a 16-bit argument (+ CRC)
+_WITH_ARGUMENT = (SET_TEMPERATURE_OFFSET, SET_ALTITUDE, SET_AMBIENT_PRESSURE, SET_ASC_ENABLED)
+
+PERIODIC_INTERVAL = 5.0
+LOW_POWER_INTERVAL = 30.0
+SINGLE_SHOT_TIME = 5.0
+SINGLE_SHOT_RHT_TIME = 0.05
+STOP_TIME = 0.5
+
+
+def crc8(data: bytes) -> int:
+    """Sensirion CRC-8, polynomial 0x31, init 0xFF"""
+    crc = 0xFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+
+def _words(*values: int) -> bytes:
+    out = bytearray()
+    for value in values:
+        word = bytes(((value >> 8) & 0xFF, value & 0xFF))
+        out += word
+        out.append(crc8(word))
+    return bytes(out)
+
+
+class SCD4xDevice(I2CDevice):
+
+    class Mode:
+        IDLE = 0
+        PERIODIC = 1
+        LOW_POWER = 2
+        SLEEP = 3
+
+    def __init__(self, trace, *, model: str = 'SCD41', serial: int = 0x1234_5678_9ABC, self_heating: float = 4.0):
+        """
+        :param trace: Anything with `.sample(t) -> (co2_ppm, temperature_c, humidity)` for the air around the bot.
+        :param model: 'SCD40' or 'SCD41'.  Only SCD41 does single shot measurements.
+        :param self_heating: How much warmer the sensor runs than the air, degrees C.  The temperature offset
+                             setting is there to cancel this out.
+        """
+        self.trace = trace
+        self.model = model
+        self.serial = serial
+        self.self_heating = self_heating
+
+        self.mode = SCD4xDevice.Mode.IDLE
+        self.temperature_offset = 4.0
+        self.altitude = 0
+        self.asc_enabled = True
+        self.persist_count = 0     # EEPROM is only rated for 2000 writes, keep an eye on this
+
+        self._mode_start = 0.0
+        self._single_shot_ready_at = None
+        self._single_shot_rht_only = False
+        self._last_read_measurement = None
+        self._measurement = (0, 0, 0)   # raw words
+        self._reply = b''
+        self._busy_until = 0.0
+
+        # counters for benchmarks
+        self.measurements_taken = 0
+        self.command_counts: dict[int, int] = {}
+
+
+    # region measurement timing
+    def _interval(self) -> float:
+        return LOW_POWER_INTERVAL if self.mode == SCD4xDevice.Mode.LOW_POWER else PERIODIC_INTERVAL
+
+    def _latest_measurement_time(self, now: float):
+        """Time of most recent completed measurement, None if none yet in this mode."""
+        if self.mode in (SCD4xDevice.Mode.PERIODIC, SCD4xDevice.Mode.LOW_POWER):
+            count = int((now - self._mode_start) / self._interval())
+            if count == 0:
+                return None
+            return self._mode_start + count * self._interval()
+        if self._single_shot_ready_at is not None and now >= self._single_shot_ready_at:
+            return self._single_shot_ready_at
+        return None
+
+    def _data_ready(self, now: float) -> bool:
+        latest = self._latest_measurement_time(now)
+        return latest is not None and latest != self._last_read_measurement
+
+    def _take_measurement(self, when: float) -> None:
+        co2, temperature, humidity = self.trace.sample(when)
+        if self._single_shot_rht_only:
+            co2 = 0
+        temperature += self.self_heating - self.temperature_offset
+        co2_word = max(0, min(0xFFFF, int(round(co2))))
+        temperature_word = max(0, min(0xFFFF, int(round((temperature + 45) * 65535 / 175))))
+        humidity_word = max(0, min(0xFFFF, int(round(humidity * 65535 / 100))))
+        self._measurement = (co2_word, temperature_word, humidity_word)
+        self.measurements_taken += 1
+    # endregion
+
+
+    # region I2C target
+    def write(self, data: bytes) -> None:
+        now = time.monotonic()
+        if self.mode == SCD4xDevice.Mode.SLEEP and len(data) >= 2 and (data[0] << 8 | data[1]) == WAKE_UP:
+            self.mode = SCD4xDevice.Mode.IDLE
+            # real sensor doesn't ACK wake_up
+            raise OSError(errno.EIO, 'wake_up not acknowledged')
+        if self.mode == SCD4xDevice.Mode.SLEEP or now < self._busy_until:
+            raise OSError(errno.EIO, 'SCD4x NACK: sensor busy or asleep')
+        if len(data) < 2:
+            raise OSError(errno.EIO, 'SCD4x NACK: incomplete command')
+
+        command = (data[0] << 8) | data[1]
+        self.command_counts[command] = self.command_counts.get(command, 0) + 1
+        periodic = self.mode in (SCD4xDevice.Mode.PERIODIC, SCD4xDevice.Mode.LOW_POWER)
+        if periodic and command not in _ALLOWED_WHILE_PERIODIC:
+            raise OSError(errno.EIO, f'SCD4x NACK: command 0x{command:04X} not allowed during periodic measurement')
+
+        argument = None
+        if command in _WITH_ARGUMENT:
+            if len(data) != 5 or crc8(data[2:4]) != data[4]:
+                raise OSError(errno.EIO, 'SCD4x NACK: bad argument CRC')
+            argument = (data[2] << 8) | data[3]
+
+        self._reply = b''
+        self._execute(command, argument, now)
+
+    def read(self, count: int) -> bytes:
+        reply = self._reply[:count]
+        if len(reply) < count:
+            reply += bytes(count - len(reply))
+        return reply
+
+    def _execute(self, command: int, argument, now: float) -> None:
+        Mode = SCD4xDevice.Mode
+        if command == START_PERIODIC:
+            self.mode, self._mode_start = Mode.PERIODIC, now
+        elif command == START_LOW_POWER_PERIODIC:
+            self.mode, self._mode_start = Mode.LOW_POWER, now
+        elif command == STOP_PERIODIC:
+            self.mode = Mode.IDLE
+            self._busy_until = now + STOP_TIME
+        elif command == DATA_READY:
+            self._reply = _words(0x8006 if self._data_ready(now) else 0x8000)
+        elif command == READ_MEASUREMENT:
+            latest = self._latest_measurement_time(now)
+            if latest is not None and latest != self._last_read_measurement:
+                self._take_measurement(latest)
+                self._last_read_measurement = latest
+            self._reply = _words(*self._measurement)
+        elif command == SET_TEMPERATURE_OFFSET:
+            self.temperature_offset = argument * 175 / 65535
+        elif command == GET_TEMPERATURE_OFFSET:
+            self._reply = _words(int(round(self.temperature_offset * 65535 / 175)))
+        elif command == SET_ALTITUDE:
+            self.altitude = argument
+        elif command == GET_ALTITUDE:
+            self._reply = _words(self.altitude)
+        elif command == SET_ASC_ENABLED:
+            self.asc_enabled = bool(argument)
+        elif command == GET_ASC_ENABLED:
+            self._reply = _words(int(self.asc_enabled))
+        elif command == PERSIST_SETTINGS:
+            self.persist_count += 1
+            self._busy_until = now + 0.8
+        elif command == SERIAL_NUMBER:
+            self._reply = _words((self.serial >> 32) & 0xFFFF, (self.serial >> 16) & 0xFFFF, self.serial & 0xFFFF)
+        elif command == GET_SENSOR_VARIANT:
+            self._reply = _words(0x1000 if self.model == 'SCD41' else 0x0000)
+        elif command in (MEASURE_SINGLE_SHOT, MEASURE_SINGLE_SHOT_RHT_ONLY):
+            if self.model != 'SCD41':
+                raise OSError(errno.EIO, f'SCD4x NACK: {self.model} has no single shot mode')
+            self._single_shot_rht_only = command == MEASURE_SINGLE_SHOT_RHT_ONLY
+            duration = SINGLE_SHOT_RHT_TIME if self._single_shot_rht_only else SINGLE_SHOT_TIME
+            self._single_shot_ready_at = now + duration
+            self._busy_until = now + duration
+        elif command == POWER_DOWN:
+            self.mode = Mode.SLEEP
+        elif command in (REINIT, FACTORY_RESET, SELF_TEST, SET_AMBIENT_PRESSURE):
+            self._reply = _words(0)
+        else:
+            raise OSError(errno.EIO, f'SCD4x NACK: unknown command 0x{command:04X}')
+    # endregion
@@ -0,0 +1,154 @@
+"""Fake `socketpool`.  Sockets don't touch the network, they connect to simulated servers (e.g. the MQTT broker
+in simulation/broker.py) registered in `SERVERS` by hostname.
+
+Blocking behaves like on the board: recv_into() waits (on the clock) until data arrives or the socket timeout runs
+out, then raises OSError(ETIMEDOUT).  Failures can be injected per pool (`fail_next_connects`, `fail_dns`).
+"""
+import errno
+import time
+
+# hostname -> server object with `open_session(socket) -> session`.  See simulation/broker.py
+SERVERS = {}
+
+
+def address_of(host: str) -> str:
+    """Made-up IPv4 address for a registered server, what getaddrinfo() hands out."""
+    return f'10.0.0.{list(SERVERS).index(host) + 1}'
+
+
+def _find_server(host: str):
+    """Server by hostname (TLS connects by name) or by the address from getaddrinfo() (plain TCP)."""
+    if host in SERVERS:
+        return SERVERS[host]
+    for name, server in SERVERS.items():
+        if address_of(name) == host:
+            return server
+    return None
+
+
+def _not_connected() -> OSError:
+    # CircuitPython's message is just the errno name.  code.py looks for 'ENOTCONN' in str(ex)
+    return OSError(errno.ENOTCONN, 'ENOTCONN')
+
+
+class Socket:
+
+    def __init__(self, pool: 'SocketPool', family: int, socket_type: int):
+        self._pool = pool
+        self._timeout = None
+        self._session = None
+        self._inbound = bytearray()
+        self._pending = []              # (deliver_at, bytes) not yet 'on the wire'
+        self.closed = False
+        self.tls_handshake_time = 0.0   # set by the fake ssl context
+        self.tls_fails = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def settimeout(self, timeout: float) -> None:
+        self._timeout = timeout
+
+    def setsockopt(self, *args) -> None:
+        pass
+
+    def connect(self, address) -> None:
+        host, port = address
+        if self._pool.fail_next_connects > 0:
+            self._pool.fail_next_connects -= 1
+            time.sleep(self._timeout or 1.0)
+            raise OSError(errno.ETIMEDOUT, 'ETIMEDOUT')
+        server = _find_server(host)
+        if server is None or not server.accepting:
+            raise OSError(errno.ECONNREFUSED, 'ECONNREFUSED')
+        time.sleep(server.latency + self.tls_handshake_time)
+        if self.tls_fails:
+            raise OSError(-29312, 'MBEDTLS_ERR_SSL_CONN_EOF')    # what a failed handshake looks like on the board
+        self._session = server.open_session(self)
+
+    # region called by the simulated server
+    def deliver(self, data: bytes, delay: float = 0.0) -> None:
+        """Queue data for the bot to receive `delay` seconds from now."""
+        self._pending.append((time.monotonic() + delay, bytes(data)))
+
+    def server_closed(self) -> None:
+        self._session = None
+    # endregion
+
+    def _move_arrived(self) -> None:
+        now = time.monotonic()
+        while self._pending and self._pending[0][0] <= now:
+            self._inbound += self._pending.pop(0)[1]
+
+    def send(self, data) -> int:
+        if self.closed or self._session is None or not self._pool._radio.connected:
+            raise _not_connected()
+        data = bytes(data)
+        self.bytes_sent += len(data)
+        self._pool.bytes_sent += len(data)
+        self._session.receive(data)
+        return len(data)
+
+    def sendall(self, data) -> None:
+        self.send(data)
+
+    def recv_into(self, buffer, nbytes: int = 0) -> int:
+        if self.closed:
+            raise _not_connected()
+        nbytes = nbytes or len(buffer)
+        self._move_arrived()
+        if not self._inbound:
+            if self._session is None or not self._pool._radio.connected:
+                raise _not_connected()
+            # block until something arrives or the timeout runs out, same as the board
+            timeout = self._timeout if self._timeout is not None else 60.0
+            if self._pending and self._pending[0][0] - time.monotonic() <= timeout:
+                time.sleep(max(0.0, self._pending[0][0] - time.monotonic()))
+                self._move_arrived()
+            else:
+                time.sleep(timeout)
+                raise OSError(errno.ETIMEDOUT, 'ETIMEDOUT')
+        count = min(nbytes, len(self._inbound))
+        buffer[:count] = self._inbound[:count]
+        del self._inbound[:count]
+        self.bytes_received += count
+        self._pool.bytes_received += count
+        return count
+
+    def readable(self) -> bool:
+        """True if recv_into() would return data right away."""
+        self._move_arrived()
+        return bool(self._inbound)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.client_closed()
+        self._session = None
+        self.closed = True
+
+
+
+class SocketPool:
+    AF_INET = 2
+    SOCK_STREAM = 1
+    SOCK_DGRAM = 2
+    IPPROTO_TCP = 6
+    SOL_SOCKET = 0xFFF
+    SO_REUSEADDR = 4
+    TCP_NODELAY = 1
+
+    def __init__(self, radio):
+        self._radio = radio
+        self.fail_next_connects = 0
+        self.fail_dns = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def getaddrinfo(self, host: str, port: int, family: int = 0, type: int = 0, proto: int = 0, flags: int = 0):
+        if not self._radio.connected:
+            raise OSError(errno.EHOSTUNREACH, 'EHOSTUNREACH')
+        if self.fail_dns or host not in SERVERS:
+            raise OSError(-2, 'Name or service not known')   # gaierror value on the board
+        return [(SocketPool.AF_INET, SocketPool.SOCK_STREAM, 0, '', (address_of(host), port))]
+
+    def socket(self, family: int = AF_INET, type: int = SOCK_STREAM, proto: int = 0) -> Socket:
+        return Socket(self, family, type)
@@ -0,0 +1,27 @@
+"""Fake `ssl`.  The simulated broker doesn't do TLS, so wrapping a socket just adds the handshake delay on connect.
+
+`fail_next_handshakes = 3` makes the next three handshakes fail (after taking their time), the way a bad clock,
+certificate problem or flaky link does on the board.
+
+Only registered as `ssl` for the bot modules' sake.  stdlib modules that were imported before keep the real one.
+"""
+
+fail_next_handshakes = 0
+
+
+class SSLContext:
+
+    def __init__(self, handshake_time: float = 1.5):
+        self.handshake_time = handshake_time
+
+    def wrap_socket(self, sock, *, server_hostname: str = None):
+        global fail_next_handshakes
+        sock.tls_handshake_time = self.handshake_time
+        if fail_next_handshakes > 0:
+            fail_next_handshakes -= 1
+            sock.tls_fails = True
+        return sock
+
+
+def create_default_context() -> SSLContext:
+    return SSLContext()
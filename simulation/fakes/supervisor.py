@@ -0,0 +1,12 @@
+"""Fake `supervisor`.  ticks_ms() follows time.monotonic(), so it follows the virtual clock when one is installed."""
+import time
+
+
+def ticks_ms() -> int:
+    return int(time.monotonic() * 1000) & ((1 << 29) - 1)
+
+
+class runtime:   # pylint: disable=invalid-name
+    serial_connected = True
+    usb_connected = True
+    serial_bytes_available = 0
@@ -0,0 +1,130 @@
+"""Fake UART (busio.UART, what board.UART() returns) and a simulated PM1006 particle sensor on the other end.
+
+Bytes arrive at the line rate on the virtual clock (9600 baud 8N1: ~1 ms per byte), so a read can land in the middle
+of a frame like on the board.  The receive buffer is as small as CircuitPython's default, bytes beyond it are lost.
+"""
+import random
+import time
+
+
+class UART:
+
+    def __init__(self, receiver_buffer_size: int = 64):
+        self.baudrate = 9600
+        self.timeout = 1.0
+        self.receiver_buffer_size = receiver_buffer_size
+        self.device = None      # simulated device on the other end: write(data), take(now) -> bytes
+        self._rx = bytearray()
+
+        # counters for benchmarks
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.overflowed_bytes = 0
+        self.blocked_time = 0.0     # spent waiting in readinto() for a timeout
+
+    def _pump(self) -> None:
+        if self.device is None:
+            return
+        self._rx += self.device.take(time.monotonic())
+        overflow = len(self._rx) - self.receiver_buffer_size
+        if overflow > 0:
+            # hardware keeps what it has, the new bytes are lost
+            del self._rx[-overflow:]
+            self.overflowed_bytes += overflow
+
+    # region busio.UART API
+    @property
+    def in_waiting(self) -> int:
+        self._pump()
+        return len(self._rx)
+
+    def readinto(self, buffer) -> int | None:
+        self._pump()
+        if not self._rx and self.timeout:
+            # real readinto() waits up to `timeout` for the buffer to fill
+            started = time.monotonic()
+            time.sleep(self.timeout)
+            self.blocked_time += time.monotonic() - started
+            self._pump()
+        count = min(len(buffer), len(self._rx))
+        if not count:
+            return None
+        buffer[:count] = self._rx[:count]
+        del self._rx[:count]
+        self.bytes_read += count
+        return count
+
+    def write(self, data) -> int:
+        self.bytes_written += len(data)
+        if self.device is not None:
+            self.device.write(bytes(data))
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        self._rx.clear()
+    # endregion
+
+
+class PM1006Device:
+    """Answers with a PM2.5 frame every `period` seconds (a Vindriktning's own MCU asking), or when asked over UART
+    with `listen_only=False`."""
+
+    FRAME_SIZE = 20
+    BYTE_TIME = 10 / 9600       # start + 8 data + stop bits
+
+    def __init__(self, pm2_5=None, *, period: float = 20.0, listen_only: bool = True, noise: float = 1.0,
+                 seed: int = 1):
+        """
+        :param pm2_5: µg/m³ at time t, a callable.  Default steady 8 µg/m³
+        :param period: Seconds between answers when listen_only
+        :param listen_only: True: frames come on their own, like on a tapped Vindriktning
+        :param noise: Standard deviation added to each value
+        """
+        self.pm2_5 = pm2_5 or (lambda t: 8.0)
+        self.period = period
+        self.listen_only = listen_only
+        self.noise = noise
+        self._random = random.Random(seed)
+        self._next_frame_at = period
+        self._pending = []          # (time the first byte arrives, frame)
+        self.frames_sent = 0
+        self.requests = 0
+
+    def frame(self, value: int) -> bytes:
+        data = bytearray(self.FRAME_SIZE)
+        data[0:3] = b'\x16\x11\x0b'
+        data[5] = (value >> 8) & 0xFF
+        data[6] = value & 0xFF
+        data[19] = (-sum(data[:19])) & 0xFF
+        return bytes(data)
+
+    def _send(self, at: float) -> None:
+        value = self.pm2_5(at) + (self._random.gauss(0, self.noise) if self.noise else 0)
+        self._pending.append((at, self.frame(max(0, min(0xFFFF, round(value))))))
+        self.frames_sent += 1
+
+    def write(self, data: bytes) -> None:
+        if data == b'\x11\x02\x0b\x01\xe1':
+            self.requests += 1
+            if not self.listen_only:
+                # answers right after the request
+                self._send(time.monotonic() + len(data) * self.BYTE_TIME)
+
+    def take(self, now: float) -> bytes:
+        """Bytes that have arrived by `now`"""
+        if self.listen_only:
+            while self._next_frame_at <= now:
+                self._send(self._next_frame_at)
+                self._next_frame_at += self.period
+        arrived = bytearray()
+        while self._pending:
+            start, frame = self._pending[0]
+            count = min(len(frame), int((now - start) / self.BYTE_TIME))
+            if count <= 0:
+                break
+            arrived += frame[:count]
+            if count < len(frame):
+                self._pending[0] = (start + count * self.BYTE_TIME, frame[count:])
+                break
+            self._pending.pop(0)
+        return bytes(arrived)
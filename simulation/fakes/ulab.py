@@ -0,0 +1,13 @@
+"""Fake `ulab`.  circuitpython_uplot does `from ulab import numpy as np`; on a PC the real numpy does the job.
+
+One difference matters: indexing a ulab array gives plain Python ints, numpy gives numpy scalars which keep their
+dtype.  uplot keeps pixel coordinates in int16 arrays and Blinka's Bitmap then does 32-bit mask arithmetic with them,
+which overflows int16.  So `ulab.numpy.int16` is a wider type here; values are pixel coordinates, they never wrap.
+"""
+import types
+
+import numpy as _numpy
+
+numpy = types.ModuleType('ulab.numpy', _numpy.__doc__)
+numpy.__dict__.update({name: getattr(_numpy, name) for name in dir(_numpy) if not name.startswith('__')})
+numpy.int16 = _numpy.int64
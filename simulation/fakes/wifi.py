@@ -0,0 +1,49 @@
+"""Fake `wifi`.  `radio` is the module-level singleton like on the board.
+
+Failures can be injected: `radio.fail_next_connects = 3` makes the next three connect() calls raise, and
+`radio.drop()` takes the link down (like walking out of range).
+"""
+import time
+
+
+class Radio:
+
+    def __init__(self):
+        self.enabled = True
+        self.hostname = 'slartibartfast'
+        self.mac_address = bytes((0x7C, 0xDF, 0xA1, 0x00, 0x00, 0x42))
+        self.access_points: dict[str, str] = {}   # ssid -> password.  Empty means any ssid/password works
+        self.connect_time = 2.0                   # seconds a successful connect blocks for
+        self.fail_next_connects = 0
+        self.connect_attempts = 0
+        self._ipv4_address = None
+
+    @property
+    def connected(self) -> bool:
+        return self._ipv4_address is not None
+
+    @property
+    def ipv4_address(self):
+        return self._ipv4_address
+
+    def connect(self, ssid: str, password: str = '', *, channel: int = 0, bssid=None, timeout: float = None) -> None:
+        self.connect_attempts += 1
+        if self.fail_next_connects > 0:
+            self.fail_next_connects -= 1
+            time.sleep(timeout or 8.0)
+            raise ConnectionError('No network with that ssid')
+        if self.access_points and self.access_points.get(ssid) != password:
+            time.sleep(timeout or 8.0)
+            raise ConnectionError('Authentication failure')
+        time.sleep(self.connect_time)
+        self._ipv4_address = '192.168.1.42'
+
+    def drop(self) -> None:
+        """Lose the access point."""
+        self._ipv4_address = None
+
+    def stop_station(self) -> None:
+        self._ipv4_address = None
+
+
+radio = Radio()
@@ -0,0 +1,28 @@
+"""CircuitPython's `gc.mem_free()` / `gc.mem_alloc()` on CPython.
+
+Bot modules use these for RAM reports.  CPython's gc doesn't have them, so reports show '?' on the host unless
+`install()` is called first.  It adds them to the real `gc` module, backed by tracemalloc.
+
+Numbers are CPython allocations, several times bigger than the same objects on the board (a CPython int is 28 bytes,
+a bitmap pixel is a python object in Blinka, ...).  Good for before/after comparisons, not as absolute values.
+tracemalloc also slows python down a lot, so this is opt-in.
+"""
+import gc
+import tracemalloc
+
+# ESP32-S2 Reverse TFT: 2 MB PSRAM, most of it heap.  Only used to make mem_free() look plausible
+HEAP_SIZE = 2 * 1024 * 1024
+
+
+def install(heap_size: int = HEAP_SIZE) -> None:
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    gc.mem_alloc = lambda: tracemalloc.get_traced_memory()[0]
+    gc.mem_free = lambda: heap_size - tracemalloc.get_traced_memory()[0]
+
+
+def uninstall() -> None:
+    for name in ('mem_alloc', 'mem_free'):
+        if hasattr(gc, name):
+            delattr(gc, name)
+    tracemalloc.stop()
@@ -0,0 +1,143 @@
+"""Run code.py on the PC against the simulated sensor/broker/display, on a virtual clock.
+
+    python simulation/run_code.py --hours 24 --scenario daily_home
+    python simulation/run_code.py --hours 2 --profile        # where does the bot spend its CPU time?
+    python simulation/run_code.py --minutes 10 --screenshot screen.ppm
+
+Simulated time is free, so a day of bot time takes about as long as the Python work the bot does in that day.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import simulation
+from simulation import traces
+from simulation.sim import Simulation
+
+# bot modules, for filtering profiler output
+BOT_FILES = ('code.py', 'boot_profiler.py', 'heap_monitor.py', 'latency.py', 'scheduler.py', 'sensor_registry.py',
+             'air_quality_sensors.py', 'pm1006.py', 'adafruitdashboard.py', 'bot_screen.py', 'display_top_level.py',
+             'displays_graphing.py', 'displays_single_value.py', 'callbacks.py')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    duration = parser.add_mutually_exclusive_group()
+    duration.add_argument('--hours', type=float)
+    duration.add_argument('--minutes', type=float)
+    parser.add_argument('--scenario', choices=sorted(traces.SCENARIOS), default='steady')
+    parser.add_argument('--csv', help='replay a recorded CSV (time,co2,temperature_c,humidity) instead')
+    parser.add_argument('--model', choices=('SCD40', 'SCD41'), default='SCD41')
+    parser.add_argument('--latency', type=float, default=0.05, help='one-way broker latency, seconds')
+    parser.add_argument('--cpu-scale', type=float, default=0.0,
+                        help='bot seconds per host CPU second, ~20 approximates the ESP32-S2')
+    parser.add_argument('--period-floor', type=float, default=None,
+                        help='shortest task period, speeds up long runs (e.g. 0.25)')
+    parser.add_argument('--press', action='append', default=[], metavar='PIN@SECONDS',
+                        help='press a button, e.g. D2@120.  Can be repeated')
+    parser.add_argument('--drop-broker', action='append', type=float, default=[], metavar='SECONDS',
+                        help='broker hangs up on the bot at this time.  Can be repeated')
+    parser.add_argument('--outage', action='append', default=[], metavar='START:SECONDS',
+                        help='broker unreachable from START for SECONDS.  Can be repeated')
+    parser.add_argument('--sensors', help='settings.toml `sensors`, e.g. "scd4x, pm1006".  See sensor_registry.py')
+    parser.add_argument('--pm1006-poll-period', type=float, default=None,
+                        help='ask the PM1006 every SECONDS instead of listening in on a Vindriktning')
+    parser.add_argument('--heap', action='store_true',
+                        help="gc.mem_free() / mem_alloc() on the host for heap_monitor.py's report (slow, see heap.py)")
+    parser.add_argument('--profile', action='store_true', help='cProfile the run, show bot functions only')
+    parser.add_argument('--screenshot', help='save the screen at the end of the run as PPM')
+    parser.add_argument('--quiet', action='store_true', help="hide the bot's own print output")
+    args = parser.parse_args()
+
+    seconds = 3600.0
+    if args.hours is not None:
+        seconds = args.hours * 3600
+    elif args.minutes is not None:
+        seconds = args.minutes * 60
+
+    trace = traces.from_csv(args.csv) if args.csv else traces.SCENARIOS[args.scenario]()
+    settings = {}
+    if args.sensors:
+        settings['sensors'] = args.sensors
+    if args.pm1006_poll_period:
+        settings['pm1006_poll_period'] = args.pm1006_poll_period
+    sim = Simulation(trace=trace, duration=seconds, sensor_model=args.model, broker_latency=args.latency,
+                     cpu_scale=args.cpu_scale, period_floor=args.period_floor, settings=settings)
+    for press in args.press:
+        pin_name, at = press.split('@')
+        sim.press(pin_name, at=float(at))
+    for at in args.drop_broker:
+        sim.at(at, sim.broker.drop_connections)
+    for outage in args.outage:
+        start, duration = outage.split(':')
+        sim.outage(at=float(start), duration=float(duration))
+
+    if args.heap:
+        from simulation import heap
+        # Blinka and CPython objects alone are more than the board's 2 MB, give it room so free RAM stays positive
+        heap.install(heap_size=64 * 1024 * 1024)
+
+    stdout = sys.stdout
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        bot = sim.run_file('code.py')
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if args.quiet:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    # reports that add up time up to now (sampling modes) need the simulated clock, the host's is way behind it
+    sim.clock.install()
+    print()
+    print(sim.report())
+    if args.cpu_scale and 'boot_profiler' in bot:
+        # boot only takes time on the virtual clock if CPU time counts
+        print()
+        print(bot['boot_profiler'].report())
+    if 'scheduler' in bot:
+        print()
+        print(bot['scheduler'].report())
+    if 'io' in bot:
+        print(bot['io'].publish_stats.report())
+    if 'outbox' in bot:
+        print(bot['outbox'].report())
+    if 'connection' in bot:
+        print(bot['connection'].report())
+    if 'reading_log' in bot:
+        print(bot['reading_log'].report())
+    for sampler in bot.get('samplers', {}).values():
+        print(sampler.report())
+    for sensor in bot.get('sensors', ()):
+        print(sensor.report())
+    if 'latency' in bot:
+        print()
+        print(bot['latency'].report())
+    if 'heap' in bot and bot['heap'].available:
+        print()
+        print(bot['heap'].report())
+        # tracemalloc counts the whole process.  The fake broker keeps every message the bot published
+        print(f'(host: live heap includes the simulation, e.g. {len(sim.broker.published)} published messages kept)')
+    sim.clock.uninstall()
+    if args.screenshot:
+        sim.display.save_ppm(args.screenshot)
+        print(f'\nscreen saved to {args.screenshot}')
+    if profiler is not None:
+        import pstats
+        stats = pstats.Stats(profiler)
+        stats.sort_stats('cumulative')
+        print()
+        stats.print_stats('|'.join(os.path.join(simulation.REPO_ROOT, name).replace('\\', '\\\\').replace('.', r'\.')
+                                   for name in BOT_FILES), 30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Run the bot against simulated hardware: SCD4x on the I2C bus, wifi, an MQTT broker, buttons and a virtual clock.
+
+    from simulation.sim import Simulation
+    from simulation import traces
+
+    sim = Simulation(trace=traces.daily_home(), duration=6 * 3600)
+    sim.press('D2', at=120)                       # show the graphs two minutes in
+    sim.at(1800, sim.broker.drop_connections)     # broker hangs up half an hour in
+    bot = sim.run_file('code.py')                 # returns code.py's globals once the clock reaches `duration`
+    print(bot['scheduler'].report())
+
+One Simulation per process.  The fakes are module-level singletons, like the hardware they stand in for.
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import simulation
+from simulation.broker import FakeBroker
+from simulation.clock import SimulationComplete, VirtualClock
+from simulation.fakes import board, microcontroller, wifi
+from simulation.fakes.scd4x import SCD4X_ADDRESS, SCD4xDevice
+from simulation.fakes.uart import PM1006Device
+from simulation import traces
+
+# what settings.toml would hold on the board.  CircuitPython's os.getenv() returns ints/bools unquoted in the toml
+# as int/bool, everything else as str
+DEFAULT_SETTINGS = {
+    'CIRCUITPY_WIFI_SSID': 'simulated-ssid',
+    'CIRCUITPY_WIFI_PASSWORD': 'simulated-password',
+    'ADAFRUIT_AIO_USERNAME': 'slartibartfast',
+    'ADAFRUIT_AIO_KEY': 'aio_simulated_key',
+    'scd4x_altitude_offset': 0,
+    'scd4x_temperature_offset': 4.0,
+    'scd4x_self_cal_enabled': True,
+}
+
+# pin name -> level while pressed.  D0 is pulled up (active low), D1 and D2 are pulled down
+_PRESSED_LEVEL = {'D0': False, 'D1': True, 'D2': True}
+
+
+class Simulation:
+
+    def __init__(self, *, trace=None, duration: float = 3600, sensor_model: str = 'SCD41',
+                 broker_latency: float = 0.05, cpu_scale: float = 0.0, period_floor: float = None,
+                 settings: dict = None, pm2_5=None):
+        """
+        :param trace: Sensor input, see simulation/traces.py.  Default is steady indoor air.
+        :param duration: Simulated seconds to run before stopping.
+        :param sensor_model: 'SCD40' or 'SCD41'.
+        :param broker_latency: One-way network delay to the MQTT broker, in seconds.
+        :param cpu_scale: Bot seconds per host CPU second, see VirtualClock.  0 keeps runs repeatable.
+        :param period_floor: Shortest task period allowed, in seconds.  The 10 ms button poll is 8.6 million runs
+                             a day, so long runs can raise it (e.g. 0.25) at the cost of button latency.
+        :param settings: Overrides for DEFAULT_SETTINGS.  `sensors = 'scd4x, pm1006'` to run with the PM1006 too
+        :param pm2_5: PM2.5 µg/m³ at time t for the simulated PM1006, a callable.  Default steady 8 µg/m³
+        """
+        simulation.install()
+
+        self.clock = VirtualClock(cpu_scale=cpu_scale)
+        self.clock.end_time = duration
+        self.period_floor = period_floor
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        # CIRCUITPY/log on the board.  A fresh folder per run, so runs don't continue each other's reading log
+        self.settings.setdefault('reading_log_dir', tempfile.mkdtemp(prefix='slartibartfast-log-'))
+        # so AirSensorSCD4x.from_settings() expects the model that is simulated
+        self.settings.setdefault('scd4x_model', sensor_model)
+
+        self.sensor = SCD4xDevice(trace or traces.steady(), model=sensor_model)
+        self.i2c = board.STEMMA_I2C()
+        self.i2c.attach(SCD4X_ADDRESS, self.sensor)
+        # tapped Vindriktning: a frame every 20 s on its own.  With pm1006_poll_period set the bot asks instead
+        self.pm1006 = PM1006Device(pm2_5, listen_only=not self.settings.get('pm1006_poll_period'))
+        self.uart = board.UART()
+        self.uart.device = self.pm1006
+        self.broker = FakeBroker(latency=broker_latency)
+        self.radio = wifi.radio
+        self.display = board.DISPLAY
+
+        self._real_getenv = os.getenv
+        self._saved_cwd = None
+        self._patched_add = None
+        self.real_time = 0.0
+
+
+    # region scripting
+    def at(self, when: float, callback) -> None:
+        """Call `callback()` when the simulated clock reaches `when` seconds."""
+        self.clock.call_at(when, callback)
+
+    def press(self, pin_name: str, *, at: float, hold: float = 0.2) -> None:
+        """Press button `pin_name` ('D0', 'D1', 'D2') at time `at` for `hold` seconds."""
+        pin = getattr(board, pin_name)
+        pressed = _PRESSED_LEVEL[pin_name]
+        self.clock.call_at(at, lambda: setattr(pin, 'level', pressed))
+        self.clock.call_at(at + hold, lambda: setattr(pin, 'level', not pressed))
+
+    def outage(self, *, at: float, duration: float) -> None:
+        """Broker unreachable from `at` for `duration` seconds: hangs up on the bot and refuses connections."""
+        def start():
+            self.broker.accepting = False
+            self.broker.drop_connections()
+        self.clock.call_at(at, start)
+        self.clock.call_at(at + duration, lambda: setattr(self.broker, 'accepting', True))
+    # endregion
+
+
+    def _getenv(self, key: str, default=None):
+        if key in self.settings:
+            return self.settings[key]
+        return self._real_getenv(key, default)
+
+    def start(self) -> None:
+        # Blinka's displayio refreshes displays from a thread that calls time.sleep().  Stop it before the clock is
+        # installed, otherwise it sleeps on the virtual clock too.  Our display refreshes on demand anyway.
+        import displayio
+        if hasattr(displayio, '_stop_background'):
+            displayio._stop_background()
+        # CircuitPython 8 had displayio.Display, the bot's type hints still use it.  Newer Blinka doesn't have it
+        if not hasattr(displayio, 'Display'):
+            displayio.Display = type(self.display)
+
+        self.clock.install()
+        os.getenv = self._getenv
+        self._saved_cwd = os.getcwd()
+        os.chdir(simulation.REPO_ROOT)   # fonts/ and bitmaps/ are opened relative to the working directory
+
+        if self.period_floor:
+            import scheduler
+            real_add = scheduler.TaskScheduler.add
+            floor = self.period_floor
+
+            def add(self, name, action, period, budget=None):
+                return real_add(self, name, action, max(period, floor), budget)
+            scheduler.TaskScheduler.add = add
+            self._patched_add = real_add
+
+    def stop(self) -> None:
+        if self._patched_add is not None:
+            import scheduler
+            scheduler.TaskScheduler.add = self._patched_add
+            self._patched_add = None
+        if self._saved_cwd is not None:
+            os.chdir(self._saved_cwd)
+            self._saved_cwd = None
+        os.getenv = self._real_getenv
+        self.clock.uninstall()
+
+    def __enter__(self) -> 'Simulation':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+    def run_file(self, path: str = 'code.py') -> dict:
+        """Run a bot script (path relative to repo root) until the simulation ends.  Returns the script's globals.
+
+        microcontroller.reset() ends the run too, check `microcontroller.reset_count` afterwards.
+        """
+        path = os.path.join(simulation.REPO_ROOT, path)
+        with open(path) as f:
+            code = compile(f.read(), path, 'exec')
+        bot_globals = {'__name__': '__main__', '__file__': path, '__builtins__': __builtins__}
+
+        # a reset leaves the asyncio tasks unfinished, asyncio would log every one of them as 'never retrieved'
+        logging.getLogger('asyncio').setLevel(logging.CRITICAL)
+        started = time.perf_counter()
+        with self:
+            try:
+                exec(code, bot_globals)
+            except SimulationComplete:
+                pass
+            except microcontroller.SimulatedReset as ex:
+                print(f'\n[simulation] {ex} at t={self.clock.monotonic():.1f} s', file=sys.stderr)
+        self.real_time = time.perf_counter() - started
+        return bot_globals
+
+
+    def report(self) -> str:
+        sim_time = self.clock.monotonic()
+        speedup = sim_time / self.real_time if self.real_time else 0.0
+        lines = [
+            f'simulated {sim_time:,.0f} s in {self.real_time:,.1f} s real time ({speedup:,.0f}x)',
+            f'sensor   : {self.sensor.measurements_taken} measurements, {self.i2c.transactions} I2C transactions, '
+            f'{self.i2c.bytes_written + self.i2c.bytes_read} bytes, {self.sensor.persist_count} EEPROM writes',
+            f'wifi     : {self.radio.connect_attempts} connect attempts',
+            f'uart     : {self.uart.bytes_read} bytes read, {self.uart.overflowed_bytes} overflowed, '
+            f'{self.uart.blocked_time:.2f} s blocked, PM1006 {self.pm1006.frames_sent} frames sent',
+            f'broker   : {self.broker.connect_count} connects, {len(self.broker.published)} publishes, '
+            f'{self.broker.ping_count} pings, {self.broker.bytes_received} bytes in, {self.broker.bytes_sent} bytes out',
+            f'display  : {self.display.root_group_changes} screen changes',
+            f'resets   : {microcontroller.reset_count}',
+        ]
+        display_fields = sys.modules.get('display_fields')
+        if display_fields is not None:
+            lines.insert(-1, f'           {display_fields.stats.report()}')
+        return '\n'.join(lines)
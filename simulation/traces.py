@@ -0,0 +1,140 @@
+"""Sensor input for the simulation: what the air is doing over time.
+
+A Trace is piecewise-linear CO2 / temperature / humidity between (time, co2, temperature_c, humidity) points, with
+optional noise.  The scenarios below are rough shapes of real days; `from_csv()` replays a recorded log.
+"""
+import csv
+import random
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class Trace:
+
+    def __init__(self, points: list, *, noise: tuple = (0, 0, 0), seed: int = 1, repeat: float = None):
+        """
+        :param points: (t_seconds, co2_ppm, temperature_c, humidity) sorted by time.
+        :param noise: Standard deviation added to each of (co2, temperature, humidity).
+        :param seed: Noise seed, same seed gives the same run.
+        :param repeat: Wrap time at this period (e.g. DAY), None holds the last point forever.
+        """
+        if not points:
+            raise ValueError('trace needs at least one point')
+        self.points = sorted(points)
+        self.noise = noise
+        self.repeat = repeat
+        self._random = random.Random(seed)
+        self._index = 0     # samples mostly move forward, so remember where the last one was
+
+    def _interpolate(self, t: float) -> tuple:
+        points = self.points
+        if t <= points[0][0]:
+            return points[0][1:]
+        if t >= points[-1][0]:
+            return points[-1][1:]
+        if points[self._index][0] > t:
+            self._index = 0
+        while points[self._index + 1][0] < t:
+            self._index += 1
+        (t0, *a), (t1, *b) = points[self._index], points[self._index + 1]
+        f = (t - t0) / (t1 - t0) if t1 > t0 else 0.0
+        return tuple(x + (y - x) * f for x, y in zip(a, b))
+
+    def sample(self, t: float) -> tuple:
+        """(co2_ppm, temperature_c, humidity) at time t."""
+        if self.repeat:
+            t = t % self.repeat
+        co2, temperature, humidity = self._interpolate(t)
+        gauss = self._random.gauss
+        co2 += gauss(0, self.noise[0]) if self.noise[0] else 0
+        temperature += gauss(0, self.noise[1]) if self.noise[1] else 0
+        humidity += gauss(0, self.noise[2]) if self.noise[2] else 0
+        return max(0.0, co2), temperature, min(100.0, max(0.0, humidity))
+
+
+
+# region scenarios
+def steady(co2: float = 600, temperature_c: float = 22, humidity: float = 45) -> Trace:
+    return Trace([(0, co2, temperature_c, humidity)], noise=(8, 0.05, 0.3))
+
+
+def daily_home() -> Trace:
+    """Bedroom: CO2 climbs overnight with the door shut, aired out in the morning, empty during the day."""
+    points = [
+        (0 * HOUR, 1400, 21.0, 50),
+        (7 * HOUR, 1900, 20.0, 55),
+        (7.5 * HOUR, 700, 19.5, 48),     # window open
+        (9 * HOUR, 520, 20.5, 45),
+        (17 * HOUR, 480, 22.5, 42),
+        (22 * HOUR, 800, 22.0, 45),      # back in the room
+        (24 * HOUR, 1400, 21.0, 50),
+    ]
+    return Trace(points, noise=(10, 0.05, 0.3), repeat=DAY)
+
+
+def car_camping() -> Trace:
+    """Sleeping in a car with the windows cracked: fast CO2 rise, condensation humidity, cold night."""
+    points = [
+        (0 * HOUR, 450, 12.0, 60),
+        (0.5 * HOUR, 2500, 13.0, 75),
+        (3 * HOUR, 4200, 11.0, 85),
+        (6 * HOUR, 5200, 8.0, 90),
+        (6.2 * HOUR, 900, 7.0, 70),      # door opened
+        (7 * HOUR, 460, 10.0, 60),
+    ]
+    return Trace(points, noise=(25, 0.1, 0.5))
+
+
+def kitchen() -> Trace:
+    """Kitchen / living room: mostly stable, with short fast events (cooking, a shower next door, airing out)."""
+    points = [
+        (0 * HOUR, 650, 20.5, 45),
+        (6.5 * HOUR, 620, 20.0, 44),
+        (7.0 * HOUR, 700, 20.5, 46),     # breakfast on the stove
+        (7.2 * HOUR, 1100, 21.5, 58),
+        (7.8 * HOUR, 850, 21.0, 50),
+        (8.0 * HOUR, 820, 21.0, 50),     # shower next door
+        (8.15 * HOUR, 830, 21.5, 72),
+        (8.8 * HOUR, 800, 21.0, 52),
+        (12.0 * HOUR, 600, 22.0, 45),
+        (18.0 * HOUR, 700, 22.5, 45),    # dinner
+        (18.3 * HOUR, 1300, 23.5, 62),
+        (19.0 * HOUR, 1250, 23.0, 55),
+        (19.1 * HOUR, 600, 21.0, 45),    # window open
+        (19.5 * HOUR, 520, 20.5, 44),
+        (24 * HOUR, 650, 20.5, 45),
+    ]
+    return Trace(points, noise=(10, 0.05, 0.3), repeat=DAY)
+
+
+def stepped(levels: list, step_time: float = 10 * 60) -> Trace:
+    """Hold each CO2 level for `step_time` seconds.  Handy for testing thresholds and graph scaling."""
+    points = []
+    for i, co2 in enumerate(levels):
+        points.append((i * step_time, co2, 22.0, 45.0))
+        points.append(((i + 1) * step_time - 1, co2, 22.0, 45.0))
+    return Trace(points)
+
+
+def from_csv(path: str, *, time_column: str = 'time', co2_column: str = 'co2',
+             temperature_column: str = 'temperature_c', humidity_column: str = 'humidity') -> Trace:
+    """Replay a logged run.  Times are seconds, and are shifted so the first row is t=0."""
+    points = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            points.append((float(row[time_column]), float(row[co2_column]), float(row[temperature_column]),
+                           float(row[humidity_column])))
+    if not points:
+        raise ValueError(f'no rows in {path}')
+    start = min(p[0] for p in points)
+    return Trace([(t - start, *rest) for t, *rest in points])
+# endregion
+
+
+SCENARIOS = {
+    'steady': steady,
+    'daily_home': daily_home,
+    'car_camping': car_camping,
+    'kitchen': kitchen,
+}